@@ -26,6 +26,7 @@ from rest_framework_simplejwt.views import (
 )
 
 from marketplace.views.auth_views import RegisterView
+from marketplace.views.metrics_views import metrics_view
 
 
 schema_view = get_schema_view(
@@ -53,6 +54,8 @@ urlpatterns = [
     path(
         "swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="swagger-ui"
     ),
+    #   Prometheus metrics (see marketplace.middleware.MetricsMiddleware)
+    path("metrics", metrics_view, name="metrics"),
     path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="redoc-ui"),
     path("swagger.json/", schema_view.without_ui(cache_timeout=0), name="swagger-json"),
 ]
@@ -1,9 +1,12 @@
 from django.contrib import admin
 
-from marketplace.models.chat import Chat, Message
+from marketplace.models.chat import Chat, ChatInbox, Message
 from marketplace.models.favorite import Favorite
 from marketplace.models.notification import Notification
+from marketplace.models.reputation import SellerReputation
 from marketplace.models.review import Review
+from marketplace.models.revocation import RevokedToken
+from marketplace.models.upload import ImageUpload
 from marketplace.models.user import CustomUser
 from marketplace.models.vehicle import (
     Vehicle,
@@ -106,6 +109,13 @@ class MessageAdmin(admin.ModelAdmin):
     search_fields = ("chat__id", "sender__username", "content")  #   Fix: Ensure field names are correct
 
 
+#  Register Chat Inbox
+@admin.register(ChatInbox)
+class ChatInboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "chat", "last_activity_at", "unread_count")
+    search_fields = ("user__username",)
+
+
 #  Register Review
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
@@ -144,3 +154,26 @@ class NotificationAdmin(admin.ModelAdmin):
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "vehicle", "created_at")
     search_fields = ("user__username", "vehicle__model__name")
+
+
+#  Register Image Upload
+@admin.register(ImageUpload)
+class ImageUploadAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "filename", "size", "received", "status", "created_at")
+    list_filter = ("status",)
+    search_fields = ("user__username", "filename", "content_hash")
+
+
+#  Register Seller Reputation
+@admin.register(SellerReputation)
+class SellerReputationAdmin(admin.ModelAdmin):
+    list_display = ("user", "rating_count", "average_rating", "score", "updated_at")
+    search_fields = ("user__username",)
+    readonly_fields = ("updated_at",)
+
+
+#  Register Revoked Token
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ("jti", "expires_at")
+    search_fields = ("jti",)
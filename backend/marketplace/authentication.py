@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from marketplace.presence import last_seen
+from marketplace.revocation import RevocableRefreshToken
+
+
+CACHE_PREFIX = "auth-user"
+TOKEN_VERSION_CLAIM = "token_version"
+
+
+def cache_key(user_id, version):
+    return f"{CACHE_PREFIX}:{user_id}:{version}"
+
+
+class UserCache:
+    """
+    Authenticated users keyed by (user id, token version), in two layers:
+    - a small in-process LRU with a TTL of a few seconds (no network hop);
+    - the shared Django cache, which `invalidate` clears for every worker.
+    A password change or deactivation bumps the version, so tokens carrying
+    the old version can no longer match a cached entry once the local TTL passes.
+    """
+
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.local = OrderedDict()
+
+    @property
+    def local_ttl(self):
+        return getattr(settings, "AUTH_USER_CACHE_LOCAL_TTL", 5)
+
+    @property
+    def shared_ttl(self):
+        return getattr(settings, "AUTH_USER_CACHE_TTL", 300)
+
+    def get(self, user_id, version):
+        key = cache_key(user_id, version)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None and entry[0] > now:
+                self.local.move_to_end(key)
+                return entry[1]
+        user = cache.get(key)
+        if user is not None:
+            self.remember(key, user)
+        return user
+
+    def set(self, user):
+        key = cache_key(user.pk, user.token_version)
+        cache.set(key, user, self.shared_ttl)
+        self.remember(key, user)
+
+    def remember(self, key, user):
+        if self.local_ttl <= 0:
+            return
+        with self.lock:
+            self.local[key] = (time.monotonic() + self.local_ttl, user)
+            self.local.move_to_end(key)
+            while len(self.local) > self.max_entries:
+                self.local.popitem(last=False)
+
+    def invalidate(self, user_id, *versions):
+        keys = [cache_key(user_id, version) for version in versions]
+        cache.delete_many(keys)
+        with self.lock:
+            for key in keys:
+                self.local.pop(key, None)
+
+    def clear_local(self):
+        with self.lock:
+            self.local.clear()
+
+
+user_cache = UserCache()
+
+
+#   Login: tokens carry the user's token version
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RevocableRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+#   Refresh: rotated refresh tokens are revoked through marketplace.revocation
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RevocableRefreshToken
+
+
+#   DRF authentication backend
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user from `user_cache` instead of
+    loading the row on every request, rejects tokens issued before the user's
+    last password change or deactivation, and records activity through the
+    batched `last_seen` tracker rather than a per-request write.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)  # Raises for unknown or inactive users
+            if user.token_version != version:
+                raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+            user_cache.set(user)
+        last_seen.touch(user.pk)
+        return user
@@ -0,0 +1,120 @@
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import Q
+
+from marketplace.models import Chat, Message
+
+
+RESUME_LIMIT = 200  # Messages replayed per reconnect; clients page with `last_id`
+
+
+def chat_group(chat_id):
+    return f"chat_{chat_id}"
+
+
+def message_payload(message):
+    """  Compact wire format shared by pushes and resume replays"""
+    return {
+        "type": "message",
+        "id": message.id,
+        "chat": message.chat_id,
+        "sender": message.sender_id,
+        "content": message.content,
+        "timestamp": message.timestamp.isoformat(),
+    }
+
+
+def broadcast_message(message):
+    """  Push a stored message to everyone connected to its chat (buyer and seller)"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        chat_group(message.chat_id),
+        {"type": "chat.message", "message": message_payload(message)},
+    )
+
+
+#   WebSocket consumer for a single Chat
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/chats/<chat_id>/?token=<jwt>&last_id=<id>
+    - Only the chat's buyer and seller may connect.
+    - On (re)connect, messages after `last_id` are replayed in order.
+    - {"type": "message", "content", "client_id"} stores a message; the sender
+      gets an "ack" with the stored id and both participants get the message.
+    - {"type": "delivered", "id"} relays a delivery receipt to the chat.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        self.chat_id = int(self.scope["url_route"]["kwargs"]["chat_id"])
+        if not self.user or not self.user.is_authenticated or not await self.is_participant():
+            await self.close(code=4403)
+            return
+
+        self.group_name = chat_group(self.chat_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.replay(self.scope.get("query_params", {}).get("last_id"))
+
+    async def disconnect(self, code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        event_type = content.get("type")
+        if event_type == "message":
+            text = str(content.get("content", "")).strip()
+            if not text:
+                await self.send_json({"type": "error", "detail": "Message content is required."})
+                return
+            # The post_save signal pushes the stored message to the chat group.
+            message = await self.create_message(text)
+            await self.send_json({"type": "ack", "client_id": content.get("client_id"), "id": message.id})
+        elif event_type == "delivered":
+            await self.channel_layer.group_send(
+                self.group_name,
+                {"type": "chat.delivered", "id": content.get("id"), "user": self.user.id},
+            )
+        else:
+            await self.send_json({"type": "error", "detail": "Unknown event type."})
+
+    async def replay(self, last_id):
+        try:
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            return
+        messages = await self.messages_after(last_id)
+        for message in messages[:RESUME_LIMIT]:
+            await self.send_json(message_payload(message))
+        await self.send_json({"type": "resumed", "more": len(messages) > RESUME_LIMIT})
+
+    #   Channel layer events
+    async def chat_message(self, event):
+        await self.send_json(event["message"])
+
+    async def chat_delivered(self, event):
+        if event["user"] != self.user.id:
+            await self.send_json({"type": "delivered", "id": event["id"], "user": event["user"]})
+
+    #   Database access
+    @database_sync_to_async
+    def is_participant(self):
+        return Chat.objects.filter(
+            Q(buyer=self.user) | Q(seller=self.user), pk=self.chat_id
+        ).exists()
+
+    @database_sync_to_async
+    def messages_after(self, last_id):
+        return list(
+            Message.objects.filter(chat_id=self.chat_id, id__gt=last_id).order_by("id")[: RESUME_LIMIT + 1]
+        )
+
+    @database_sync_to_async
+    def create_message(self, text):
+        with transaction.atomic():  # Message and inbox update commit together
+            return Message.objects.create(chat_id=self.chat_id, sender=self.user, content=text)
@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from marketplace.models.vehicle import VehicleFeaturesMapping
+
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+#   (column, queryset lookup) in output order; `features` is filled per chunk
+COLUMNS = [
+    ("id", "id"),
+    ("vin", "vin"),
+    ("brand", "model__brand__name"),
+    ("model", "model__name"),
+    ("seller_id", "seller_id"),
+    ("seller", "seller__username"),
+    ("body_type", "body_type"),
+    ("transmission", "transmission"),
+    ("fuel_type", "fuel_type"),
+    ("condition", "condition"),
+    ("year", "year"),
+    ("mileage", "mileage"),
+    ("price", "price"),
+    ("views", "views"),
+    ("color", "color"),
+    ("cylinders", "cylinders"),
+    ("engine_size", "engine_size"),
+    ("doors", "doors"),
+    ("location", "location"),
+    ("is_active", "is_active"),
+    ("created_at", "created_at"),
+]
+FIELD_NAMES = [name for name, _ in COLUMNS] + ["features"]
+PARQUET_INTEGER_COLUMNS = {
+    "id", "seller_id", "year", "mileage", "price", "views", "cylinders", "engine_size", "doors",
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+def iter_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield export rows as tuples in `FIELD_NAMES` order with constant memory:
+    rows stream from a server-side cursor (`iterator`), and feature names are
+    looked up with one query per chunk of vehicles.
+    """
+    rows = queryset.order_by("id").values_list(*[lookup for _, lookup in COLUMNS]).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from with_features(chunk)
+            chunk = []
+    yield from with_features(chunk)
+
+
+def with_features(chunk):
+    if not chunk:
+        return
+    features = {}
+    mappings = (
+        VehicleFeaturesMapping.objects.filter(vehicle_id__in=[row[0] for row in chunk])
+        .order_by("feature__name")
+        .values_list("vehicle_id", "feature__name")
+    )
+    for vehicle_id, name in mappings:
+        features.setdefault(vehicle_id, []).append(name)
+    for row in chunk:
+        yield row + ("|".join(features.get(row[0], ())),)
+
+
+class Echo:
+    """  File-like object that hands back what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELD_NAMES)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(FIELD_NAMES, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+class ChunkSink(io.RawIOBase):
+    """  Write-only sink that keeps only the bytes not yet streamed, but reports the full offset"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def parquet_type(pa, name):
+    if name in PARQUET_INTEGER_COLUMNS:
+        return pa.int64()
+    if name == "is_active":
+        return pa.bool_()
+    if name == "created_at":
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def stream_parquet(rows, row_group_size=DEFAULT_CHUNK_SIZE):
+    """  One Parquet row group per chunk; each group's bytes are yielded once written"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires the optional 'pyarrow' package.")
+
+    schema = pa.schema([(name, parquet_type(pa, name)) for name in FIELD_NAMES])
+
+    def write(writer, batch):
+        columns = [list(column) for column in zip(*batch)]
+        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+    def chunks():
+        sink = ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression="snappy")
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                write(writer, batch)
+                batch = []
+                yield sink.drain()
+        if batch:
+            write(writer, batch)
+        writer.close()
+        yield sink.drain()
+
+    return chunks()
+
+
+def export_vehicles(queryset, export_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """  Iterator of str/bytes chunks for `queryset` in `export_format`"""
+    rows = iter_rows(queryset, chunk_size)
+    if export_format == "csv":
+        return stream_csv(rows)
+    if export_format == "ndjson":
+        return stream_ndjson(rows)
+    if export_format == "parquet":
+        return stream_parquet(rows, chunk_size)
+    raise ExportError(f"Unsupported export format: {export_format}. Use one of {', '.join(FORMATS)}.")
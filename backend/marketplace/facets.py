@@ -0,0 +1,114 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from marketplace.enums.vehicle_enum import BodyType, Condition, FuelType, Transmission
+
+
+CACHE_PREFIX = "vehicle-facets"
+GENERATION_KEY = f"{CACHE_PREFIX}:generation"
+CACHE_TIMEOUT = 60 * 15
+
+#   Bucket edges as (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ("<5000", None, 5_000),
+    ("5000-10000", 5_000, 10_000),
+    ("10000-20000", 10_000, 20_000),
+    ("20000-35000", 20_000, 35_000),
+    ("35000-50000", 35_000, 50_000),
+    ("50000-75000", 50_000, 75_000),
+    ("75000-100000", 75_000, 100_000),
+    ("100000+", 100_000, None),
+]
+YEAR_BUCKETS = [
+    ("<2000", None, 2000),
+    ("2000-2009", 2000, 2010),
+    ("2010-2014", 2010, 2015),
+    ("2015-2019", 2015, 2020),
+    ("2020+", 2020, None),
+]
+CHOICE_FACETS = {
+    "fuel_type": FuelType,
+    "transmission": Transmission,
+    "body_type": BodyType,
+    "condition": Condition,
+}
+BUCKET_FACETS = {
+    "price": PRICE_BUCKETS,
+    "year": YEAR_BUCKETS,
+}
+
+
+def bucket_filter(field, lower, upper):
+    condition = Q()
+    if lower is not None:
+        condition &= Q(**{f"{field}__gte": lower})
+    if upper is not None:
+        condition &= Q(**{f"{field}__lt": upper})
+    return condition
+
+
+def facet_annotations():
+    """  One conditional COUNT per static facet value: `{alias: (facet, value, expression)}`"""
+    conditions = []
+    for field, enum in CHOICE_FACETS.items():
+        conditions += [(field, member.name, Q(**{field: member.name})) for member in enum]
+    for field, buckets in BUCKET_FACETS.items():
+        conditions += [(field, label, bucket_filter(field, lower, upper)) for label, lower, upper in buckets]
+    return {
+        f"facet_{index}": (field, value, Count("pk", filter=condition))
+        for index, (field, value, condition) in enumerate(conditions)
+    }
+
+
+def compute_facets(queryset):
+    """
+    Count every facet for `queryset` in a single grouped query: rows are grouped
+    by brand, and the remaining facets are conditional counts summed across rows.
+    """
+    annotations = facet_annotations()
+    rows = (
+        queryset.order_by()
+        .values("model__brand__name")
+        .annotate(total=Count("pk"), **{alias: expression for alias, (_, _, expression) in annotations.items()})
+        .order_by("model__brand__name")
+    )
+    facets = {"brand": {}}
+    facets.update({field: {member.name: 0 for member in enum} for field, enum in CHOICE_FACETS.items()})
+    facets.update({field: {label: 0 for label, _, _ in buckets} for field, buckets in BUCKET_FACETS.items()})
+    total = 0
+    for row in rows:
+        facets["brand"][row["model__brand__name"]] = row["total"]
+        total += row["total"]
+        for alias, (field, value, _) in annotations.items():
+            facets[field][value] += row[alias]
+    return {"total": total, "facets": facets}
+
+
+def get_generation():
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def invalidate():
+    """  Expire every cached facet result by moving to a new generation"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+def cache_key(params):
+    signature = "&".join(f"{key}={value}" for key, value in sorted(params.items()))
+    digest = hashlib.sha1(signature.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{get_generation()}:{digest}"
+
+
+def get_facets(queryset, params):
+    """  Facets for `queryset`, cached per filter signature (`params`)"""
+    key = cache_key(params)
+    result = cache.get(key)
+    if result is None:
+        result = compute_facets(queryset)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from marketplace.models.vehicle import VehicleImage
+
+
+logger = logging.getLogger(__name__)
+
+DERIVED_ROOT = "vehicle_images/derived"
+WIDTHS = (320, 640, 1280)
+THUMBNAIL_WIDTH = WIDTHS[0]
+#   Encoders in preference order; formats Pillow was built without are skipped
+FORMATS = {
+    "avif": {"format": "AVIF", "quality": 50},
+    "webp": {"format": "WEBP", "quality": 75, "method": 4},
+    "jpeg": {"format": "JPEG", "quality": 80, "optimize": True, "progressive": True},
+}
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+def available_formats():
+    return [name for name in FORMATS if name == "jpeg" or features.check(name)]
+
+
+def hash_file(file, chunk_size=64 * 1024):
+    digest = hashlib.sha256()
+    for chunk in file.chunks(chunk_size):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def derived_path(content_hash, width, extension):
+    """  Content-addressed: identical uploads share one set of derivatives"""
+    return f"{DERIVED_ROOT}/{content_hash[:2]}/{content_hash}/{width}.{extension}"
+
+
+def render_variant(original, width, options):
+    image = original.copy()
+    if image.width > width:
+        image.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+    if options["format"] == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(vehicle_image):
+    """  Write missing derivatives for `vehicle_image` and return (content_hash, variants)"""
+    with vehicle_image.image.open("rb") as file:
+        content_hash = hash_file(file)
+        file.seek(0)
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+
+    variants = {}
+    for width in WIDTHS:
+        if width > original.width and width != THUMBNAIL_WIDTH:
+            continue  # Never upscale beyond the thumbnail
+        for extension in available_formats():
+            path = derived_path(content_hash, width, extension)
+            if not default_storage.exists(path):
+                default_storage.save(path, ContentFile(render_variant(original, width, FORMATS[extension])))
+            variants.setdefault(str(width), {})[extension] = path
+    return content_hash, variants
+
+
+#   Background task (enqueued on commit when an image is uploaded)
+def process_vehicle_image(image_id):
+    vehicle_image = VehicleImage.objects.filter(pk=image_id).first()
+    if vehicle_image is None or not vehicle_image.image:
+        return
+    try:
+        content_hash, variants = generate_variants(vehicle_image)
+    except (OSError, ValueError):
+        logger.exception("Could not build variants for vehicle image %s", image_id)
+        return
+    vehicle_image.content_hash = content_hash
+    vehicle_image.variants = variants
+    vehicle_image.save(update_fields=["content_hash", "variants"])
+
+
+#   URL helpers for serializers (no storage access beyond building URLs)
+def thumbnail_url(vehicle_image):
+    """  Smallest web-friendly variant, or the original until variants exist"""
+    thumbnail = vehicle_image.variants.get(str(THUMBNAIL_WIDTH), {})
+    for extension in ("webp", "jpeg"):
+        if extension in thumbnail:
+            return default_storage.url(thumbnail[extension])
+    return vehicle_image.image.url
+
+
+def srcsets(vehicle_image):
+    """  `{mime type: "url 320w, url 640w"}` for a <picture> element"""
+    sources = {}
+    for width, formats in sorted(vehicle_image.variants.items(), key=lambda item: int(item[0])):
+        for extension, path in formats.items():
+            sources.setdefault(MIME_TYPES[extension], []).append(f"{default_storage.url(path)} {width}w")
+    return {mime: ", ".join(entries) for mime, entries in sources.items()}
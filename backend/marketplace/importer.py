@@ -0,0 +1,325 @@
+import codecs
+import csv
+import json
+
+from django.db import transaction
+
+from marketplace import facets, notifications, response_cache, search
+from marketplace.enums.vehicle_enum import BodyType, Condition, FuelType, Transmission
+from marketplace.models.vehicle import (
+    Vehicle,
+    VehicleBrand,
+    VehicleFeature,
+    VehicleFeaturesMapping,
+    VehicleModel,
+)
+from marketplace.tasks import task_queue
+
+
+FORMATS = ("csv", "json", "ndjson")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+CHOICE_FIELDS = {
+    "body_type": BodyType,
+    "transmission": Transmission,
+    "fuel_type": FuelType,
+    "condition": Condition,
+}
+INTEGER_FIELDS = ("mileage", "price", "year", "cylinders", "engine_size", "doors")
+INTEGER_MAX = 2**31 - 1  # Largest value an IntegerField column holds on every supported database
+TEXT_FIELDS = {"color": 50, "vin": 50, "location": 255, "description": None, "vehicle_history": None}
+REQUIRED_FIELDS = ("brand", "model", "vin", *CHOICE_FIELDS, *INTEGER_FIELDS, "color", "location")
+#   Columns an upsert overwrites on an existing listing (seller, views and created_at are kept)
+UPDATE_FIELDS = ["model", *CHOICE_FIELDS, *INTEGER_FIELDS, "color", "location", "description", "vehicle_history", "is_active"]
+
+
+class FeedError(ValueError):
+    """  The feed as a whole cannot be read"""
+
+
+def detect_format(name="", content_type=""):
+    """  Feed format from a file extension or a Content-Type header"""
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if extension in ("jsonl", "ndjson"):
+        return "ndjson"
+    if extension in FORMATS:
+        return extension
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+def read_rows(stream, feed_format):
+    """
+    Yield dict rows from a binary stream of `feed_format`.
+    CSV and NDJSON are decoded line by line; a JSON array is parsed whole,
+    so large feeds should use one of the line formats.
+    """
+    lines = codecs.iterdecode(stream, "utf-8-sig")
+    if feed_format == "csv":
+        yield from csv.DictReader(lines)
+    elif feed_format == "ndjson":
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    elif feed_format == "json":
+        rows = json.loads("".join(lines))
+        if not isinstance(rows, list):
+            raise FeedError("A JSON feed must be an array of objects.")
+        yield from rows
+    else:
+        raise FeedError(f"Unsupported feed format: {feed_format}. Use one of {', '.join(FORMATS)}.")
+
+
+def normalize(name):
+    return " ".join(str(name).split()).casefold()
+
+
+def parse_choice(enum, value):
+    """  Accept either the stored name (`AUTOMATIC`) or the label (`Automatic`)"""
+    value = normalize(value)
+    for member in enum:
+        if value in (member.name.casefold(), member.value.casefold()):
+            return member.name
+    raise ValueError(f"Must be one of {', '.join(member.name for member in enum)}.")
+
+
+def parse_integer(value):
+    """  Whole numbers only: `True` or `1.5` from a JSON feed is not silently truncated"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+
+def parse_features(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, str):
+        value = value.split("|")
+    return [str(name).strip() for name in value if str(name).strip()]
+
+
+def parse_bool(value):
+    if value in (None, ""):
+        return True
+    if isinstance(value, bool):
+        return value
+    return normalize(value) in ("1", "true", "yes", "y")
+
+
+class VehicleImporter:
+    """
+    Upserts a dealer's listings by VIN, `chunk_size` rows per statement.
+    - Brands, models and features are resolved through in-memory maps loaded
+      once; names the catalog lacks are created in one bulk insert per chunk.
+    - A VIN owned by another seller is reported as a row error, never overwritten.
+    - bulk_create skips model signals, so the search index, caches and price-drop
+      notifications are maintained here per chunk instead.
+    """
+
+    def __init__(self, seller, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.seller = seller
+        self.chunk_size = chunk_size
+        self.brands = {normalize(brand.name): brand for brand in VehicleBrand.objects.all()}
+        self.models = {
+            (model.brand_id, normalize(model.name)): model for model in VehicleModel.objects.all()
+        }
+        self.features = {}
+        for feature in VehicleFeature.objects.order_by("id"):
+            self.features.setdefault(normalize(feature.name), feature)
+        self.result = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    def read(self, rows):
+        """  Pass rows through until the feed ends or turns unreadable (bad encoding or JSON)"""
+        try:
+            yield from rows
+        except (csv.Error, UnicodeDecodeError, ValueError) as error:
+            self.feed_error = error
+
+    def run(self, rows):
+        self.feed_error = None
+        chunk = []
+        try:
+            for number, row in enumerate(self.read(rows), start=1):
+                self.result["rows"] = number
+                chunk.append((number, row))
+                if len(chunk) >= self.chunk_size:
+                    self.import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self.import_chunk(chunk)  # Rows read before a feed error are still imported
+        finally:
+            if self.result["created"] or self.result["updated"]:
+                facets.invalidate()
+                response_cache.invalidate("brands", "models", "vehicles")
+        if self.feed_error is not None:
+            # Report how far the import got
+            self.result["errors"].append(
+                {"row": self.result["rows"] + 1, "vin": None, "errors": {"feed": str(self.feed_error)}}
+            )
+            self.result["failed"] += 1
+        return self.result
+
+    def add_error(self, number, row, errors):
+        self.result["failed"] += 1
+        if len(self.result["errors"]) < MAX_REPORTED_ERRORS:
+            vin = row.get("vin") if isinstance(row, dict) else None
+            self.result["errors"].append({"row": number, "vin": vin, "errors": errors})
+
+    def clean(self, row):
+        """  Validate one raw row; returns (values, errors)"""
+        if not isinstance(row, dict):
+            return None, {"row": "Must be an object."}
+        values, errors = {}, {}
+        for name in REQUIRED_FIELDS:
+            if row.get(name) in (None, ""):
+                errors[name] = "This field is required."
+        for name, enum in CHOICE_FIELDS.items():
+            if name not in errors:
+                try:
+                    values[name] = parse_choice(enum, row[name])
+                except ValueError as error:
+                    errors[name] = str(error)
+        for name in INTEGER_FIELDS:
+            if name not in errors:
+                try:
+                    values[name] = parse_integer(row[name])
+                except (TypeError, ValueError):
+                    errors[name] = "A valid integer is required."
+                    continue
+                if not 0 <= values[name] <= INTEGER_MAX:
+                    errors[name] = f"Ensure this value is between 0 and {INTEGER_MAX}."
+        for name, max_length in TEXT_FIELDS.items():
+            value = str(row.get(name) or "").strip()
+            if max_length and len(value) > max_length:
+                errors[name] = f"Ensure this field has no more than {max_length} characters."
+            values[name] = value
+        values["is_active"] = parse_bool(row.get("is_active"))
+        try:
+            values["features"] = parse_features(row.get("features"))
+        except TypeError:
+            errors["features"] = "Must be a list or a '|' separated string."
+        for name in ("brand", "model"):
+            values[name] = str(row.get(name) or "").strip()
+            if len(values[name]) > 100:
+                errors[name] = "Ensure this field has no more than 100 characters."
+        return values, errors
+
+    def resolve_catalog(self, cleaned):
+        """  Create the brands, models and features this chunk references but the maps lack"""
+        new_brands = {normalize(values["brand"]): values["brand"] for _, values in cleaned}
+        new_brands = {key: name for key, name in new_brands.items() if key not in self.brands}
+        if new_brands:
+            VehicleBrand.objects.bulk_create(
+                [VehicleBrand(name=name) for name in new_brands.values()], ignore_conflicts=True
+            )
+            for brand in VehicleBrand.objects.filter(name__in=new_brands.values()):
+                self.brands[normalize(brand.name)] = brand
+
+        new_models = {}
+        for _, values in cleaned:
+            brand = self.brands[normalize(values["brand"])]
+            key = (brand.pk, normalize(values["model"]))
+            if key not in self.models:
+                new_models[key] = VehicleModel(brand=brand, name=values["model"])
+        if new_models:
+            for key, model in zip(new_models, VehicleModel.objects.bulk_create(new_models.values())):
+                self.models[key] = model
+
+        new_features = {}
+        for _, values in cleaned:
+            for name in values["features"] or ():
+                if normalize(name) not in self.features:
+                    new_features.setdefault(normalize(name), VehicleFeature(name=name))
+        if new_features:
+            for key, feature in zip(new_features, VehicleFeature.objects.bulk_create(new_features.values())):
+                self.features[key] = feature
+
+    def import_chunk(self, chunk):
+        cleaned = {}
+        for number, row in chunk:
+            values, errors = self.clean(row)
+            if errors:
+                self.add_error(number, row, errors)
+            else:
+                cleaned[values["vin"]] = (number, values)  # A repeated VIN: last row wins
+        if not cleaned:
+            return
+
+        with transaction.atomic():
+            existing = {
+                vin: (seller_id, price, is_active)
+                for vin, seller_id, price, is_active in Vehicle.objects.filter(vin__in=cleaned).values_list(
+                    "vin", "seller_id", "price", "is_active"
+                )
+            }
+            for vin in [vin for vin, (seller_id, _, _) in existing.items() if seller_id != self.seller.pk]:
+                number, values = cleaned.pop(vin)
+                self.add_error(number, values, {"vin": "A vehicle with this VIN belongs to another seller."})
+            if not cleaned:
+                return
+
+            self.resolve_catalog(cleaned.values())
+            vehicles = []
+            for _, values in cleaned.values():
+                brand = self.brands[normalize(values["brand"])]
+                fields = {name: values[name] for name in UPDATE_FIELDS if name != "model"}
+                vehicles.append(
+                    Vehicle(
+                        seller=self.seller,
+                        model=self.models[(brand.pk, normalize(values["model"]))],
+                        vin=values["vin"],
+                        **fields,
+                    )
+                )
+            Vehicle.objects.bulk_create(
+                vehicles, update_conflicts=True, unique_fields=["vin"], update_fields=UPDATE_FIELDS
+            )
+            ids = dict(Vehicle.objects.filter(vin__in=cleaned).values_list("vin", "id"))
+            self.replace_features(cleaned, ids)
+            search.index_vehicles(Vehicle.objects.filter(pk__in=ids.values()))
+            self.enqueue_notifications(cleaned, existing, ids)
+
+        self.result["updated"] += sum(1 for vin in cleaned if vin in existing)
+        self.result["created"] += sum(1 for vin in cleaned if vin not in existing)
+
+    def replace_features(self, cleaned, ids):
+        """  Rows that carry a features column get exactly that feature set"""
+        with_features = {vin: values["features"] for vin, (_, values) in cleaned.items() if values["features"] is not None}
+        if not with_features:
+            return
+        VehicleFeaturesMapping.objects.filter(vehicle_id__in=[ids[vin] for vin in with_features]).delete()
+        VehicleFeaturesMapping.objects.bulk_create(
+            [
+                VehicleFeaturesMapping(vehicle_id=ids[vin], feature=self.features[normalize(name)])
+                for vin, names in with_features.items()
+                for name in dict.fromkeys(names)
+            ]
+        )
+
+    def enqueue_notifications(self, cleaned, existing, ids):
+        """  Same price-drop / sold notifications a single save would have sent"""
+        for vin, (_, old_price, was_active) in existing.items():
+            if vin not in cleaned:
+                continue
+            values, vehicle_id = cleaned[vin][1], ids[vin]
+            if values["is_active"] and values["price"] < old_price:
+                transaction.on_commit(
+                    lambda vehicle_id=vehicle_id, old=old_price, new=values["price"]: task_queue.enqueue(
+                        notifications.notify_price_drop, vehicle_id, old, new
+                    )
+                )
+            if was_active and not values["is_active"]:
+                transaction.on_commit(
+                    lambda vehicle_id=vehicle_id: task_queue.enqueue(notifications.notify_vehicle_sold, vehicle_id)
+                )
+
+
+def import_vehicles(seller, stream, feed_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """  Import a feed for `seller`; returns counts plus per-row errors"""
+    return VehicleImporter(seller, chunk_size=chunk_size).run(read_rows(stream, feed_format))
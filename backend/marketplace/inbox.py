@@ -0,0 +1,43 @@
+from django.db.models import Case, F, When
+
+from marketplace.models import ChatInbox
+
+
+def create_entries(chat):
+    """  One inbox row for the buyer and one for the seller"""
+    ChatInbox.objects.bulk_create(
+        [
+            ChatInbox(user_id=user_id, chat=chat, last_activity_at=chat.created_at)
+            for user_id in {chat.buyer_id, chat.seller_id}
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def record_message(message):
+    """
+    Move the chat to the top of both inboxes and bump the recipient's unread
+    count in a single UPDATE. Runs inside the transaction that stored the message.
+    """
+    ChatInbox.objects.filter(chat_id=message.chat_id).update(
+        last_message=message,
+        last_message_snippet=message.content[: ChatInbox.SNIPPET_LENGTH],
+        last_activity_at=message.timestamp,
+        unread_count=Case(
+            When(user_id=message.sender_id, then=F("unread_count")),
+            default=F("unread_count") + 1,
+        ),
+    )
+
+
+def mark_read(chat, user):
+    ChatInbox.objects.filter(chat=chat, user=user).exclude(unread_count=0).update(unread_count=0)
+
+
+def inbox_for(user):
+    """  The user's chats, most recent activity first, in one indexed query"""
+    return (
+        ChatInbox.objects.filter(user=user)
+        .select_related("chat__buyer", "chat__seller", "chat__vehicle__model__brand")
+        .order_by("-last_activity_at", "-id")
+    )
@@ -0,0 +1,548 @@
+import csv
+import io
+import json
+import math
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from marketplace import reputation, search, uploads
+from marketplace.authentication import VersionedTokenObtainPairSerializer, user_cache
+from marketplace.enums.vehicle_enum import BodyType, Condition, FuelType, Transmission
+from marketplace.models import (
+    Chat,
+    CustomUser,
+    Favorite,
+    ImageUpload,
+    Message,
+    Notification,
+    Review,
+    Vehicle,
+    VehicleBrand,
+    VehicleModel,
+)
+from marketplace.models.vehicle import VehicleFeature, VehicleFeaturesMapping, VehicleImage
+from marketplace.presence import last_seen
+from marketplace.view_counter import view_counter
+
+
+RESULTS_VERSION = 1
+PASSWORD = "benchmark-password"
+BATCH_SIZE = 1000
+IMPORT_ROWS = 20
+#   Write-behind buffers must not flush benchmark rows from another connection mid-run
+BUFFER_FLUSH_INTERVAL = 24 * 60 * 60
+
+
+class Endpoint:
+    """
+    One benchmarked request. `path` and a callable `body` are filled from the
+    seeded fixture ids plus whatever `prepare()` returns; `prepare` runs inside
+    the request's savepoint but outside the timed section.
+    """
+
+    def __init__(self, name, method, path, user=None, body=None, content_type="application/json", prepare=None, headers=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.user = user
+        self.body = body
+        self.content_type = content_type
+        self.prepare = prepare
+        self.headers = headers or {}
+
+
+def percentile(samples, q):
+    """  Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    """
+    End-to-end API benchmark: seeds a catalog at the requested scale, then
+    sends every endpoint of the marketplace router (plus login and token
+    refresh) through the full middleware and view stack with Django's test
+    client, and reports p50/p99 latency, requests per second, queries and
+    bytes per request.
+    - Each request runs in a savepoint that is rolled back, so writes are
+      repeatable and every sample sees the same data; seeded rows are rolled
+      back at the end.
+    - The run uses a private in-memory cache, temporary media directories and
+      buffered view/last_seen writes that are discarded, so nothing leaks into
+      the real database, cache or storage.
+    - `--output` writes the results as JSON; `--compare` diffs against an
+      earlier file and `--fail-on-regression` turns slowdowns into an error.
+    """
+
+    help = "Benchmark latency, throughput and queries per request for every marketplace API endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--brands", type=int, default=10)
+        parser.add_argument("--models-per-brand", type=int, default=5)
+        parser.add_argument("--vehicles", type=int, default=1000)
+        parser.add_argument("--images-per-vehicle", type=int, default=3)
+        parser.add_argument("--features", type=int, default=20)
+        parser.add_argument("--features-per-vehicle", type=int, default=4)
+        parser.add_argument("--chats", type=int, default=100)
+        parser.add_argument("--messages-per-chat", type=int, default=5)
+        parser.add_argument("--reviews", type=int, default=500)
+        parser.add_argument("--favorites", type=int, default=1000)
+        parser.add_argument("--notifications", type=int, default=1000)
+        parser.add_argument("--requests", type=int, default=30, help="Timed requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint first.")
+        parser.add_argument("--endpoint", action="append", default=[], help="Only endpoints whose name contains this (repeatable).")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="Compare against results from an earlier run.")
+        parser.add_argument("--threshold", type=float, default=10.0, help="p50 slowdown (%%) counted as a regression.")
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        baseline = self.load(options["compare"]) if options["compare"] else None
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark-api"}},
+            MEDIA_ROOT=media_root,
+            FILE_UPLOAD_TEMP_DIR=media_root,
+            VIEW_COUNTER_FLUSH_INTERVAL=BUFFER_FLUSH_INTERVAL,
+            LAST_SEEN_FLUSH_INTERVAL=BUFFER_FLUSH_INTERVAL,
+            REPLICA_DATABASES=[],
+        ):
+            try:
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    self.seed()
+                    self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+                    results = self.run(self.endpoints())
+                    transaction.set_rollback(True)
+            finally:
+                self.discard_buffers()
+
+        self.report(results)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline is not None:
+            regressions = self.compare(baseline, results)
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} endpoint(s) regressed: {', '.join(regressions)}")
+
+    def load(self, path):
+        try:
+            with open(path, encoding="utf-8") as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read baseline {path}: {error}")
+        if baseline.get("version") != RESULTS_VERSION:
+            raise CommandError(f"Baseline {path} has an unsupported results version.")
+        return baseline
+
+    def discard_buffers(self):
+        """  Drop buffered view hits and last_seen times that refer to rolled-back rows"""
+        with view_counter.lock:
+            view_counter.pending.clear()
+            view_counter.recent.clear()
+        with last_seen.lock:
+            last_seen.pending.clear()
+        user_cache.clear_local()
+
+    #   Seeding
+
+    def seed(self):
+        options, rng = self.options, self.rng
+        password = make_password(PASSWORD)  # Hashed once; every user shares it
+        users = CustomUser.objects.bulk_create(
+            [
+                CustomUser(username=f"benchmark_user_{index}", email=f"user{index}@example.com", password=password)
+                for index in range(max(options["users"], 3))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        self.admin, self.buyer, self.seller = users[:3]
+        CustomUser.objects.filter(pk=self.admin.pk).update(is_staff=True, is_superuser=True)
+        sellers = [self.seller] + users[3 : max(4, len(users) // 5)]
+        buyers = [self.buyer] + [user for user in users[3:] if user not in sellers]
+
+        brands = VehicleBrand.objects.bulk_create(
+            [VehicleBrand(name=f"Benchmark Brand {index}") for index in range(max(options["brands"], 1))]
+        )
+        models = VehicleModel.objects.bulk_create(
+            [
+                VehicleModel(brand=brand, name=f"Model {index}")
+                for brand in brands
+                for index in range(max(options["models_per_brand"], 1))
+            ]
+        )
+        features = VehicleFeature.objects.bulk_create(
+            [VehicleFeature(name=f"Benchmark Feature {index}") for index in range(options["features"])]
+        )
+
+        vehicles = Vehicle.objects.bulk_create(
+            [
+                Vehicle(
+                    seller=self.seller if index == 0 else rng.choice(sellers),
+                    model=rng.choice(models),
+                    body_type=rng.choice(list(BodyType)).name,
+                    transmission=rng.choice(list(Transmission)).name,
+                    fuel_type=rng.choice(list(FuelType)).name,
+                    condition=rng.choice(list(Condition)).name,
+                    mileage=rng.randint(0, 300_000),
+                    price=rng.randint(2_000, 200_000),
+                    year=rng.randint(1995, 2025),
+                    color=rng.choice(["White", "Black", "Silver", "Red", "Blue"]),
+                    vin=f"BENCHAPI{index:09d}",
+                    cylinders=rng.choice([4, 6, 8]),
+                    engine_size=rng.choice([1600, 2000, 3000]),
+                    doors=4,
+                    description="Benchmark listing with a full service history.",
+                    location=rng.choice(["Riyadh", "Jeddah", "Dammam"]),
+                    vehicle_history="",
+                )
+                for index in range(max(options["vehicles"], 1))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        VehicleImage.objects.bulk_create(
+            [
+                VehicleImage(vehicle=vehicle, image=f"vehicle_images/benchmark_{vehicle.pk}_{position}.jpg")
+                for vehicle in vehicles
+                for position in range(options["images_per_vehicle"])
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        if features:
+            VehicleFeaturesMapping.objects.bulk_create(
+                [
+                    VehicleFeaturesMapping(vehicle=vehicle, feature=feature)
+                    for vehicle in vehicles
+                    for feature in rng.sample(features, min(options["features_per_vehicle"], len(features)))
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        search.index_vehicles(Vehicle.objects.filter(pk__in=[vehicle.pk for vehicle in vehicles]))
+        self.vehicle = vehicles[0]
+
+        pairs = {(self.buyer.pk, self.vehicle.pk)}
+        for _ in range(options["favorites"] * 2):
+            if len(pairs) >= max(options["favorites"], 1):
+                break
+            pairs.add((rng.choice(buyers).pk, rng.choice(vehicles).pk))
+        Favorite.objects.bulk_create(
+            [Favorite(user_id=user_id, vehicle_id=vehicle_id) for user_id, vehicle_id in pairs], batch_size=BATCH_SIZE
+        )
+
+        # Chats and messages go through save() so the inbox rows are maintained by signals.
+        for index in range(max(options["chats"], 1)):
+            vehicle = self.vehicle if index == 0 else rng.choice(vehicles)
+            buyer = self.buyer if index % 2 == 0 else rng.choice(buyers)
+            chat = Chat.objects.create(buyer=buyer, seller=vehicle.seller, vehicle=vehicle)
+            for position in range(options["messages_per_chat"]):
+                Message.objects.create(
+                    chat=chat,
+                    sender=buyer if position % 2 == 0 else vehicle.seller,
+                    content=f"Is the car still available? ({position})",
+                )
+
+        roots = Review.objects.bulk_create(
+            [
+                Review(
+                    reviewer=self.buyer if index % 5 == 0 else rng.choice(buyers),
+                    reviewed_user=vehicle.seller,
+                    vehicle=vehicle,
+                    rating=rng.randint(1, 5),
+                    review_text="Smooth purchase, car as described.",
+                )
+                for index, vehicle in enumerate(rng.choice(vehicles) for _ in range(max(options["reviews"], 1)))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        Review.objects.bulk_create(
+            [
+                Review(
+                    reviewer=root.reviewed_user,
+                    reviewed_user=root.reviewer,
+                    vehicle=root.vehicle,
+                    parent_review=root,
+                    rating=root.rating,
+                    review_text="Thank you for the feedback!",
+                )
+                for root in roots[::3]
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        reputation.rebuild()
+
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user=self.buyer if index % 4 == 0 else rng.choice(buyers),
+                    vehicle=rng.choice(vehicles),
+                    notification_type=Notification.NotificationType.PRICE_DROP,
+                    message="A vehicle you saved dropped in price.",
+                    is_read=rng.random() < 0.5,
+                )
+                for index in range(max(options["notifications"], 1))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        self.fixtures = {
+            "vehicle": self.vehicle.pk,
+            "brand": brands[0].pk,
+            "brand_name": brands[0].name,
+            "model": models[0].pk,
+            "seller": self.seller.pk,
+            "favorite": Favorite.objects.filter(user=self.buyer).values_list("pk", flat=True).first(),
+            "review": Review.objects.filter(reviewer=self.buyer).values_list("pk", flat=True).first(),
+            "chat": Chat.objects.filter(buyer=self.buyer).values_list("pk", flat=True).first(),
+            "message": Message.objects.filter(sender=self.buyer).values_list("pk", flat=True).first(),
+            "notification": Notification.objects.filter(user=self.buyer).values_list("pk", flat=True).first(),
+        }
+        self.tokens = {
+            user.pk: str(VersionedTokenObtainPairSerializer.get_token(user).access_token)
+            for user in CustomUser.objects.filter(pk__in=[self.admin.pk, self.buyer.pk, self.seller.pk])
+        }
+        self.image = self.png()
+
+    def png(self):
+        output = io.BytesIO()
+        Image.new("RGB", (64, 48), (200, 30, 30)).save(output, format="PNG")
+        return output.getvalue()
+
+    def import_feed(self, values):
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(
+            ["brand", "model", "vin", "body_type", "transmission", "fuel_type", "condition",
+             "mileage", "price", "year", "cylinders", "engine_size", "doors", "color", "location", "features"]
+        )
+        for index in range(IMPORT_ROWS):
+            writer.writerow(
+                [values["brand_name"], "Model 0", f"BENCHIMPORT{index:06d}", "SEDAN", "AUTOMATIC", "PETROL", "USED",
+                 50_000, 30_000 + index, 2021, 4, 2000, 4, "White", "Riyadh", "Benchmark Feature 0|Benchmark Feature 1"]
+            )
+        return output.getvalue().encode("utf-8")
+
+    #   Per-request setup (runs inside the rolled-back savepoint)
+
+    def new_upload(self, user=None):
+        return ImageUpload.objects.create(user=user or self.buyer, filename="photo.png", size=len(self.image))
+
+    def received_upload(self):
+        upload = self.new_upload(self.seller)
+        uploads.append_chunk(upload.pk, self.seller, 0, io.BytesIO(self.image), len(self.image))
+        return upload
+
+    def refresh_token(self):
+        return {"refresh": str(VersionedTokenObtainPairSerializer.get_token(self.buyer))}
+
+    def endpoints(self):
+        admin, buyer, seller = self.admin, self.buyer, self.seller
+        return [
+            Endpoint("auth.login", "POST", "/api/auth/login/", body={"username": buyer.username, "password": PASSWORD}),
+            Endpoint("auth.refresh", "POST", "/api/auth/refresh/", body=lambda values: {"refresh": values["refresh"]}, prepare=self.refresh_token),
+            Endpoint("vehicles.list", "GET", "/api/vehicles/"),
+            Endpoint("vehicles.list.authenticated", "GET", "/api/vehicles/", user=buyer),
+            Endpoint("vehicles.list.filtered", "GET", "/api/vehicles/?fuel_type=PETROL&ordering=price", user=buyer),
+            Endpoint("vehicles.list.cursor", "GET", "/api/vehicles/?pagination=cursor&ordering=price", user=buyer),
+            Endpoint("vehicles.retrieve", "GET", "/api/vehicles/{vehicle}/"),
+            Endpoint("vehicles.trending", "GET", "/api/vehicles/trending/"),
+            Endpoint("vehicles.search", "GET", "/api/vehicles/search/?q=benchmark+brand"),
+            Endpoint("vehicles.facets", "GET", "/api/vehicles/facets/"),
+            Endpoint("vehicles.partial_update", "PATCH", "/api/vehicles/{vehicle}/", user=seller, body={"price": 1_000}),
+            Endpoint("vehicles.mark_sold", "POST", "/api/vehicles/{vehicle}/mark_sold/", user=seller),
+            Endpoint(
+                "vehicles.images", "POST", "/api/vehicles/{vehicle}/images/", user=seller,
+                body=lambda values: {"uploads": [values["upload"]]},
+                prepare=lambda: {"upload": str(uploads.complete(self.received_upload().pk, seller)[0].pk)},
+            ),
+            Endpoint("vehicles.import", "POST", "/api/vehicles/import/", user=seller, body=self.import_feed, content_type="text/csv"),
+            Endpoint("vehicles.export", "GET", "/api/vehicles/export/?export_format=csv", user=admin),
+            Endpoint("brands.list", "GET", "/api/brands/"),
+            Endpoint("brands.retrieve", "GET", "/api/brands/{brand}/"),
+            Endpoint("brands.create", "POST", "/api/brands/", user=admin, body={"name": "Benchmark Brand New"}),
+            Endpoint("models.list", "GET", "/api/models/"),
+            Endpoint("models.retrieve", "GET", "/api/models/{model}/"),
+            Endpoint("favorites.list", "GET", "/api/favorites/", user=buyer),
+            Endpoint("favorites.retrieve", "GET", "/api/favorites/{favorite}/", user=buyer),
+            Endpoint("favorites.destroy", "DELETE", "/api/favorites/{favorite}/", user=buyer),
+            Endpoint("reviews.list", "GET", "/api/reviews/", user=buyer),
+            Endpoint("reviews.retrieve", "GET", "/api/reviews/{review}/", user=buyer),
+            Endpoint("reviews.threads", "GET", "/api/reviews/threads/?seller={seller}"),
+            Endpoint("chats.list", "GET", "/api/chats/", user=buyer),
+            Endpoint("chats.retrieve", "GET", "/api/chats/{chat}/", user=buyer),
+            Endpoint("chats.messages", "GET", "/api/chats/{chat}/messages/", user=buyer),
+            Endpoint("chats.inbox", "GET", "/api/chats/inbox/", user=buyer),
+            Endpoint("chats.read", "POST", "/api/chats/{chat}/read/", user=buyer),
+            Endpoint("messages.list", "GET", "/api/messages/", user=buyer),
+            Endpoint("messages.retrieve", "GET", "/api/messages/{message}/", user=buyer),
+            Endpoint("notifications.list", "GET", "/api/notifications/", user=buyer),
+            Endpoint("notifications.retrieve", "GET", "/api/notifications/{notification}/", user=buyer),
+            Endpoint("notifications.unread_count", "GET", "/api/notifications/unread_count/", user=buyer),
+            Endpoint("notifications.mark_all_read", "POST", "/api/notifications/mark_all_read/", user=buyer),
+            Endpoint("users.list", "GET", "/api/users/", user=buyer),
+            Endpoint("users.retrieve", "GET", "/api/users/{seller}/", user=buyer),
+            Endpoint("users.me", "GET", "/api/users/me/", user=buyer),
+            Endpoint("uploads.create", "POST", "/api/uploads/", user=buyer, body={"filename": "photo.png", "size": len(self.image)}),
+            Endpoint("uploads.retrieve", "GET", "/api/uploads/{upload}/", user=buyer, prepare=lambda: {"upload": self.new_upload().pk}),
+            Endpoint(
+                "uploads.chunk", "PATCH", "/api/uploads/{upload}/chunk/", user=buyer, body=self.image,
+                content_type="application/offset+octet-stream", headers={"HTTP_UPLOAD_OFFSET": "0"},
+                prepare=lambda: {"upload": self.new_upload().pk},
+            ),
+            Endpoint("uploads.complete", "POST", "/api/uploads/{upload}/complete/", user=seller, prepare=lambda: {"upload": self.received_upload().pk}),
+            Endpoint("uploads.destroy", "DELETE", "/api/uploads/{upload}/", user=buyer, prepare=lambda: {"upload": self.new_upload().pk}),
+        ]
+
+    #   Measurement
+
+    def run(self, endpoints):
+        selected = self.options["endpoint"]
+        if selected:
+            endpoints = [endpoint for endpoint in endpoints if any(part in endpoint.name for part in selected)]
+            if not endpoints:
+                raise CommandError(f"No endpoint matches {', '.join(selected)}.")
+        client = Client(raise_request_exception=False)
+        results = {}
+        total_requests = total_seconds = 0
+        for endpoint in endpoints:
+            for _ in range(self.options["warmup"]):
+                self.send(client, endpoint)
+            samples = [self.send(client, endpoint) for _ in range(max(self.options["requests"], 1))]
+            seconds = [sample["seconds"] for sample in samples]
+            statuses = sorted({sample["status"] for sample in samples})
+            total_requests += len(samples)
+            total_seconds += sum(seconds)
+            results[endpoint.name] = {
+                "method": endpoint.method,
+                "path": endpoint.path,
+                "status": statuses[0] if len(statuses) == 1 else statuses,
+                "requests": len(samples),
+                "errors": sum(1 for sample in samples if sample["status"] >= 400),
+                "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+                "p99_ms": round(percentile(seconds, 99) * 1000, 3),
+                "mean_ms": round(sum(seconds) / len(seconds) * 1000, 3),
+                "requests_per_second": round(len(seconds) / sum(seconds), 1) if sum(seconds) else None,
+                "queries_per_request": round(sum(sample["queries"] for sample in samples) / len(samples), 2),
+                "bytes_per_request": round(sum(sample["bytes"] for sample in samples) / len(samples)),
+            }
+        return {
+            "version": RESULTS_VERSION,
+            "meta": {
+                "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                "commit": git_commit(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "scale": {
+                    name: self.options[name]
+                    for name in (
+                        "users", "brands", "models_per_brand", "vehicles", "images_per_vehicle", "features",
+                        "features_per_vehicle", "chats", "messages_per_chat", "reviews", "favorites", "notifications",
+                    )
+                },
+                "requests": self.options["requests"],
+                "warmup": self.options["warmup"],
+                "seed": self.options["seed"],
+            },
+            "total": {
+                "requests": total_requests,
+                "seconds": round(total_seconds, 3),
+                "requests_per_second": round(total_requests / total_seconds, 1) if total_seconds else None,
+            },
+            "endpoints": results,
+        }
+
+    def send(self, client, endpoint):
+        """  One request in a rolled-back savepoint; returns its timing, status, queries and size"""
+        with transaction.atomic():
+            values = dict(self.fixtures)
+            if endpoint.prepare:
+                values.update(endpoint.prepare())
+            body = endpoint.body(values) if callable(endpoint.body) else endpoint.body
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body)
+            headers = dict(endpoint.headers)
+            if endpoint.user is not None:
+                headers["HTTP_AUTHORIZATION"] = f"Bearer {self.tokens[endpoint.user.pk]}"
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.generic(
+                    endpoint.method, endpoint.path.format(**values), body or "", endpoint.content_type, **headers
+                )
+                if response.streaming:
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size = len(response.content)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return {"seconds": elapsed, "status": response.status_code, "queries": len(queries), "bytes": size}
+
+    #   Reporting
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<32}{'status':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>9}{'KiB':>9}"
+        )
+        for name, row in results["endpoints"].items():
+            line = (
+                f"{name:<32}{str(row['status']):>8}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                f"{row['requests_per_second'] or 0:>10.1f}{row['queries_per_request']:>9.1f}"
+                f"{row['bytes_per_request'] / 1024:>9.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row["errors"] else line)
+        total = results["total"]
+        self.stdout.write(f"{total['requests']} requests in {total['seconds']:.2f}s ({total['requests_per_second']} req/s)")
+
+    def compare(self, baseline, results):
+        """  Print p50/p99/query deltas per endpoint; returns the names that regressed"""
+        regressions = []
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Compared with {baseline['meta'].get('commit') or 'baseline'}"))
+        for key in ("scale", "database", "requests"):
+            if baseline["meta"].get(key) != results["meta"][key]:
+                self.stdout.write(self.style.WARNING(f"Baseline {key} differs; timings are not directly comparable."))
+        self.stdout.write(f"{'endpoint':<32}{'p50':>10}{'p99':>10}{'queries':>10}")
+        for name, row in results["endpoints"].items():
+            before = baseline["endpoints"].get(name)
+            if before is None:
+                self.stdout.write(f"{name:<32}{'new':>10}")
+                continue
+            p50 = self.change(before["p50_ms"], row["p50_ms"])
+            p99 = self.change(before["p99_ms"], row["p99_ms"])
+            queries = row["queries_per_request"] - before["queries_per_request"]
+            line = f"{name:<32}{p50:>+9.1f}%{p99:>+9.1f}%{queries:>+10.1f}"
+            if p50 > self.options["threshold"] or queries > 0:
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        return regressions
+
+    def change(self, before, after):
+        return (after - before) / before * 100 if before else 0.0
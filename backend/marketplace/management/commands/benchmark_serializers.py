@@ -0,0 +1,85 @@
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from marketplace.models import Chat, CustomUser, Favorite, Review, Vehicle, VehicleBrand, VehicleModel
+from marketplace.models.vehicle import VehicleImage
+from marketplace.serializers import ChatSerializer, FavoriteSerializer, ReviewSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compares payload bytes and serialization time per object for the
+    favorites, chats and reviews lists: full nested objects (`?expand=`),
+    the default lean list mode, and a sparse `?fields=` selection.
+    Seeded rows are rolled back at the end.
+    """
+
+    help = "Benchmark list payload size and serialization cost with and without sparse fieldsets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options["objects"])
+            cases = [
+                ("favorites", FavoriteSerializer, Favorite.objects.filter(user=user), "user,vehicle", "id,vehicle"),
+                ("chats", ChatSerializer, Chat.objects.filter(buyer=user), "buyer,seller,vehicle", "id,vehicle"),
+                ("reviews", ReviewSerializer, Review.objects.filter(reviewer=user), "reviewer,reviewed_user,vehicle", "id,rating,vehicle"),
+            ]
+            self.stdout.write(f"{'payload':<30}{'bytes/object':>14}{'us/object':>12}")
+            for name, serializer_class, queryset, expand, fields in cases:
+                queryset = list(
+                    queryset.select_related(*self.relations(serializer_class))
+                    .prefetch_related("vehicle__images")
+                )
+                for label, params in (
+                    ("full (?expand=)", {"expand": expand}),
+                    ("lean list", {}),
+                    ("sparse (?fields=)", {"fields": fields}),
+                ):
+                    size, micros = self.measure(serializer_class, queryset, params, options["repeat"])
+                    self.stdout.write(f"{name + ' ' + label:<30}{size:>14.0f}{micros:>12.1f}")
+            transaction.set_rollback(True)
+
+    def relations(self, serializer_class):
+        names = [name for name in serializer_class.summary_fields if name != "vehicle"]
+        return names + ["vehicle__seller__reputation", "vehicle__model__brand"]
+
+    def measure(self, serializer_class, objects, params, repeat):
+        request = Request(APIRequestFactory().get("/", params))
+        context = {"request": request, "view": SimpleNamespace(action="list")}
+        renderer = JSONRenderer()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            content = renderer.render(serializer_class(objects, many=True, context=context).data)
+        elapsed = time.perf_counter() - start
+        count = len(objects) or 1
+        return len(content) / count, elapsed / (repeat * count) * 1_000_000
+
+    def seed(self, count):
+        buyer = CustomUser.objects.create(username="benchmark_buyer", email="buyer@example.com")
+        seller = CustomUser.objects.create(username="benchmark_seller", email="seller@example.com")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Benchmark Brand"), name="Benchmark Model"
+        )
+        for index in range(count):
+            vehicle = Vehicle.objects.create(
+                seller=seller, model=model, body_type="SEDAN", transmission="AUTOMATIC",
+                fuel_type="PETROL", mileage=1000, price=20000 + index, year=2020, color="White",
+                vin=f"SERIALIZER{index:08d}", cylinders=4, engine_size=2000, doors=4,
+                description="Benchmark listing", location="Riyadh", vehicle_history="", condition="USED",
+            )
+            for position in range(4):
+                VehicleImage.objects.create(vehicle=vehicle, image=f"vehicle_images/{vehicle.pk}_{position}.jpg")
+            Favorite.objects.create(user=buyer, vehicle=vehicle)
+            Chat.objects.create(buyer=buyer, seller=seller, vehicle=vehicle)
+            Review.objects.create(reviewer=buyer, reviewed_user=seller, vehicle=vehicle, rating=5, review_text="Great")
+        return buyer
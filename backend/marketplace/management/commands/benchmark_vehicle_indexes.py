@@ -0,0 +1,114 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from marketplace.enums.vehicle_enum import BodyType, Condition, FuelType, Transmission
+from marketplace.models import CustomUser, Vehicle, VehicleBrand, VehicleModel
+
+
+class Command(BaseCommand):
+    """
+    Seeds a synthetic catalog and prints the query plans of the VehicleViewSet
+    filter/order matrix with and without the composite listing indexes.
+    Everything runs in one transaction that is rolled back at the end.
+    """
+
+    help = "Compare vehicle listing query plans with and without the composite indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Vehicles to seed (e.g. 1000000).")
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--inactive-ratio", type=float, default=0.3, help="Share of sold listings.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options["rows"], options["batch_size"], options["inactive_ratio"], options["seed"])
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Vehicle._meta.db_table}")
+
+            with_indexes = self.explain_all()
+            with connection.cursor() as cursor:
+                # Plain DROP INDEX keeps this inside the transaction on SQLite,
+                # where the schema editor refuses to run with FK checks enabled.
+                for index in Vehicle._meta.indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+                cursor.execute(f"ANALYZE {Vehicle._meta.db_table}")
+            without_indexes = self.explain_all()
+
+            for name in with_indexes:
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                for label, results in (("without", without_indexes), ("with", with_indexes)):
+                    plan, elapsed = results[name]
+                    self.stdout.write(f"  [{label} composite indexes] {elapsed * 1000:.2f} ms")
+                    for line in plan.splitlines():
+                        self.stdout.write(f"    {line}")
+            transaction.set_rollback(True)
+
+    def seed(self, rows, batch_size, inactive_ratio, seed):
+        rng = random.Random(seed)
+        seller, _ = CustomUser.objects.get_or_create(username="benchmark_seller")
+        models = []
+        for brand_index in range(20):
+            brand, _ = VehicleBrand.objects.get_or_create(name=f"Benchmark Brand {brand_index}")
+            for model_index in range(10):
+                models.append(VehicleModel.objects.create(brand=brand, name=f"Model {model_index}"))
+
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            Vehicle.objects.bulk_create(
+                [
+                    Vehicle(
+                        seller=seller,
+                        model=rng.choice(models),
+                        body_type=rng.choice(list(BodyType)).name,
+                        transmission=rng.choice(list(Transmission)).name,
+                        fuel_type=rng.choice(list(FuelType)).name,
+                        condition=rng.choice(list(Condition)).name,
+                        mileage=rng.randint(0, 300_000),
+                        price=rng.randint(2_000, 200_000),
+                        year=rng.randint(1995, 2025),
+                        color="White",
+                        vin=f"BENCH{offset + i:012d}",
+                        cylinders=4,
+                        engine_size=2000,
+                        doors=4,
+                        description="",
+                        location="",
+                        vehicle_history="",
+                        is_active=rng.random() >= inactive_ratio,
+                    )
+                    for i in range(min(batch_size, rows - offset))
+                ],
+                batch_size=batch_size,
+            )
+        self.stdout.write(f"Seeded {rows} vehicles in {time.perf_counter() - start:.1f}s")
+        self.sample_model = models[0]
+
+    def queries(self):
+        """  The filter/order combinations VehicleViewSet issues for a page of 10"""
+        active = Vehicle.objects.filter(is_active=True)
+        return {
+            "default order (-created_at, -id)": active.order_by("-created_at", "-id"),
+            "order by price": active.order_by("price", "id"),
+            "order by -year": active.order_by("-year", "-id"),
+            "order by mileage": active.order_by("mileage", "id"),
+            "model filter, order by price": active.filter(model=self.sample_model).order_by("price"),
+            "fuel_type + transmission, order by price": active.filter(
+                fuel_type=FuelType.ELECTRIC.name, transmission=Transmission.MANUAL.name
+            ).order_by("price"),
+            "year filter, order by price": active.filter(year=2018).order_by("price"),
+            "keyset seek on price": active.filter(price__gt=150_000).order_by("price", "id"),
+        }
+
+    def explain_all(self):
+        results = {}
+        for name, queryset in self.queries().items():
+            page = queryset[:10]
+            start = time.perf_counter()
+            list(page)
+            elapsed = time.perf_counter() - start
+            results[name] = (page.explain(), elapsed)
+        return results
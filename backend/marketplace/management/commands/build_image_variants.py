@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from marketplace.images import process_vehicle_image
+from marketplace.models.vehicle import VehicleImage
+
+
+class Command(BaseCommand):
+    help = "Build thumbnails and WebP/AVIF variants for vehicle images that have none yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Rebuild every image, not only missing ones.")
+
+    def handle(self, *args, **options):
+        images = VehicleImage.objects.order_by("id")
+        if not options["all"]:
+            images = images.filter(variants={})  # Attached uploads already carry their hash
+        count = 0
+        for image_id in images.values_list("id", flat=True).iterator(chunk_size=500):
+            process_vehicle_image(image_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {count} images"))
@@ -0,0 +1,50 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace import exporter
+from marketplace.models import Vehicle
+
+
+class Command(BaseCommand):
+    """
+    Writes the vehicle catalog (brand, model, seller and feature columns) to
+    a file or stdout. Rows stream from a server-side cursor in --chunk-size
+    batches, so memory use does not grow with the size of the catalog.
+    """
+
+    help = "Export vehicle listings as CSV, NDJSON or Parquet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", dest="export_format", choices=exporter.FORMATS, default="csv")
+        parser.add_argument("--output", default="-", help="Output file, or - for stdout.")
+        parser.add_argument("--include-inactive", action="store_true", help="Include sold listings.")
+        parser.add_argument("--chunk-size", type=int, default=exporter.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = Vehicle.objects.all()
+        if not options["include_inactive"]:
+            queryset = queryset.filter(is_active=True)
+        try:
+            chunks = exporter.export_vehicles(queryset, options["export_format"], options["chunk_size"])
+        except exporter.ExportError as error:
+            raise CommandError(str(error))
+
+        start = time.perf_counter()
+        output = sys.stdout.buffer if options["output"] == "-" else open(options["output"], "wb")
+        written = 0
+        try:
+            for chunk in chunks:
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                output.write(data)
+                written += len(data)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        if options["output"] != "-":
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Wrote {written / 1024:.1f} KiB to {options['output']} in {time.perf_counter() - start:.1f}s"
+                )
+            )
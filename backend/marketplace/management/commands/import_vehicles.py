@@ -0,0 +1,50 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace import importer
+from marketplace.models import CustomUser
+
+
+class Command(BaseCommand):
+    """
+    Imports a dealer inventory feed for one seller, upserting listings by VIN.
+    Reads a file (or stdin with `-`); the format is taken from the file
+    extension unless --format is given. Row errors are printed as JSON.
+    """
+
+    help = "Bulk import vehicle listings from a CSV, JSON or NDJSON feed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Feed file, or - for stdin.")
+        parser.add_argument("--seller", required=True, help="Username that owns the listings.")
+        parser.add_argument("--format", dest="feed_format", choices=importer.FORMATS)
+        parser.add_argument("--chunk-size", type=int, default=importer.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        seller = CustomUser.objects.filter(username=options["seller"]).first()
+        if seller is None:
+            raise CommandError(f"Unknown seller: {options['seller']}")
+        feed_format = options["feed_format"] or importer.detect_format(options["path"])
+        if feed_format is None:
+            raise CommandError("Cannot tell the feed format; pass --format.")
+
+        start = time.perf_counter()
+        if options["path"] == "-":
+            result = importer.import_vehicles(seller, sys.stdin.buffer, feed_format, options["chunk_size"])
+        else:
+            with open(options["path"], "rb") as feed:
+                result = importer.import_vehicles(seller, feed, feed_format, options["chunk_size"])
+        elapsed = time.perf_counter() - start
+
+        for error in result["errors"]:
+            self.stderr.write(json.dumps(error))
+        rate = result["rows"] / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result['rows']} rows in {elapsed:.1f}s ({rate:.0f} rows/s): "
+                f"{result['created']} created, {result['updated']} updated, {result['failed']} failed"
+            )
+        )
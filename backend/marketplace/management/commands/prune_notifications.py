@@ -0,0 +1,98 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Sum
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from marketplace.models import Notification
+
+
+#   Rough on-disk cost of a row besides its message text (ids, flags, timestamp, index entries)
+ROW_OVERHEAD_BYTES = 120
+ARCHIVE_FIELDS = ["id", "user_id", "vehicle_id", "notification_type", "message", "is_read", "created_at"]
+
+
+class Command(BaseCommand):
+    """
+    Retention job for notifications, meant to run from cron/a scheduler:
+    - deletes (optionally archives) read notifications older than --ttl-days;
+    - collapses repeated PRICE_DROP notifications for the same user and
+      vehicle down to the newest one.
+    Work is done in short transactions of --batch-size rows so no table lock
+    is held for long; --pause spaces batches out on busy databases.
+    """
+
+    help = "Delete or archive old read notifications and collapse repeated price drops."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl-days", type=int, default=90, help="Keep read notifications this long.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches.")
+        parser.add_argument("--archive", help="Append removed rows as NDJSON to this file (.gz compresses).")
+        parser.add_argument("--skip-collapse", action="store_true", help="Only apply the TTL.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be removed.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.archive = None
+        if options["archive"] and not options["dry_run"]:
+            opener = gzip.open if options["archive"].endswith(".gz") else open
+            self.archive = opener(options["archive"], "at", encoding="utf-8")
+        try:
+            cutoff = timezone.now() - timedelta(days=options["ttl_days"])
+            expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+            rows, size = self.purge(expired)
+            self.report("Expired read notifications", rows, size)
+
+            if not options["skip_collapse"]:
+                rows, size = self.purge(self.superseded_price_drops())
+                self.report("Collapsed price drops", rows, size)
+        finally:
+            if self.archive:
+                self.archive.close()
+
+    def superseded_price_drops(self):
+        """  Price drops with a newer price drop for the same user and vehicle"""
+        price_drops = Notification.objects.filter(
+            notification_type=Notification.NotificationType.PRICE_DROP, vehicle__isnull=False
+        )
+        newer = price_drops.filter(
+            user=OuterRef("user"), vehicle=OuterRef("vehicle"), id__gt=OuterRef("id")
+        )
+        return price_drops.filter(Exists(newer))
+
+    def purge(self, queryset):
+        """  Delete `queryset` in id-ordered batches; returns (rows, estimated bytes)"""
+        total_rows = total_bytes = 0
+        last_id = 0
+        batch_size = self.options["batch_size"]
+        while True:
+            ids = list(
+                queryset.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            batch = Notification.objects.filter(id__in=ids)
+            message_bytes = batch.aggregate(size=Sum(Length("message")))["size"] or 0
+            if not self.options["dry_run"]:
+                with transaction.atomic():
+                    if self.archive:
+                        for row in batch.values(*ARCHIVE_FIELDS):
+                            self.archive.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                    batch.delete()
+            total_rows += len(ids)
+            total_bytes += message_bytes + ROW_OVERHEAD_BYTES * len(ids)
+            if self.options["pause"]:
+                time.sleep(self.options["pause"])
+        return total_rows, total_bytes
+
+    def report(self, label, rows, size):
+        verb = "would remove" if self.options["dry_run"] else "removed"
+        self.stdout.write(f"{label}: {verb} {rows} rows, ~{size / 1024:.1f} KiB reclaimed")
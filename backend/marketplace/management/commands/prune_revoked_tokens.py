@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from marketplace.revocation import revocation_store
+
+
+class Command(BaseCommand):
+    """
+    Retention job for revoked refresh tokens, meant to run from cron/a scheduler
+    (hourly is plenty): a row is only needed until its token expires.
+    """
+
+    help = "Delete revoked refresh tokens that have expired."
+
+    def handle(self, *args, **options):
+        removed = revocation_store.purge()
+        self.stdout.write(f"Deleted {removed} expired revoked tokens")
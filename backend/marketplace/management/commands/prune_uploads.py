@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from marketplace.uploads import prune_abandoned
+
+
+class Command(BaseCommand):
+    """
+    Retention job for chunked image uploads, meant to run from cron/a scheduler:
+    discards pending uploads older than --max-age-hours together with their
+    part files, and removes stray part/staging files of the same age.
+    """
+
+    help = "Discard abandoned image uploads and their temporary files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-age-hours", type=int, default=24, help="Keep pending uploads this long.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["max_age_hours"])
+        uploads, files = prune_abandoned(cutoff)
+        self.stdout.write(f"Discarded {uploads} abandoned uploads and {files} stray temporary files")
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from marketplace.reputation import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute seller reputation aggregates from all reviews (repairs any drift)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            count = rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt reputation for {count} users in {time.perf_counter() - start:.1f}s")
+        )
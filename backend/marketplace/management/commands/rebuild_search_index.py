@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from marketplace.models import Vehicle
+from marketplace.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the vehicle full-text search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            count = rebuild_index(Vehicle.objects.all(), chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {count} vehicles in {time.perf_counter() - start:.1f}s")
+        )
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from marketplace.models import Message
+
+
+MAX_LIMIT = 200
+MAX_TIMEOUT = 30  # Seconds a long-poll may be held open
+RECHECK_INTERVAL = 2  # Seconds between DB checks (catches writes from other processes)
+
+
+class MessageWaiters:
+    """
+    Wakes long-polling sync requests when a message is committed in this
+    process. Writes from other processes are picked up by the periodic recheck.
+    Only chats with a request waiting right now are tracked, so memory is
+    bounded by the open long-polls; a message committed just before a request
+    starts waiting is likewise caught by the recheck.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.latest = {}  # chat_id -> newest message id seen while someone waits
+        self.waiting = {}  # chat_id -> number of requests waiting
+
+    def notify(self, message):
+        with self.condition:
+            if message.chat_id not in self.waiting:
+                return
+            if message.id > self.latest.get(message.chat_id, 0):
+                self.latest[message.chat_id] = message.id
+            self.condition.notify_all()
+
+    def wait(self, chat_id, after, timeout):
+        """  Block until a message newer than `after` arrives in this process or `timeout` passes"""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.waiting[chat_id] = self.waiting.get(chat_id, 0) + 1
+            try:
+                while self.latest.get(chat_id, 0) <= after:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+                return True
+            finally:
+                self.waiting[chat_id] -= 1
+                if not self.waiting[chat_id]:
+                    del self.waiting[chat_id]
+                    self.latest.pop(chat_id, None)
+
+
+waiters = MessageWaiters()
+
+
+def fetch_messages(chat_id, after, limit):
+    """  Messages after the `after` id, oldest first; served by the (chat, id) index"""
+    rows = list(
+        Message.objects.filter(chat_id=chat_id, id__gt=after)
+        .order_by("id")
+        .values("id", "sender_id", "content", "timestamp")[: limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def sync_messages(chat_id, after, limit=100, timeout=0):
+    """
+    Return `{"messages", "cursor", "more"}` for messages after `after`.
+    With a timeout, an empty result is held open until a message arrives.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    deadline = time.monotonic() + max(0, min(timeout, MAX_TIMEOUT))
+    messages, more = fetch_messages(chat_id, after, limit)
+    while not messages:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        waiters.wait(chat_id, after, min(remaining, RECHECK_INTERVAL))
+        messages, more = fetch_messages(chat_id, after, limit)
+    return {
+        "messages": [
+            {
+                "id": row["id"],
+                "sender": row["sender_id"],
+                "content": row["content"],
+                "timestamp": row["timestamp"],
+            }
+            for row in messages
+        ],
+        "cursor": messages[-1]["id"] if messages else after,
+        "more": more,
+    }
@@ -0,0 +1,273 @@
+import logging
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+
+slow_query_logger = logging.getLogger("marketplace.slow_queries")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STACK_LIMIT = 15  # Innermost project frames kept in a slow-query log entry
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """  Monotonic per-label-set counter"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def value(self, labels):
+        return self.series.get(labels, 0)
+
+    def samples(self):
+        with self.lock:
+            series = list(self.series.items())
+        for labels, value in sorted(series):
+            yield f"{self.name}_total{format_labels(self.labelnames, labels)} {format_number(value)}"
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label set. `observe` is one bisect plus a few
+    additions under a lock; buckets are only made cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        self.series = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)  # First bucket with value <= le
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, labels):
+        series = self.series.get(labels)
+        return series[2] if series else 0
+
+    def total(self, labels):
+        series = self.series.get(labels)
+        return series[1] if series else 0
+
+    def samples(self):
+        with self.lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self.series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = format_labels(self.labelnames, labels, [("le", format_number(bound))])
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_number(total)}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {count}"
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+class MetricsRegistry:
+    """
+    Per-process request metrics in the Prometheus text format. Each worker
+    process keeps its own series, so scrape every worker (the usual setup for
+    multi-process Python servers) and aggregate in Prometheus.
+    """
+
+    def __init__(self):
+        labels = ("view", "action")
+        self.requests = Counter("http_requests", "Requests by view, action, method and status.", (*labels, "method", "status"))
+        self.duration = Histogram("http_request_duration_seconds", "Wall time per request.", labels, LATENCY_BUCKETS)
+        self.db_queries = Histogram("http_request_db_queries", "Database queries per request.", labels, QUERY_COUNT_BUCKETS)
+        self.db_time = Histogram("http_request_db_seconds", "Time spent in database queries per request.", labels, DB_TIME_BUCKETS)
+        self.serialization = Histogram(
+            "http_response_serialization_seconds", "Time spent rendering the response body.", labels, DB_TIME_BUCKETS
+        )
+        self.response_size = Histogram("http_response_size_bytes", "Response body size.", labels, SIZE_BUCKETS)
+        self.slow_queries = Counter("db_slow_queries", "Queries slower than SLOW_QUERY_THRESHOLD_MS.", labels)
+        self.metrics = [
+            self.requests, self.duration, self.db_queries, self.db_time, self.serialization, self.response_size,
+            self.slow_queries,
+        ]
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            full_name = f"{metric.name}_total" if metric.kind == "counter" else metric.name
+            lines.append(f"# HELP {full_name} {metric.documentation}")
+            lines.append(f"# TYPE {full_name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    """  What one request spent, accumulated while it runs"""
+
+    __slots__ = ("labels", "queries", "db_time", "serialization")
+
+    def __init__(self, labels=("unmatched", "")):
+        self.labels = labels
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization = 0.0
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    return _current.get()
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def view_labels(view_func, method):
+    """  (view, action) for a resolved view: the ViewSet action, or the HTTP method for plain views"""
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}", method.lower()
+    actions = getattr(view_func, "actions", None) or {}
+    return view_class.__name__, actions.get(method.lower(), method.lower())
+
+
+def project_stack():
+    """  Innermost frames from project code, skipping this module and installed packages"""
+    root = str(settings.BASE_DIR)
+    frames = [
+        frame
+        for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(root) and "site-packages" not in frame.filename
+    ]
+    return "".join(traceback.format_list(frames[-STACK_LIMIT:]))
+
+
+class QueryTimer:
+    """
+    `connection.execute_wrapper` hook: adds each query's time to the current
+    request and, when SLOW_QUERY_LOG is on, logs queries slower than
+    SLOW_QUERY_THRESHOLD_MS with their SQL (parameters are not logged) and the
+    stack that issued them.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.log_slow = getattr(settings, "SLOW_QUERY_LOG", False)
+        self.threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 100) / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.queries += 1
+            self.stats.db_time += elapsed
+            if self.log_slow and elapsed >= self.threshold:
+                registry.slow_queries.inc(self.stats.labels)
+                slow_query_logger.warning(
+                    "Slow query (%.1f ms) in %s.%s on %s:\n%s\nStack (most recent call last):\n%s",
+                    elapsed * 1000,
+                    *self.stats.labels,
+                    context["connection"].alias,
+                    sql,
+                    project_stack(),
+                )
+
+
+#   DRF renderer hook: times serialization of the response body
+class InstrumentedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            stats = current_stats()
+            if stats is not None:
+                stats.serialization += time.perf_counter() - start
+
+
+def record(stats, method, status_code, duration, size):
+    """  Fold one finished request into the histograms; `size` None means not known yet"""
+    registry.requests.inc((*stats.labels, method, str(status_code)))
+    registry.duration.observe(stats.labels, duration)
+    registry.db_queries.observe(stats.labels, stats.queries)
+    registry.db_time.observe(stats.labels, stats.db_time)
+    registry.serialization.observe(stats.labels, stats.serialization)
+    if size is not None:
+        registry.response_size.observe(stats.labels, size)
+
+
+def counted(chunks, labels):
+    """  Pass streamed chunks through and record the body size once the stream ends"""
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+    registry.response_size.observe(labels, size)
+
+
+def metrics_enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+def metrics_token():
+    return getattr(settings, "METRICS_TOKEN", "")
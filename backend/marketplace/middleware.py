@@ -0,0 +1,85 @@
+import time
+from contextlib import ExitStack
+from urllib.parse import parse_qsl
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from marketplace import metrics
+from marketplace.authentication import CachedJWTAuthentication
+
+
+#   Per-request performance metrics for the HTTP API
+class MetricsMiddleware:
+    """
+    Records wall time, database query count and time, serialization time and
+    response size per view and action into the histograms served at /metrics.
+    - Queries are timed by a `QueryTimer` installed with `execute_wrapper` on
+      every configured database for the duration of the request.
+    - Serialization is timed by `InstrumentedJSONRenderer`.
+    - Streamed bodies are measured as they are sent.
+    Place it first in MIDDLEWARE so the time includes the other middleware.
+    """
+
+    def __init__(self, get_response):
+        if not metrics.metrics_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats, token = metrics.start_request()
+        request.metrics = stats
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                timer = metrics.QueryTimer(stats)
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        duration = time.perf_counter() - start
+
+        if response.streaming:
+            size = None
+            response.streaming_content = metrics.counted(response.streaming_content, stats.labels)
+        else:
+            size = len(response.content)
+        metrics.record(stats, request.method, response.status_code, duration, size)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.labels = metrics.view_labels(view_func, request.method)
+
+
+#   JWT authentication for WebSocket connections
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Browsers cannot set headers on WebSocket handshakes, so the access token
+    comes from `?token=` (an `Authorization: Bearer` header also works).
+    Sets `scope["user"]` and the parsed `scope["query_params"]`.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query_params = dict(parse_qsl(scope.get("query_string", b"").decode("utf-8")))
+        headers = dict(scope.get("headers", []))
+        raw_token = query_params.get("token")
+        authorization = headers.get(b"authorization", b"").decode("latin-1").split()
+        if not raw_token and len(authorization) == 2 and authorization[0] == "Bearer":
+            raw_token = authorization[1]
+
+        scope = dict(scope, query_params=query_params)
+        scope["user"] = await self.get_user(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+    @database_sync_to_async
+    def get_user(self, raw_token):
+        authentication = CachedJWTAuthentication()
+        try:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        except (AuthenticationFailed, InvalidToken, TokenError):
+            return AnonymousUser()
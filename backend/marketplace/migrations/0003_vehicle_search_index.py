@@ -0,0 +1,78 @@
+from django.db import migrations
+
+
+#   Frozen copy of the index DDL and backfill, so later changes to
+#   marketplace.search cannot change what this migration does.
+SQLITE_CREATE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS marketplace_vehicle_search USING fts5("
+    "brand, model, features, color, location, description, vehicle_history, tokenize='porter unicode61')"
+)
+SQLITE_BACKFILL = """
+    INSERT INTO marketplace_vehicle_search
+        (rowid, brand, model, features, color, location, description, vehicle_history)
+    SELECT v.id, b.name, m.name,
+        COALESCE((SELECT group_concat(f.name, ' ')
+                  FROM marketplace_vehiclefeaturesmapping vf
+                  JOIN marketplace_vehiclefeature f ON f.id = vf.feature_id
+                  WHERE vf.vehicle_id = v.id), ''),
+        v.color, v.location, v.description, v.vehicle_history
+    FROM marketplace_vehicle v
+    JOIN marketplace_vehiclemodel m ON m.id = v.model_id
+    JOIN marketplace_vehiclebrand b ON b.id = m.brand_id
+    WHERE v.is_active
+"""
+POSTGRES_CREATE = [
+    "CREATE TABLE IF NOT EXISTS marketplace_vehicle_search ("
+    "vehicle_id bigint PRIMARY KEY REFERENCES marketplace_vehicle (id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS marketplace_vehicle_search_document_idx "
+    "ON marketplace_vehicle_search USING GIN (document)",
+]
+POSTGRES_BACKFILL = """
+    INSERT INTO marketplace_vehicle_search (vehicle_id, document)
+    SELECT v.id,
+        setweight(to_tsvector('english', b.name), 'A')
+        || setweight(to_tsvector('english', m.name), 'A')
+        || setweight(to_tsvector('english', COALESCE((
+            SELECT string_agg(f.name, ' ')
+            FROM marketplace_vehiclefeaturesmapping vf
+            JOIN marketplace_vehiclefeature f ON f.id = vf.feature_id
+            WHERE vf.vehicle_id = v.id), '')), 'B')
+        || setweight(to_tsvector('english', v.color), 'C')
+        || setweight(to_tsvector('english', v.location), 'C')
+        || setweight(to_tsvector('english', v.description), 'D')
+        || setweight(to_tsvector('english', v.vehicle_history), 'D')
+    FROM marketplace_vehicle v
+    JOIN marketplace_vehiclemodel m ON m.id = v.model_id
+    JOIN marketplace_vehiclebrand b ON b.id = m.brand_id
+    WHERE v.is_active
+    ON CONFLICT (vehicle_id) DO NOTHING
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # Other vendors have no index table; search falls back to substring matching.
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(SQLITE_CREATE)
+        schema_editor.execute(SQLITE_BACKFILL)
+    elif vendor == "postgresql":
+        for statement in POSTGRES_CREATE:
+            schema_editor.execute(statement)
+        schema_editor.execute(POSTGRES_BACKFILL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute("DROP TABLE IF EXISTS marketplace_vehicle_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0002_vehicle_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
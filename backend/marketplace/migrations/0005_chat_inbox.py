@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_inbox(apps, schema_editor):
+    """  Create inbox rows for existing chats (no read state exists yet, so unread starts at 0)"""
+    Chat = apps.get_model("marketplace", "Chat")
+    ChatInbox = apps.get_model("marketplace", "ChatInbox")
+    Message = apps.get_model("marketplace", "Message")
+    entries = []
+    for chat in Chat.objects.iterator(chunk_size=500):
+        last = Message.objects.filter(chat=chat).order_by("-id").first()
+        for user_id in {chat.buyer_id, chat.seller_id}:
+            entries.append(
+                ChatInbox(
+                    user_id=user_id,
+                    chat=chat,
+                    last_message=last,
+                    last_message_snippet=last.content[:255] if last else "",
+                    last_activity_at=last.timestamp if last else chat.created_at,
+                )
+            )
+        if len(entries) >= 1000:
+            ChatInbox.objects.bulk_create(entries)
+            entries = []
+    ChatInbox.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0004_message_chat_sync_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_snippet', models.CharField(blank=True, max_length=255)),
+                ('last_activity_at', models.DateTimeField()),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='marketplace.chat')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='marketplace.message')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_activity_at'], name='marketplace_user_id_aaaed7_idx')],
+                'unique_together': {('user', 'chat')},
+            },
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:06
+
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+#   Frozen copy of marketplace.reputation's weighting and rebuild, so later
+#   changes there cannot change what this migration does. Sites that set a
+#   different REPUTATION_HALF_LIFE_DAYS run `manage.py rebuild_reputation` afterwards.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE_DAYS = 180
+
+
+def backfill_reputation(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Review = apps.get_model("marketplace", "Review")
+    SellerReputation = apps.get_model("marketplace", "SellerReputation")
+    totals = defaultdict(lambda: {"rating_count": 0, "rating_sum": 0, "weighted_sum": 0.0, "weighted_total": 0.0})
+    rows = (
+        Review.objects.using(alias)
+        .filter(parent_review__isnull=True)
+        .values_list("reviewed_user_id", "rating", "review_date")
+        .iterator(chunk_size=2000)
+    )
+    for user_id, rating, review_date in rows:
+        weight = 2 ** ((review_date - EPOCH).total_seconds() / (HALF_LIFE_DAYS * 86400))
+        row = totals[user_id]
+        row["rating_count"] += 1
+        row["rating_sum"] += rating
+        row["weighted_sum"] += weight * rating
+        row["weighted_total"] += weight
+        key = f"ratings_{min(max(rating, 1), 5)}"
+        row[key] = row.get(key, 0) + 1
+    SellerReputation.objects.using(alias).bulk_create(
+        [SellerReputation(user_id=user_id, **values) for user_id, values in totals.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0009_image_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerReputation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reputation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('ratings_1', models.IntegerField(default=0)),
+                ('ratings_2', models.IntegerField(default=0)),
+                ('ratings_3', models.IntegerField(default=0)),
+                ('ratings_4', models.IntegerField(default=0)),
+                ('ratings_5', models.IntegerField(default=0)),
+                ('weighted_sum', models.FloatField(default=0)),
+                ('weighted_total', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_reputation, migrations.RunPython.noop),
+    ]
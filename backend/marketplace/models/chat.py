@@ -17,3 +17,29 @@ class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["chat", "id"]),  #   Per-chat sync: messages after a cursor id
+        ]
+
+
+class ChatInbox(models.Model):
+    """  One row per participant per chat: last message and unread count for the inbox"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="inbox")
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="inbox_entries")
+    last_message = models.ForeignKey(Message, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    last_message_snippet = models.CharField(max_length=255, blank=True)
+    last_activity_at = models.DateTimeField()  #   Chat creation until the first message
+    unread_count = models.PositiveIntegerField(default=0)
+
+    SNIPPET_LENGTH = 255
+
+    class Meta:
+        unique_together = ("user", "chat")
+        indexes = [
+            models.Index(fields=["user", "-last_activity_at"]),  #   Inbox ordered by recent activity
+        ]
+
+    def __str__(self):
+        return f"Inbox entry for {self.user.username} in chat {self.chat_id}"
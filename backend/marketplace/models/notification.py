@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from marketplace.models.vehicle import Vehicle
 
 User = get_user_model()
 
@@ -15,6 +16,10 @@ class Notification(models.Model):
         User, on_delete=models.CASCADE, related_name="notifications"
     )  #   Links notification to a user
 
+    vehicle = models.ForeignKey(
+        Vehicle, null=True, blank=True, on_delete=models.CASCADE, related_name="notifications"
+    )  #   Listing the notification is about (price drops, sales)
+
     notification_type = models.CharField(max_length=20, choices=NotificationType.choices)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
@@ -27,4 +32,5 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=["created_at"]),  #   Faster sorting by date
             models.Index(fields=["is_read"]),  #   Optimize unread notification queries
+            models.Index(fields=["user", "is_read", "-created_at"]),  #   Per-user inbox, unread count, mark_all_read
         ]
@@ -0,0 +1,41 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+class SellerReputation(models.Model):
+    """
+      Running rating aggregates for a user, maintained incrementally from
+    top-level reviews (see marketplace.reputation). The weighted columns sum
+    each rating times a weight that doubles every half-life, so their ratio
+    is an average that favours recent reviews.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="reputation")
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    ratings_1 = models.IntegerField(default=0)  #   Histogram of ratings 1-5
+    ratings_2 = models.IntegerField(default=0)
+    ratings_3 = models.IntegerField(default=0)
+    ratings_4 = models.IntegerField(default=0)
+    ratings_5 = models.IntegerField(default=0)
+    weighted_sum = models.FloatField(default=0)
+    weighted_total = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Reputation of {self.user.username}: {self.average_rating} ({self.rating_count})"
+
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count > 0 else None
+
+    @property
+    def score(self):
+        """  Recency-weighted average rating"""
+        if self.rating_count <= 0 or self.weighted_total <= 0:
+            return None
+        return round(self.weighted_sum / self.weighted_total, 2)
+
+    @property
+    def histogram(self):
+        return {str(rating): getattr(self, f"ratings_{rating}") for rating in range(1, 6)}
@@ -1,10 +1,11 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from marketplace.models.tracking import TrackedFieldsMixin
 from marketplace.models.vehicle import Vehicle
 
 User = get_user_model()
 
-class Review(models.Model):
+class Review(TrackedFieldsMixin, models.Model):
     """  Stores reviews for users and vehicles"""
     reviewer = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="written_reviews"
@@ -24,6 +25,9 @@ class Review(models.Model):
     review_text = models.TextField()
     review_date = models.DateTimeField(auto_now_add=True, db_index=True)  #   Index for sorting
 
+    #   Values as loaded from the database, used to keep seller reputation in step on edits
+    TRACKED_FIELDS = ("rating", "reviewed_user_id", "parent_review_id")
+
     def __str__(self):
         return f"Review by {self.reviewer.username} for {self.reviewed_user.username} on {self.vehicle.model.brand.name} {self.vehicle.model.name}"
 
@@ -0,0 +1,9 @@
+from django.db import models
+
+class RevokedToken(models.Model):
+    """  A refresh token that may no longer be used; rows are purged once the token expires"""
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Revoked {self.jti} (until {self.expires_at:%Y-%m-%d %H:%M})"
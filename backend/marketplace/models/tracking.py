@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class TrackedFieldsMixin(models.Model):
+    """
+      Remembers the database values of `TRACKED_FIELDS`, so post_save and
+    post_delete receivers can tell what an update changed.
+    """
+
+    TRACKED_FIELDS = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: getattr(instance, name) for name in cls.TRACKED_FIELDS if name in field_names
+        }
+        return instance
+
+    def loaded_value(self, name):
+        """  The value `name` had when loaded (None for unsaved or deferred fields)"""
+        return getattr(self, "_loaded_values", {}).get(name)
+
+    def loaded_values(self):
+        """  All tracked values as loaded, falling back to the current value when unknown"""
+        loaded = getattr(self, "_loaded_values", {})
+        return {name: loaded.get(name, getattr(self, name)) for name in self.TRACKED_FIELDS}
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the old values by now; track the new ones.
+        self._loaded_values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
@@ -0,0 +1,26 @@
+import uuid
+
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+class ImageUpload(models.Model):
+    """  A resumable, chunked image upload; completed uploads point at a deduplicated blob"""
+
+    class Status(models.TextChoices):
+        PENDING = "Pending"
+        COMPLETE = "Complete"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="image_uploads")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()  #   Declared total size in bytes
+    received = models.BigIntegerField(default=0)  #   Bytes written so far (resume offset)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    blob = models.CharField(max_length=255, blank=True)  #   Storage name of the (shared) file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.filename}) by {self.user.username}"
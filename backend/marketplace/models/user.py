@@ -1,18 +1,37 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
-class CustomUser(AbstractUser):
+from marketplace.models.tracking import TrackedFieldsMixin
+
+class CustomUser(AbstractUser, TrackedFieldsMixin):  #   AbstractUser first keeps its Meta
     """
       Custom User Model
     - Extends Django's AbstractUser.
     - Stores additional user details like phone number and last seen timestamp.
     - Users can be sellers or buyers.
+    - `token_version` is embedded in issued JWTs; bumping it (password change,
+      deactivation) revokes every outstanding token.
     """
     phone_number = models.CharField(max_length=15, unique=True, null=True, blank=True)
-    last_seen = models.DateTimeField(auto_now=True)
+    last_seen = models.DateTimeField(default=timezone.now)  #   Batched by marketplace.presence
+    token_version = models.PositiveIntegerField(default=0)
 
     groups = models.ManyToManyField("auth.Group", related_name="custom_user_groups", blank=True)
     user_permissions = models.ManyToManyField("auth.Permission", related_name="custom_user_permissions", blank=True)
 
+    #   Values as loaded from the database, used to expire cached logins
+    TRACKED_FIELDS = ("is_active", "token_version")
+
     def __str__(self):
         return self.username
+
+    def save(self, *args, **kwargs):
+        #   `_password` is only left set by a real set_password(); the hash upgrade
+        #   in check_password() clears it first, so rehashing keeps tokens valid
+        if self._password is not None or (self.loaded_value("is_active") and not self.is_active):
+            self.token_version += 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.token_version != self.loaded_value("token_version"):
+            kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from marketplace.enums.vehicle_enum import BodyType, Condition, Transmission, FuelType
+from marketplace.models.tracking import TrackedFieldsMixin
 
 User = get_user_model()
 
@@ -19,7 +20,7 @@ class VehicleModel(models.Model):
     def __str__(self):
         return f"{self.brand.name} {self.name}"
 
-class Vehicle(models.Model):
+class Vehicle(TrackedFieldsMixin, models.Model):
     """  Represents a vehicle listing with seller, buyer, and specifications"""
     seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="vehicles")
     buyer = models.ForeignKey(User, on_delete=models.PROTECT, null=True, blank=True, related_name="purchased_vehicles")
@@ -49,10 +50,31 @@ class Vehicle(models.Model):
     def __str__(self):
         return f"{self.model.brand.name} {self.model.name} ({self.year})"
 
+    #   Values as loaded from the database, used to detect price drops and sales
+    TRACKED_FIELDS = ("price", "is_active")
+
+    class Meta:
+        # Listings are always read with is_active=True, so the composite indexes
+        # are partial: sold vehicles never bloat them. Each ordering index ends
+        # in `id` to serve the keyset tiebreaker used by the vehicle list.
+        indexes = [
+            #   Ordering (and keyset seeks) on the public catalog
+            models.Index(fields=["price", "id"], name="vehicle_active_price_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["year", "id"], name="vehicle_active_year_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["mileage", "id"], name="vehicle_active_mileage_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["-created_at", "-id"], name="vehicle_active_recent_idx", condition=models.Q(is_active=True)),
+            #   Equality filters combined with a price range/sort
+            models.Index(fields=["model", "price"], name="vehicle_active_model_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["fuel_type", "transmission", "price"], name="vehicle_active_fuel_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["year", "price"], name="vehicle_active_year_price_idx", condition=models.Q(is_active=True)),
+        ]
+
 class VehicleImage(models.Model):
     """  Stores images for a vehicle"""
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="vehicle_images/")
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)  #   SHA-256 of the original
+    variants = models.JSONField(default=dict, blank=True)  #   {width: {format: storage path}}, filled off-request
 
     def __str__(self):
         return f"Image for {self.vehicle.model.brand.name} {self.vehicle.model.name}"
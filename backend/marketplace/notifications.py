@@ -0,0 +1,96 @@
+from django.core.cache import cache
+
+from marketplace.models import Favorite, Notification, Vehicle
+
+
+RECIPIENT_CHUNK_SIZE = 1000  # Favorites read per query
+INSERT_BATCH_SIZE = 500  # Notifications written per INSERT
+UNREAD_CACHE_TIMEOUT = 60 * 5  # Bounds any drift from racing writers
+
+
+#   Unread counter (badge polls read the cache; a miss costs one indexed COUNT)
+def unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user_id):
+    count = cache.get(unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(unread_key(user_id), count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def increment_unread(user_id):
+    """  Bump a cached counter; a missing one is recounted on the next read"""
+    try:
+        cache.incr(unread_key(user_id))
+    except ValueError:
+        pass
+
+
+def reset_unread(user_id):
+    cache.set(unread_key(user_id), 0, UNREAD_CACHE_TIMEOUT)
+
+
+def invalidate_unread(user_ids):
+    cache.delete_many([unread_key(user_id) for user_id in user_ids])
+
+
+def favoriting_user_ids(vehicle, chunk_size=RECIPIENT_CHUNK_SIZE):
+    """  Yield lists of users who favorited `vehicle`, paging the favorites by id"""
+    favorites = (
+        Favorite.objects.filter(vehicle_id=vehicle.pk)
+        .exclude(user_id=vehicle.seller_id)
+        .order_by("id")
+    )
+    last_id = 0
+    while True:
+        rows = list(favorites.filter(id__gt=last_id).values_list("id", "user_id")[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [user_id for _, user_id in rows]
+
+
+def fan_out(vehicle, notification_type, message):
+    """  Write one notification per favoriting user with batched bulk inserts"""
+    created = 0
+    for user_ids in favoriting_user_ids(vehicle):
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id,
+                    vehicle_id=vehicle.pk,
+                    notification_type=notification_type,
+                    message=message,
+                )
+                for user_id in user_ids
+            ],
+            batch_size=INSERT_BATCH_SIZE,
+        )
+        # bulk_create skips signals, so drop the recipients' cached counters here.
+        invalidate_unread(user_ids)
+        created += len(user_ids)
+    return created
+
+
+def describe(vehicle):
+    return f"{vehicle.model.brand.name} {vehicle.model.name} ({vehicle.year})"
+
+
+#   Background tasks (enqueued on commit by the Vehicle signal receiver)
+def notify_price_drop(vehicle_id, old_price, new_price):
+    vehicle = Vehicle.objects.select_related("model__brand").filter(pk=vehicle_id).first()
+    if vehicle is None or not vehicle.is_active:
+        return 0
+    message = f"Price drop: {describe(vehicle)} is now {new_price} (was {old_price})."
+    return fan_out(vehicle, Notification.NotificationType.PRICE_DROP, message)
+
+
+def notify_vehicle_sold(vehicle_id):
+    vehicle = Vehicle.objects.select_related("model__brand").filter(pk=vehicle_id).first()
+    if vehicle is None:
+        return 0
+    message = f"{describe(vehicle)} has been sold."
+    return fan_out(vehicle, Notification.NotificationType.VEHICLE_SOLD, message)
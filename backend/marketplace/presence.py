@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models import Case, When
+from django.utils import timezone
+
+from marketplace.models import CustomUser
+from marketplace.write_behind import WriteBehindBuffer
+
+
+FLUSH_BATCH_SIZE = 500
+
+
+class LastSeenTracker(WriteBehindBuffer):
+    """
+    Write-behind `CustomUser.last_seen`.
+    - `touch` records the latest activity per user in memory only.
+    - `flush` writes all users seen since the last flush with one
+      `UPDATE ... CASE` per batch, every `LAST_SEEN_FLUSH_INTERVAL` seconds.
+    """
+
+    flush_interval_setting = "LAST_SEEN_FLUSH_INTERVAL"
+    default_flush_interval = 60
+    description = "user last_seen timestamps"
+
+    def __init__(self, flush_interval=None):
+        super().__init__(flush_interval)
+        self.pending = {}
+
+    def touch(self, user_id, when=None):
+        with self.lock:
+            self.pending[user_id] = when or timezone.now()
+        self.buffered()
+
+    def flush(self):
+        """  Write buffered timestamps; returns the number of users updated"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        items = sorted(pending.items())  # Stable lock order across workers
+        try:
+            with transaction.atomic():
+                for offset in range(0, len(items), FLUSH_BATCH_SIZE):
+                    batch = items[offset : offset + FLUSH_BATCH_SIZE]
+                    CustomUser.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                        last_seen=Case(*[When(pk=pk, then=seen) for pk, seen in batch])
+                    )
+        except Exception:
+            # Keep the newest timestamp per user for the next attempt.
+            with self.lock:
+                for pk, seen in pending.items():
+                    if self.pending.get(pk, seen) <= seen:
+                        self.pending[pk] = seen
+            raise
+        return len(items)
+
+
+last_seen = LastSeenTracker()
@@ -0,0 +1,98 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+
+CACHE_PREFIX = "replica-pin"
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replicas():
+    return getattr(settings, "REPLICA_DATABASES", [])
+
+
+def choose_replica():
+    return random.choice(replicas())
+
+
+@contextmanager
+def replica_reads():
+    """  Route ORM reads in this context to a replica (when any are configured)"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def pin_key(user_id):
+    return f"{CACHE_PREFIX}:{user_id}"
+
+
+def pin_to_primary(user):
+    """  Keep `user` on the primary for REPLICA_STICKY_SECONDS after a write"""
+    if user.is_authenticated:
+        cache.set(pin_key(user.pk), True, getattr(settings, "REPLICA_STICKY_SECONDS", 5))
+
+
+def is_pinned(user):
+    return user.is_authenticated and bool(cache.get(pin_key(user.pk)))
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a random replica only inside `replica_reads()` (entered by
+    `ReplicaReadMixin` for read-only catalog requests); everything else,
+    including every write, uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replicas():
+            return choose_replica()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in replicas()
+
+
+#   Mixin for the public catalog ViewSets
+class ReplicaReadMixin:
+    """
+    Serves GET/HEAD/OPTIONS from a read replica, except for users who wrote
+    within the last REPLICA_STICKY_SECONDS, so they always read their writes.
+    Responses `CachedResponseMixin` would store are read from the primary: a
+    lagging replica's result would otherwise be cached as current under the
+    generation the write just bumped.
+    """
+
+    def fills_cache(self, request):
+        is_cacheable = getattr(self, "is_cacheable", None)
+        return is_cacheable is not None and is_cacheable(request)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)  # Authenticates the user first
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(request.user)
+        elif replicas() and not is_pinned(request.user) and not self.fills_cache(request):
+            self._replica_reads = replica_reads()
+            self._replica_reads.__enter__()
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Also reached when the view raises, so the context never leaks into the next request.
+            replica_context = getattr(self, "_replica_reads", None)
+            if replica_context is not None:
+                self._replica_reads = None
+                replica_context.__exit__(None, None, None)
@@ -0,0 +1,88 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import F
+
+from marketplace.models import Review, SellerReputation
+
+
+#   Weights are 2 ** (age since EPOCH / half-life): they only grow with time, so a
+#   review's weight never changes and can be added or subtracted incrementally.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+RATINGS = range(1, 6)
+
+
+def half_life_days():
+    return getattr(settings, "REPUTATION_HALF_LIFE_DAYS", 180)
+
+
+def recency_weight(review_date):
+    return 2 ** ((review_date - EPOCH).total_seconds() / (half_life_days() * 86400))
+
+
+def bucket(rating):
+    return min(max(rating, RATINGS[0]), RATINGS[-1])
+
+
+def counts_toward_reputation(parent_review_id):
+    """  Replies are conversation, not ratings"""
+    return parent_review_id is None
+
+
+def apply(user_id, rating, review_date, sign=1):
+    """  Add (`sign=1`) or remove (`sign=-1`) one review from a user's aggregates"""
+    weight = recency_weight(review_date)
+    if sign > 0:
+        SellerReputation.objects.get_or_create(user_id=user_id)
+    # Decrements never create a row: the user may be mid-way through being deleted.
+    SellerReputation.objects.filter(pk=user_id).update(
+        rating_count=F("rating_count") + sign,
+        rating_sum=F("rating_sum") + sign * rating,
+        weighted_sum=F("weighted_sum") + sign * weight * rating,
+        weighted_total=F("weighted_total") + sign * weight,
+        **{f"ratings_{bucket(rating)}": F(f"ratings_{bucket(rating)}") + sign},
+    )
+
+
+def review_saved(review, created):
+    new = {name: getattr(review, name) for name in Review.TRACKED_FIELDS}
+    old = None if created else review.loaded_values()
+    if old == new:
+        return
+    if old and counts_toward_reputation(old["parent_review_id"]):
+        apply(old["reviewed_user_id"], old["rating"], review.review_date, sign=-1)
+    if counts_toward_reputation(new["parent_review_id"]):
+        apply(new["reviewed_user_id"], new["rating"], review.review_date)
+
+
+def review_deleted(review):
+    old = review.loaded_values()
+    if counts_toward_reputation(old["parent_review_id"]):
+        apply(old["reviewed_user_id"], old["rating"], review.review_date, sign=-1)
+
+
+def rebuild(reviews=None, chunk_size=2000):
+    """  Recompute every reputation from scratch; returns the number of users rated"""
+    reviews = Review.objects.all() if reviews is None else reviews
+    totals = defaultdict(lambda: {"rating_count": 0, "rating_sum": 0, "weighted_sum": 0.0, "weighted_total": 0.0})
+    rows = (
+        reviews.filter(parent_review__isnull=True)
+        .values_list("reviewed_user_id", "rating", "review_date")
+        .iterator(chunk_size=chunk_size)
+    )
+    for user_id, rating, review_date in rows:
+        weight = recency_weight(review_date)
+        row = totals[user_id]
+        row["rating_count"] += 1
+        row["rating_sum"] += rating
+        row["weighted_sum"] += weight * rating
+        row["weighted_total"] += weight
+        key = f"ratings_{bucket(rating)}"
+        row[key] = row.get(key, 0) + 1
+    SellerReputation.objects.using(reviews.db).all().delete()
+    SellerReputation.objects.using(reviews.db).bulk_create(
+        [SellerReputation(user_id=user_id, **values) for user_id, values in totals.items()],
+        batch_size=chunk_size,
+    )
+    return len(totals)
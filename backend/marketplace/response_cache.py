@@ -0,0 +1,89 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+CACHE_PREFIX = "response-cache"
+DEFAULT_TIMEOUT = 60 * 5
+
+
+def generation_key(scope):
+    return f"{CACHE_PREFIX}:{scope}:generation"
+
+
+def get_generation(scope):
+    return cache.get_or_set(generation_key(scope), 1, timeout=None)
+
+
+def invalidate(*scopes):
+    """  Expire every cached response of the given scopes"""
+    for scope in scopes:
+        try:
+            cache.incr(generation_key(scope))
+        except ValueError:
+            cache.set(generation_key(scope), 1, timeout=None)
+
+
+def cache_key(scope, request):
+    params = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.lists()))
+    # Pagination links are absolute URIs built from the request's scheme and Host
+    url = f"{request.scheme}://{request.get_host()}{request.path}?{params}"
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{scope}:{get_generation(scope)}:{digest}"
+
+
+def compute_etag(data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    return '"%s"' % hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+#   Mixin for public, read-heavy ViewSets
+class CachedResponseMixin:
+    """
+    Serves `cache_actions` from the cache with ETag / If-None-Match support.
+    - Entries are keyed by scheme, host, path and query params under a per-scope
+      generation, so `invalidate(scope)` (called from model signals) drops them
+      all at once. The host is part of the key because pagination links are absolute.
+    - A matching If-None-Match gets a bodiless 304.
+    - With `cache_anonymous_only`, authenticated requests bypass the cache.
+    """
+
+    cache_scope = None
+    cache_actions = ("list", "retrieve")
+    cache_anonymous_only = False
+    cache_timeout = DEFAULT_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def is_cacheable(self, request):
+        if self.action not in self.cache_actions:
+            return False
+        return not (self.cache_anonymous_only and request.user.is_authenticated)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        key = cache_key(self.cache_scope, request)
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = {"etag": compute_etag(response.data), "data": response.data}
+            cache.set(key, entry, self.cache_timeout)
+
+        headers = {"ETag": entry["etag"]}
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (if_none_match.strip() == "*" or entry["etag"] in parse_etags(if_none_match)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry["data"], headers=headers)
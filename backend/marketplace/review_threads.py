@@ -0,0 +1,49 @@
+from django.db import connection
+
+from marketplace.models import CustomUser, Review
+
+
+#   Replies nested deeper than this are not fetched (guards against parent cycles)
+MAX_DEPTH = 50
+ORDERINGS = ("-review_date", "review_date", "-rating", "rating")
+
+
+def thread_sql(root_count):
+    quote = connection.ops.quote_name
+    review, user = quote(Review._meta.db_table), quote(CustomUser._meta.db_table)
+    placeholders = ", ".join(["%s"] * root_count)
+    return f"""
+        WITH RECURSIVE thread (id, depth) AS (
+            SELECT id, 0 FROM {review} WHERE id IN ({placeholders})
+            UNION ALL
+            SELECT child.id, thread.depth + 1
+            FROM {review} child INNER JOIN thread ON child.parent_review_id = thread.id
+            WHERE thread.depth < %s
+        )
+        SELECT review.*, thread.depth AS depth, reviewer.username AS reviewer_username
+        FROM thread
+        INNER JOIN {review} review ON review.id = thread.id
+        INNER JOIN {user} reviewer ON reviewer.id = review.reviewer_id
+    """
+
+
+def fetch_threads(root_ids):
+    """
+    Load the reviews in `root_ids` with every reply beneath them using one
+    recursive query, then link them into trees in memory. Each review gets
+    `thread_replies` (oldest first); roots are returned in `root_ids` order.
+    """
+    root_ids = list(root_ids)
+    if not root_ids:
+        return []
+    reviews = list(Review.objects.raw(thread_sql(len(root_ids)), [*root_ids, MAX_DEPTH]))
+    by_id = {}
+    for review in sorted(reviews, key=lambda review: (review.depth, review.review_date, review.pk)):
+        if review.pk in by_id:
+            continue  # Reached twice through a parent cycle
+        review.thread_replies = []
+        by_id[review.pk] = review
+        parent = by_id.get(review.parent_review_id) if review.depth else None
+        if parent is not None:
+            parent.thread_replies.append(review)
+    return [by_id[pk] for pk in root_ids if pk in by_id]
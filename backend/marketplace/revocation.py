@@ -0,0 +1,153 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from marketplace.models import RevokedToken
+
+
+PURGE_BATCH_SIZE = 1000
+
+
+class BloomFilter:
+    """  Fixed-size set membership with false positives but no false negatives"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self.positions(value))
+
+
+class RevocationStore:
+    """
+    Revoked refresh tokens, answered from memory.
+    - The `RevokedToken` table is the source of truth; its unique `jti` makes
+      revoking atomic, so a refresh token can be rotated exactly once.
+    - Each process keeps one bloom filter per `REVOCATION_BUCKET_SECONDS` of
+      token expiry. A token is looked up only in the bucket of its own `exp`,
+      and a miss there (the common case) needs no query; a hit is confirmed
+      against the table to rule out false positives.
+    - Buckets whose tokens have all expired are dropped, so memory is bounded
+      by REFRESH_TOKEN_LIFETIME. Expired rows are purged by the periodic
+      `prune_revoked_tokens` command, never on a refresh request.
+    - Rows written by other processes are picked up incrementally at most
+      every `REVOCATION_SYNC_INTERVAL` seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.watermark = 0  # Highest RevokedToken id loaded
+        self.synced_at = None
+
+    @property
+    def bucket_seconds(self):
+        return getattr(settings, "REVOCATION_BUCKET_SECONDS", 60 * 60)
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, "REVOCATION_SYNC_INTERVAL", 1)
+
+    def new_filter(self):
+        return BloomFilter(
+            getattr(settings, "REVOCATION_BUCKET_CAPACITY", 100_000),
+            getattr(settings, "REVOCATION_ERROR_RATE", 0.001),
+        )
+
+    def bucket(self, exp):
+        return int(exp) // self.bucket_seconds
+
+    def remember(self, jti, exp):
+        with self.lock:
+            bloom = self.buckets.get(self.bucket(exp))
+            if bloom is None:
+                bloom = self.buckets[self.bucket(exp)] = self.new_filter()
+            bloom.add(jti)
+
+    def is_revoked(self, jti, exp):
+        self.sync()
+        with self.lock:
+            bloom = self.buckets.get(self.bucket(exp))
+            maybe = bloom is not None and jti in bloom
+        return maybe and RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, exp):
+        """  Record the revocation; False if the token was already revoked"""
+        expires_at = datetime.fromtimestamp(int(exp), tz=timezone.utc)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+        self.remember(jti, exp)
+        return True
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self.synced_at is not None and now - self.synced_at < self.sync_interval:
+            return
+        self.synced_at = now
+        wall_clock = time.time()
+        rows = (
+            RevokedToken.objects.filter(id__gt=self.watermark, expires_at__gt=datetime.now(timezone.utc))
+            .order_by("id")
+            .values_list("id", "jti", "expires_at")
+        )
+        for row_id, jti, expires_at in rows.iterator(chunk_size=PURGE_BATCH_SIZE):
+            self.remember(jti, expires_at.timestamp())
+            self.watermark = max(self.watermark, row_id)
+        with self.lock:
+            current = self.bucket(wall_clock)
+            for bucket in [bucket for bucket in self.buckets if bucket < current]:
+                del self.buckets[bucket]
+
+    def purge(self):
+        """  Delete expired rows in small batches; returns the number removed"""
+        removed = 0
+        expired = RevokedToken.objects.filter(expires_at__lte=datetime.now(timezone.utc))
+        while True:
+            ids = list(expired.values_list("id", flat=True)[:PURGE_BATCH_SIZE])
+            if not ids:
+                return removed
+            removed += RevokedToken.objects.filter(id__in=ids).delete()[0]
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+        self.watermark = 0
+        self.synced_at = None
+
+
+revocation_store = RevocationStore()
+
+
+#   Refresh token checked against (and rotated into) the revocation store
+class RevocableRefreshToken(RefreshToken):
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revocation_store.is_revoked(self.payload[api_settings.JTI_CLAIM], self.payload["exp"]):
+            raise TokenError("Token is revoked")
+
+    def blacklist(self):
+        """  Called by TokenRefreshSerializer on rotation; losing a race means reuse"""
+        if not revocation_store.revoke(self.payload[api_settings.JTI_CLAIM], self.payload["exp"]):
+            raise TokenError("Token is revoked")
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from marketplace.consumers import ChatConsumer
+
+
+websocket_urlpatterns = [
+    path("ws/chats/<int:chat_id>/", ChatConsumer.as_asgi()),
+]
@@ -0,0 +1,269 @@
+import re
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+
+INDEX_TABLE = "marketplace_vehicle_search"
+MAX_RESULTS = 1000  # Ranked hits returned per query (keeps latency flat)
+MAX_TERMS = 16
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+#   Indexed columns, highest ranking weight first
+DOCUMENT_COLUMNS = ["brand", "model", "features", "color", "location", "description", "vehicle_history"]
+COLUMN_WEIGHTS = {
+    "brand": 10.0,
+    "model": 10.0,
+    "features": 4.0,
+    "color": 2.0,
+    "location": 2.0,
+    "description": 1.0,
+    "vehicle_history": 0.5,
+}
+SOURCE_FIELDS = {
+    "brand": "model__brand__name",
+    "model": "model__name",
+    "color": "color",
+    "location": "location",
+    "description": "description",
+    "vehicle_history": "vehicle_history",
+}
+
+
+def tokenize(query):
+    """  Split free text into plain word tokens (drops any query syntax)"""
+    return TOKEN_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def build_documents(queryset, chunk_size=500):
+    """
+    Yield `(vehicle_id, {column: text})` for the active vehicles in `queryset`.
+    Two queries per chunk: one for the listing columns, one for feature names.
+    """
+    active = queryset.filter(is_active=True).order_by("pk")
+    last_pk = 0
+    while True:
+        rows = list(active.filter(pk__gt=last_pk).values("pk", *SOURCE_FIELDS.values())[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1]["pk"]
+        features = {}
+        for vehicle_id, name in (
+            queryset.model.objects.filter(pk__in=[row["pk"] for row in rows])
+            .exclude(vehicle_features=None)
+            .values_list("pk", "vehicle_features__feature__name")
+        ):
+            features.setdefault(vehicle_id, []).append(name)
+        for row in rows:
+            document = {column: row[source] or "" for column, source in SOURCE_FIELDS.items()}
+            document["features"] = " ".join(features.get(row["pk"], []))
+            yield row["pk"], document
+
+
+#   Search Backends
+class BaseSearchBackend:
+    """
+    A search backend owns the index table for one database vendor.
+    - `create_schema`/`drop_schema` manage the index table (migration 0003
+      keeps its own frozen copy of this DDL).
+    - `upsert`/`remove` keep the index in step with vehicle writes.
+    - `search` returns vehicle ids ordered by relevance.
+    """
+
+    def __init__(self, connection=None):
+        self.connection = connection or default_connection
+
+    def create_schema(self):
+        raise NotImplementedError
+
+    def drop_schema(self):
+        raise NotImplementedError
+
+    def upsert(self, documents):
+        raise NotImplementedError
+
+    def remove(self, vehicle_ids):
+        raise NotImplementedError
+
+    def search(self, terms, limit):
+        raise NotImplementedError
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """  SQLite FTS5 virtual table keyed by the vehicle id (rowid), ranked by bm25"""
+
+    def create_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+                f"{', '.join(DOCUMENT_COLUMNS)}, tokenize='porter unicode61')"
+            )
+
+    def drop_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def upsert(self, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        self.remove([vehicle_id for vehicle_id, _ in documents])
+        placeholders = ", ".join(["%s"] * (len(DOCUMENT_COLUMNS) + 1))
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (rowid, {', '.join(DOCUMENT_COLUMNS)}) VALUES ({placeholders})",
+                [[vehicle_id] + [document[column] for column in DOCUMENT_COLUMNS] for vehicle_id, document in documents],
+            )
+
+    def remove(self, vehicle_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", [[pk] for pk in vehicle_ids])
+
+    def search(self, terms, limit):
+        # Every term must match; the last one also matches as a prefix.
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        weights = ", ".join(str(COLUMN_WEIGHTS[column]) for column in DOCUMENT_COLUMNS)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s "
+                f"ORDER BY bm25({INDEX_TABLE}, {weights}) LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """  Weighted tsvector per vehicle with a GIN index, ranked by ts_rank"""
+
+    config = "english"
+    column_labels = {"brand": "A", "model": "A", "features": "B", "color": "C", "location": "C", "description": "D", "vehicle_history": "D"}
+
+    def create_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+                "vehicle_id bigint PRIMARY KEY REFERENCES marketplace_vehicle (id) ON DELETE CASCADE, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document_idx ON {INDEX_TABLE} USING GIN (document)")
+
+    def drop_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def upsert(self, documents):
+        vector = " || ".join(
+            f"setweight(to_tsvector('{self.config}', %s), '{self.column_labels[column]}')" for column in DOCUMENT_COLUMNS
+        )
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (vehicle_id, document) VALUES (%s, {vector}) "
+                "ON CONFLICT (vehicle_id) DO UPDATE SET document = EXCLUDED.document",
+                [[vehicle_id] + [document[column] for column in DOCUMENT_COLUMNS] for vehicle_id, document in documents],
+            )
+
+    def remove(self, vehicle_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE vehicle_id = ANY(%s)", [list(vehicle_ids)])
+
+    def search(self, terms, limit):
+        # Tokens are plain words, so building the tsquery text is safe.
+        query = " & ".join(terms) + ":*"
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT vehicle_id FROM {INDEX_TABLE}, to_tsquery('{self.config}', %s) query "
+                "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, vehicle_id DESC LIMIT %s",
+                [query, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SubstringSearchBackend(BaseSearchBackend):
+    """
+    Fallback for databases without a full-text backend (e.g. MySQL): no index
+    table, every term must appear (`icontains`) in one of the indexed columns,
+    newest listings first. Correct but unranked, and it scans the catalog.
+    """
+
+    def create_schema(self):
+        pass
+
+    def drop_schema(self):
+        pass
+
+    def upsert(self, documents):
+        for _ in documents:  # Drain the generator; there is nothing to store
+            pass
+
+    def remove(self, vehicle_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, terms, limit):
+        from marketplace.models import Vehicle
+
+        queryset = Vehicle.objects.using(self.connection.alias).filter(is_active=True)
+        for term in terms:
+            matches = Q(vehicle_features__feature__name__icontains=term)
+            for source in SOURCE_FIELDS.values():
+                matches |= Q(**{f"{source}__icontains": term})
+            queryset = queryset.filter(pk__in=Vehicle.objects.filter(matches).values("pk"))
+        return list(queryset.order_by("-created_at", "-id").values_list("pk", flat=True)[:limit])
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTS5Backend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(connection=None):
+    """  Resolve `SEARCH_BACKEND` from settings, or pick one for the database vendor"""
+    connection = connection or default_connection
+    backend_path = getattr(settings, "SEARCH_BACKEND", None)
+    if backend_path:
+        backend_class = import_string(backend_path)
+    else:
+        backend_class = VENDOR_BACKENDS.get(connection.vendor, SubstringSearchBackend)
+    return backend_class(connection)
+
+
+#   Public helpers used by signals, views and commands
+def index_vehicles(queryset):
+    """  (Re)index the given vehicles; inactive ones are dropped from the index"""
+    backend = get_search_backend()
+    backend.remove(list(queryset.filter(is_active=False).values_list("pk", flat=True)))
+    backend.upsert(build_documents(queryset))
+
+
+def remove_vehicles(vehicle_ids):
+    get_search_backend().remove(vehicle_ids)
+
+
+def search_vehicle_ids(query, limit=MAX_RESULTS):
+    """  Return vehicle ids matching `query`, most relevant first"""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_search_backend().search(terms, limit)
+
+
+def rebuild_index(queryset, chunk_size=500, connection=None):
+    backend = get_search_backend(connection)
+    backend.clear()
+    batch, count = [], 0
+    for document in build_documents(queryset, chunk_size):
+        batch.append(document)
+        if len(batch) >= chunk_size:
+            backend.upsert(batch)
+            count, batch = count + len(batch), []
+    backend.upsert(batch)
+    return count + len(batch)
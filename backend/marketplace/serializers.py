@@ -1,18 +1,95 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
-from marketplace.models.chat import Chat, Message
+from marketplace import uploads
+from marketplace.images import srcsets, thumbnail_url
+from marketplace.models.chat import Chat, ChatInbox, Message
 from marketplace.models.favorite import Favorite
 from marketplace.models.notification import Notification
+from marketplace.models.reputation import SellerReputation
 from marketplace.models.review import Review
+from marketplace.models.upload import ImageUpload
 from marketplace.models.vehicle import Vehicle, VehicleBrand, VehicleFeature, VehicleFeaturesMapping, VehicleImage, VehicleModel
 
 
 User = get_user_model()
 
 
+#   Sparse fieldsets (?fields=) and expandable relations (?expand=)
+class SparseFieldsetMixin:
+    """
+    Trims payloads for the top-level serializer of a request:
+    - `?fields=id,price` keeps only the listed fields.
+    - On list actions, relations in `summary_fields` are emitted as lean
+      summaries; `?expand=vehicle,buyer` restores the full nested objects.
+    - `detail_only_fields` are dropped outside detail actions, nested
+      serializers included.
+    Only the root reads the query params.
+    """
+
+    summary_fields = {}
+    summary_actions = ("list",)
+    detail_only_fields = ()
+    detail_actions = ("retrieve",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or "context" not in kwargs:
+            return
+        params = getattr(request, "query_params", request.GET)
+
+        view = self.context.get("view")
+        if getattr(view, "action", None) not in self.detail_actions:
+            for name in self.detail_only_fields:
+                self.fields.pop(name, None)
+        if getattr(view, "action", None) in self.summary_actions:
+            expand = set(filter(None, params.get("expand", "").split(",")))
+            for name, summary_class in self.summary_fields.items():
+                if name in self.fields and name not in expand:
+                    self.fields[name] = summary_class(read_only=True)
+
+        requested = set(filter(None, params.get("fields", "").split(",")))
+        if requested and request.method in ("GET", "HEAD"):
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    def is_detail(self):
+        return getattr(self.context.get("view"), "action", None) in self.detail_actions
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # A nested serializer is built before it is bound to the request's context,
+        # so its detail-only fields are dropped from the output instead
+        if self.detail_only_fields and "view" in self.context and not self.is_detail():
+            for name in self.detail_only_fields:
+                data.pop(name, None)
+        return data
+
+
+#   Lean summaries used by list actions
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username"]
+
+
+class VehicleSummarySerializer(serializers.ModelSerializer):
+    model_name = serializers.CharField(source="model.name", read_only=True)
+    brand_name = serializers.CharField(source="model.brand.name", read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Vehicle
+        fields = ["id", "brand_name", "model_name", "year", "price", "thumbnail"]
+
+    def get_thumbnail(self, obj):
+        images = obj.images.all()
+        return thumbnail_url(images[0]) if images else None
+
+
 #   User Serializer (For Registration & Authentication)
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
 
     class Meta:
@@ -31,15 +108,41 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+#  Seller Reputation Serializer
+class SellerReputationSerializer(serializers.ModelSerializer):
+    average_rating = serializers.FloatField(read_only=True)
+    score = serializers.FloatField(read_only=True)  # Recency-weighted average
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = SellerReputation
+        fields = ["rating_count", "average_rating", "score", "histogram"]
+
+
+#  Seller Serializer (user plus reputation; select_related("seller__reputation") keeps it query-free)
+class SellerSerializer(UserSerializer):
+    reputation = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ["reputation"]
+
+    def get_reputation(self, obj):
+        try:
+            reputation = obj.reputation
+        except SellerReputation.DoesNotExist:
+            reputation = SellerReputation(user=obj)  # Not reviewed yet
+        return SellerReputationSerializer(reputation).data
+
+
 #  Vehicle Brand Serializer
-class VehicleBrandSerializer(serializers.ModelSerializer):
+class VehicleBrandSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleBrand
         fields = "__all__"
 
 
 #  Vehicle Model Serializer
-class VehicleModelSerializer(serializers.ModelSerializer):
+class VehicleModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     brand = VehicleBrandSerializer()  # Nested serialization
 
     class Meta:
@@ -48,21 +151,21 @@ class VehicleModelSerializer(serializers.ModelSerializer):
 
 
 #  Vehicle Image Serializer
-class VehicleImageSerializer(serializers.ModelSerializer):
+class VehicleImageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleImage
         fields = ["id", "vehicle", "image"]
 
 
 #  Vehicle Feature Serializer
-class VehicleFeatureSerializer(serializers.ModelSerializer):
+class VehicleFeatureSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleFeature
         fields = "__all__"
 
 
 #  Vehicle Features Mapping Serializer
-class VehicleFeaturesMappingSerializer(serializers.ModelSerializer):
+class VehicleFeaturesMappingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     feature = VehicleFeatureSerializer()
 
     class Meta:
@@ -71,11 +174,13 @@ class VehicleFeaturesMappingSerializer(serializers.ModelSerializer):
 
 
 #  Vehicle Serializer
-class VehicleSerializer(serializers.ModelSerializer):
-    seller = UserSerializer()  # Nested User Data
+class VehicleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    seller = SellerSerializer()  # Nested User Data with reputation
     model_name = serializers.CharField(source="model.name", read_only=True)
     brand_name = serializers.CharField(source="model.brand.name", read_only=True)
     images = serializers.SerializerMethodField()
+    srcsets = serializers.SerializerMethodField()  # Responsive variants per image (detail only)
+    detail_only_fields = ("srcsets",)
 
     class Meta:
         model = Vehicle
@@ -91,17 +196,29 @@ class VehicleSerializer(serializers.ModelSerializer):
             "color",
             "seller",
             "images",
+            "srcsets",
         ]
 
     def get_images(self, obj):
-        return [image.image.url for image in obj.images.all()]
+        """  Originals on detail views, thumbnails everywhere else"""
+        if self.is_detail():
+            return [image.image.url for image in obj.images.all()]
+        return [thumbnail_url(image) for image in obj.images.all()]
+
+    def get_srcsets(self, obj):
+        return [srcsets(image) for image in obj.images.all()]
 
 
 #  Chat Serializer
-class ChatSerializer(serializers.ModelSerializer):
+class ChatSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     buyer = UserSerializer()
     seller = UserSerializer()
     vehicle = VehicleSerializer()
+    summary_fields = {
+        "buyer": UserSummarySerializer,
+        "seller": UserSummarySerializer,
+        "vehicle": VehicleSummarySerializer,
+    }
 
     class Meta:
         model = Chat
@@ -109,28 +226,83 @@ class ChatSerializer(serializers.ModelSerializer):
 
 
 #  Message Serializer
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     sender = UserSerializer()
+    summary_fields = {"sender": UserSummarySerializer}
 
     class Meta:
         model = Message
         fields = "__all__"
 
 
+#  Chat Inbox Serializer (flat, built from one joined query)
+class ChatInboxSerializer(serializers.ModelSerializer):
+    chat = serializers.IntegerField(source="chat_id", read_only=True)
+    vehicle = serializers.SerializerMethodField()
+    counterpart = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChatInbox
+        fields = [
+            "chat",
+            "vehicle",
+            "counterpart",
+            "last_message",
+            "last_message_snippet",
+            "last_activity_at",
+            "unread_count",
+        ]
+
+    def get_vehicle(self, obj):
+        vehicle = obj.chat.vehicle
+        return {
+            "id": vehicle.id,
+            "brand_name": vehicle.model.brand.name,
+            "model_name": vehicle.model.name,
+        }
+
+    def get_counterpart(self, obj):
+        chat = obj.chat
+        other = chat.seller if obj.user_id == chat.buyer_id else chat.buyer
+        return {"id": other.id, "username": other.username}
+
+
 #  Review Serializer
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     reviewer = UserSerializer()
     reviewed_user = UserSerializer()
     vehicle = VehicleSerializer()
+    summary_fields = {
+        "reviewer": UserSummarySerializer,
+        "reviewed_user": UserSummarySerializer,
+        "vehicle": VehicleSummarySerializer,
+    }
 
     class Meta:
         model = Review
         fields = "__all__"
 
 
+#  Review Thread Serializer (trees built by marketplace.review_threads)
+class ReviewThreadSerializer(serializers.ModelSerializer):
+    reviewer = serializers.SerializerMethodField()
+    replies = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Review
+        fields = ["id", "reviewer", "reviewed_user", "vehicle", "rating", "review_text", "review_date", "replies"]
+
+    def get_reviewer(self, obj):
+        return {"id": obj.reviewer_id, "username": obj.reviewer_username}
+
+    def get_replies(self, obj):
+        return ReviewThreadSerializer(obj.thread_replies, many=True, context=self.context).data
+
+
 #  Notification Serializer
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer()
+    summary_fields = {"user": UserSummarySerializer}
 
     class Meta:
         model = Notification
@@ -138,10 +310,30 @@ class NotificationSerializer(serializers.ModelSerializer):
 
 
 #  Favorite Serializer
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer()
     vehicle = VehicleSerializer()
+    summary_fields = {"user": UserSummarySerializer, "vehicle": VehicleSummarySerializer}
 
     class Meta:
         model = Favorite
         fields = "__all__"
+
+
+#  Image Upload Serializer (chunked, resumable uploads)
+class ImageUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageUpload
+        fields = ["id", "filename", "size", "received", "status", "content_hash", "created_at"]
+        read_only_fields = ["received", "status", "content_hash", "created_at"]
+
+    def validate_size(self, value):
+        limit = uploads.max_upload_size()
+        if not 0 < value <= limit:
+            raise serializers.ValidationError(f"Size must be between 1 and {limit} bytes.")
+        return value
+
+
+#  Attach completed uploads to a vehicle in one call
+class AttachImagesSerializer(serializers.Serializer):
+    uploads = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=50)
@@ -0,0 +1,175 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from marketplace import authentication, facets, images, inbox, message_sync, notifications, reputation, response_cache, search
+from marketplace.consumers import broadcast_message
+from marketplace.models.chat import Chat, Message
+from marketplace.models.notification import Notification
+from marketplace.models.review import Review
+from marketplace.models.user import CustomUser
+from marketplace.tasks import task_queue
+from marketplace.models.vehicle import (
+    Vehicle,
+    VehicleBrand,
+    VehicleFeature,
+    VehicleFeaturesMapping,
+    VehicleImage,
+    VehicleModel,
+)
+
+
+#   Search index maintenance
+@receiver(post_save, sender=Vehicle)
+def index_vehicle(sender, instance, raw=False, **kwargs):
+    """  Reindex a listing on save (sold listings drop out of the index)"""
+    if not raw:
+        search.index_vehicles(Vehicle.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Vehicle)
+def unindex_vehicle(sender, instance, **kwargs):
+    search.remove_vehicles([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=VehicleFeaturesMapping)
+def reindex_vehicle_features(sender, instance, raw=False, **kwargs):
+    """  Feature names are part of the document, so adding/removing one reindexes the vehicle"""
+    if not raw:
+        search.index_vehicles(Vehicle.objects.filter(pk=instance.vehicle_id))
+
+
+@receiver(post_save, sender=VehicleModel)
+def reindex_model_vehicles(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        search.index_vehicles(Vehicle.objects.filter(model=instance))
+
+
+@receiver(post_save, sender=VehicleBrand)
+def reindex_brand_vehicles(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        search.index_vehicles(Vehicle.objects.filter(model__brand=instance))
+
+
+@receiver(post_save, sender=VehicleFeature)
+def reindex_feature_vehicles(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        search.index_vehicles(Vehicle.objects.filter(vehicle_features__feature=instance))
+
+
+#   Facet cache invalidation
+@receiver([post_save, post_delete], sender=Vehicle)
+@receiver([post_save, post_delete], sender=VehicleBrand)
+@receiver([post_save, post_delete], sender=VehicleModel)
+def invalidate_facets(sender, **kwargs):
+    """  Any listing change (including mark_sold) can move facet counts"""
+    facets.invalidate()
+
+
+#   Response cache invalidation
+@receiver([post_save, post_delete], sender=VehicleBrand)
+def invalidate_brand_responses(sender, **kwargs):
+    response_cache.invalidate("brands", "models", "vehicles")
+
+
+@receiver([post_save, post_delete], sender=VehicleModel)
+def invalidate_model_responses(sender, **kwargs):
+    response_cache.invalidate("models", "vehicles")
+
+
+@receiver([post_save, post_delete], sender=Vehicle)
+@receiver([post_save, post_delete], sender=VehicleImage)
+@receiver([post_save, post_delete], sender=VehicleFeaturesMapping)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_vehicle_responses(sender, **kwargs):
+    """  Listings embed images, features and seller reputation, so those writes expire them too"""
+    response_cache.invalidate("vehicles")
+
+
+#   Chat inbox maintenance
+@receiver(post_save, sender=Chat)
+def create_inbox_entries(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        inbox.create_entries(instance)
+
+
+@receiver(post_save, sender=Message)
+def update_inbox_entries(sender, instance, created=False, raw=False, **kwargs):
+    """  Same transaction as the message insert (write paths wrap it in atomic)"""
+    if created and not raw:
+        inbox.record_message(instance)
+
+
+#   Real-time chat fan-out (WebSocket push and sync long-polls)
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created=False, raw=False, **kwargs):
+    """  Messages from REST or WebSocket reach both participants once committed"""
+    if created and not raw:
+        transaction.on_commit(lambda: broadcast_message(instance))
+        transaction.on_commit(lambda: message_sync.waiters.notify(instance))
+
+
+#   Price drop / sold notifications (fanned out off the request path)
+@receiver(post_save, sender=Vehicle)
+def enqueue_vehicle_notifications(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    vehicle_id, old_price, new_price = instance.pk, instance.loaded_value("price"), instance.price
+    if instance.is_active and old_price is not None and new_price < old_price:
+        transaction.on_commit(
+            lambda: task_queue.enqueue(notifications.notify_price_drop, vehicle_id, old_price, new_price)
+        )
+    if instance.loaded_value("is_active") and not instance.is_active:
+        transaction.on_commit(lambda: task_queue.enqueue(notifications.notify_vehicle_sold, vehicle_id))
+
+
+#   Unread notification counter
+@receiver(post_save, sender=Notification)
+def update_unread_counter(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if not instance.is_read:
+            transaction.on_commit(lambda: notifications.increment_unread(instance.user_id))
+    else:
+        # Read state may have flipped either way; recount on the next poll.
+        transaction.on_commit(lambda: notifications.invalidate_unread([instance.user_id]))
+
+
+@receiver(post_delete, sender=Notification)
+def drop_unread_counter(sender, instance, **kwargs):
+    transaction.on_commit(lambda: notifications.invalidate_unread([instance.user_id]))
+
+
+#   Image derivatives (thumbnails, WebP/AVIF) built off the request thread
+@receiver(post_save, sender=VehicleImage)
+def enqueue_image_variants(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if raw or not instance.image:
+        return
+    if created and instance.variants:
+        return  # Deduplicated upload: derivatives already exist for this content
+    if created or update_fields is None or "image" in update_fields:
+        image_id = instance.pk
+        transaction.on_commit(lambda: task_queue.enqueue(images.process_vehicle_image, image_id))
+
+
+#   Seller reputation aggregates
+@receiver(post_save, sender=Review)
+def update_reputation(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        reputation.review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_reputation(sender, instance, **kwargs):
+    reputation.review_deleted(instance)
+
+
+#   Cached logins (marketplace.authentication)
+@receiver([post_save, post_delete], sender=CustomUser)
+def expire_cached_user(sender, instance, raw=False, **kwargs):
+    """  Drop cached copies under both the loaded and the current token version"""
+    if raw:
+        return
+    versions = {instance.loaded_values()["token_version"], instance.token_version}
+    transaction.on_commit(lambda: authentication.user_cache.invalidate(instance.pk, *versions))
@@ -0,0 +1,65 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueue:
+    """
+    Minimal in-process background queue for work that must stay off the
+    request path. Worker threads start on first use and the queue is drained
+    at interpreter exit. With `TASK_QUEUE_EAGER = True` (tests) tasks run inline.
+    """
+
+    def __init__(self, workers=None):
+        self._workers = workers
+        self.tasks = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    @property
+    def workers(self):
+        return self._workers or getattr(settings, "TASK_QUEUE_WORKERS", 2)
+
+    def enqueue(self, func, *args, **kwargs):
+        if getattr(settings, "TASK_QUEUE_EAGER", False):
+            func(*args, **kwargs)
+            return
+        self.start()
+        self.tasks.put((func, args, kwargs))
+
+    def start(self):
+        if self.threads:
+            return
+        with self.lock:
+            if self.threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"task-queue-{index}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+            atexit.register(self.drain)
+
+    def drain(self):
+        """  Wait for queued tasks to finish (called at shutdown)"""
+        self.tasks.join()
+
+    def _run(self):
+        while True:
+            func, args, kwargs = self.tasks.get()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception("Background task %s failed", getattr(func, "__name__", func))
+            finally:
+                close_old_connections()
+                self.tasks.task_done()
+
+
+task_queue = TaskQueue()
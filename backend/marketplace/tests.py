@@ -1,3 +1,1507 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from base64 import b64encode
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from car_dealer.asgi import application
+
+from marketplace.models import (
+    Chat,
+    CustomUser,
+    Favorite,
+    ImageUpload,
+    Message,
+    Notification,
+    Review,
+    RevokedToken,
+    SellerReputation,
+    Vehicle,
+    VehicleBrand,
+    VehicleModel,
+)
+from marketplace.models.vehicle import VehicleFeature, VehicleFeaturesMapping, VehicleImage
+from marketplace import importer, uploads
+from marketplace.message_sync import waiters
+from marketplace.metrics import Histogram, registry
+from marketplace.notifications import fan_out, favoriting_user_ids
+from marketplace.authentication import user_cache
+from marketplace.presence import LastSeenTracker
+from marketplace.replicas import ReplicaRouter, replica_reads
+from marketplace.revocation import BloomFilter, revocation_store
+from marketplace.search import SubstringSearchBackend, get_search_backend
+from marketplace.view_counter import ViewCounter, view_counter
+
+
+def make_vehicle(seller, model, **overrides):
+    """  Create a vehicle listing with sensible defaults for tests"""
+    index = Vehicle.objects.count()
+    fields = {
+        "seller": seller,
+        "model": model,
+        "body_type": "SEDAN",
+        "transmission": "AUTOMATIC",
+        "fuel_type": "PETROL",
+        "mileage": 10000 + index,
+        "price": 20000 + index,
+        "year": 2020,
+        "color": "White",
+        "vin": f"VIN{index:08d}",
+        "cylinders": 4,
+        "engine_size": 2000,
+        "doors": 4,
+        "description": "Well maintained",
+        "location": "Riyadh",
+        "vehicle_history": "No accidents",
+        "condition": "USED",
+    }
+    fields.update(overrides)
+    return Vehicle.objects.create(**fields)
+
+
+class VehicleListQueryCountTests(TestCase):
+    """  The vehicle list must cost a fixed number of queries per page"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.brand = VehicleBrand.objects.create(name="Toyota")
+        self.model = VehicleModel.objects.create(brand=self.brand, name="Corolla")
+
+    def seed(self, count):
+        for i in range(count):
+            seller = CustomUser.objects.create(username=f"seller{Vehicle.objects.count()}")
+            vehicle = make_vehicle(seller, self.model)
+            VehicleImage.objects.create(vehicle=vehicle, image=f"vehicle_images/{vehicle.pk}.jpg")
+
+    def count_queries(self, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/vehicles/", {"page_size": page_size})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), page_size)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.seed(20)
+        small = self.count_queries(2)
+        large = self.count_queries(20)
+        self.assertEqual(small, large)
+
+    def test_list_does_not_load_unrendered_features(self):
+        self.seed(2)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/vehicles/")
+        self.assertFalse(any("marketplace_vehiclefeaturesmapping" in query["sql"] for query in ctx.captured_queries))
+
+    def test_list_payload_includes_nested_relations(self):
+        self.seed(1)
+        response = self.client.get("/api/vehicles/")
+        result = response.data["results"][0]
+        self.assertEqual(result["brand_name"], "Toyota")
+        self.assertEqual(result["model_name"], "Corolla")
+        self.assertEqual(len(result["images"]), 1)
+        self.assertTrue(result["seller"]["username"].startswith("seller"))
+
+
+class VehicleKeysetPaginationTests(TestCase):
+    """  Keyset pagination walks every listing exactly once in a stable order"""
+
+    def setUp(self):
+        self.client = APIClient()
+        seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        # Duplicate prices force the `id` tiebreaker to do its job.
+        for i in range(7):
+            make_vehicle(seller, model, price=10000 + (i % 3) * 1000, year=2015 + i)
+
+    def walk(self, params):
+        ids, url, pages = [], "/api/vehicles/", 0
+        params = {"pagination": "cursor", "page_size": 3, **params}
+        while url:
+            response = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            ids.extend(row["id"] for row in response.data["results"])
+            url, pages = response.data["next"], pages + 1
+        return ids, response
+
+    def test_walks_all_rows_for_each_ordering(self):
+        for ordering in ["price", "-price", "year", "-year", "mileage", "-mileage"]:
+            ids, _ = self.walk({"ordering": ordering})
+            field = ordering.lstrip("-")
+            expected = sorted(
+                Vehicle.objects.values_list(field, "id"),
+                reverse=ordering.startswith("-"),
+            )
+            self.assertEqual(ids, [pk for _, pk in expected], ordering)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(
+            "/api/vehicles/", {"pagination": "cursor", "page_size": 3, "ordering": "price"}
+        )
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [row["id"] for row in back.data["results"]],
+            [row["id"] for row in first.data["results"]],
+        )
+
+    def test_page_number_mode_still_reports_count(self):
+        response = self.client.get("/api/vehicles/")
+        self.assertEqual(response.data["count"], 7)
+
+    def test_rejects_tampered_cursor(self):
+        response = self.client.get("/api/vehicles/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_rejects_well_formed_cursor_with_bad_value(self):
+        for ordering, value in [("price", "abc"), ("price", [1]), ("price", None), ("-created_at", "yesterday")]:
+            cursor = b64encode(json.dumps({"ordering": ordering, "value": value, "id": 1}).encode()).decode()
+            response = self.client.get("/api/vehicles/", {"cursor": cursor, "ordering": ordering})
+            self.assertEqual(response.status_code, 404, (ordering, value))
+
+
+class VehicleSearchTests(TestCase):
+    """  The search index follows vehicle writes and ranks matches"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = CustomUser.objects.create(username="seller")
+        self.corolla = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.mustang = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Ford"), name="Mustang"
+        )
+
+    def search(self, query):
+        response = self.client.get("/api/vehicles/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_matches_brand_model_features_and_text(self):
+        toyota = make_vehicle(self.seller, self.corolla, description="Family sedan")
+        ford = make_vehicle(self.seller, self.mustang, location="Jeddah")
+        feature = VehicleFeature.objects.create(name="Sunroof")
+        VehicleFeaturesMapping.objects.create(vehicle=ford, feature=feature)
+
+        self.assertEqual(self.search("toyota"), [toyota.pk])
+        self.assertEqual(self.search("coro"), [toyota.pk])
+        self.assertEqual(self.search("sunroof jeddah"), [ford.pk])
+        self.assertEqual(self.search("'); DROP"), [])
+
+    def test_brand_match_outranks_description_match(self):
+        mention = make_vehicle(self.seller, self.corolla, description="Faster than a Ford")
+        ford = make_vehicle(self.seller, self.mustang)
+        self.assertEqual(self.search("ford"), [ford.pk, mention.pk])
+
+    def test_index_is_maintained_on_update_sale_and_delete(self):
+        vehicle = make_vehicle(self.seller, self.corolla)
+        self.mustang.name = "Supra"
+        self.mustang.save()
+        vehicle.model = self.mustang
+        vehicle.save()
+        self.assertEqual(self.search("supra"), [vehicle.pk])
+        self.assertEqual(self.search("corolla"), [])
+
+        vehicle.is_active = False
+        vehicle.save()
+        self.assertEqual(self.search("supra"), [])
+
+        other = make_vehicle(self.seller, self.corolla)
+        other.delete()
+        self.assertEqual(self.search("corolla"), [])
+
+    def test_unsupported_vendor_falls_back_to_substring_search(self):
+        other_vendor = mock.Mock(vendor="mysql", alias="default")
+        self.assertIsInstance(get_search_backend(other_vendor), SubstringSearchBackend)
+
+        with override_settings(SEARCH_BACKEND="marketplace.search.SubstringSearchBackend"):
+            toyota = make_vehicle(self.seller, self.corolla, description="Family sedan")
+            ford = make_vehicle(self.seller, self.mustang, location="Jeddah")
+            VehicleFeaturesMapping.objects.create(vehicle=ford, feature=VehicleFeature.objects.create(name="Sunroof"))
+            self.assertEqual(self.search("toyota"), [toyota.pk])
+            self.assertEqual(self.search("sunroof jeddah"), [ford.pk])
+            self.assertEqual(self.search("'); DROP"), [])
+
+
+class VehicleFacetTests(TestCase):
+    """  Facet counts come from one query and follow listing changes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = CustomUser.objects.create(username="seller")
+        self.client.force_authenticate(self.seller)
+        toyota = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        ford = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Ford"), name="Mustang"
+        )
+        self.toyota = make_vehicle(self.seller, toyota, price=4000, year=1999)
+        make_vehicle(self.seller, toyota, price=22000, fuel_type="DIESEL")
+        make_vehicle(self.seller, ford, price=120000, transmission="MANUAL", year=2021)
+
+    def test_counts_every_facet_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/vehicles/facets/")
+        facet_queries = [q for q in ctx.captured_queries if "marketplace_vehicle" in q["sql"]]
+        self.assertEqual(len(facet_queries), 1)
+        facets = response.data["facets"]
+        self.assertEqual(response.data["total"], 3)
+        self.assertEqual(facets["brand"], {"Ford": 1, "Toyota": 2})
+        self.assertEqual(facets["fuel_type"]["DIESEL"], 1)
+        self.assertEqual(facets["transmission"]["MANUAL"], 1)
+        self.assertEqual(facets["price"]["<5000"], 1)
+        self.assertEqual(facets["price"]["100000+"], 1)
+        self.assertEqual(facets["year"]["2020+"], 2)
+
+    def test_respects_filters_and_is_cached(self):
+        params = {"model__brand__name": "Toyota"}
+        self.assertEqual(self.client.get("/api/vehicles/facets/", params).data["total"], 2)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/vehicles/facets/", params)
+        self.assertFalse([q for q in ctx.captured_queries if "marketplace_vehicle" in q["sql"]])
+
+    def test_mark_sold_invalidates_cached_counts(self):
+        self.assertEqual(self.client.get("/api/vehicles/facets/").data["total"], 3)
+        self.client.post(f"/api/vehicles/{self.toyota.pk}/mark_sold/")
+        self.assertEqual(self.client.get("/api/vehicles/facets/").data["total"], 2)
+
+
+class ViewCounterTests(TestCase):
+    """  Detail views are buffered and flushed as batched increments"""
+
+    def setUp(self):
+        self.client = APIClient()
+        seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.first = make_vehicle(seller, model)
+        self.second = make_vehicle(seller, model)
+        self.reset_global_counter()
+
+    def tearDown(self):
+        self.reset_global_counter()
+
+    def reset_global_counter(self):
+        """  Detail views elsewhere in the suite feed the process-wide counter"""
+        with view_counter.lock:
+            view_counter.pending.clear()
+            view_counter.recent.clear()
+
+    def test_flush_merges_buffered_views_into_one_update(self):
+        counter = ViewCounter(flush_interval=60)
+        counter.start = lambda: None  # Flush by hand instead of in a thread
+        for _ in range(3):
+            counter.record(self.first.pk)
+        counter.record(self.second.pk)
+        self.assertEqual(Vehicle.objects.get(pk=self.first.pk).views, 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(counter.flush(), 2)
+        self.assertEqual(len([q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]), 1)
+        self.assertEqual(Vehicle.objects.get(pk=self.first.pk).views, 3)
+        self.assertEqual(Vehicle.objects.get(pk=self.second.pk).views, 1)
+        self.assertEqual(counter.flush(), 0)
+
+    def test_stop_flushes_pending_views(self):
+        counter = ViewCounter(flush_interval=60)
+        counter.start = lambda: None
+        counter.record(self.first.pk)
+        counter.stop()
+        self.assertEqual(Vehicle.objects.get(pk=self.first.pk).views, 1)
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+    def test_trending_ranks_recently_viewed_vehicles(self):
+        self.client.get(f"/api/vehicles/{self.first.pk}/")
+        for _ in range(2):
+            self.client.get(f"/api/vehicles/{self.second.pk}/")
+        response = self.client.get("/api/vehicles/trending/")
+        ranked = [(row["id"], row["recent_views"]) for row in response.data]
+        self.assertEqual(ranked[:2], [(self.second.pk, 2), (self.first.pk, 1)])
+        self.assertEqual(Vehicle.objects.get(pk=self.second.pk).views, 2)
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+    def test_detail_with_sparse_fields_still_counts_the_view(self):
+        response = self.client.get(f"/api/vehicles/{self.first.pk}/", {"fields": "price"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"price"})
+        self.assertEqual(Vehicle.objects.get(pk=self.first.pk).views, 1)
+
+
+class ResponseCacheTests(TestCase):
+    """  Public catalog responses are cached with ETags and expire on writes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.seller = CustomUser.objects.create(username="seller")
+        self.brand = VehicleBrand.objects.create(name="Toyota")
+        self.model = VehicleModel.objects.create(brand=self.brand, name="Corolla")
+        self.vehicle = make_vehicle(self.seller, self.model)
+
+    def test_second_request_skips_the_database_and_honours_etag(self):
+        first = self.client.get("/api/brands/")
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get("/api/brands/")
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(second.data, first.data)
+
+        not_modified = self.client.get("/api/brands/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get("/api/vehicles/", {"year": 2020})
+        response = self.client.get("/api/vehicles/", {"year": 1990})
+        self.assertEqual(response.data["count"], 0)
+
+    def test_host_is_part_of_the_key(self):
+        make_vehicle(self.seller, self.model, vin="SECOND")
+        self.client.get("/api/vehicles/", {"page_size": 1}, HTTP_HOST="evil.example")
+        response = self.client.get("/api/vehicles/", {"page_size": 1})
+        self.assertTrue(response.data["next"].startswith("http://testserver/"))
+
+    def test_related_writes_expire_vehicle_listing(self):
+        etag = self.client.get("/api/vehicles/")["ETag"]
+
+        VehicleImage.objects.create(vehicle=self.vehicle, image="vehicle_images/new.jpg")
+        response = self.client.get("/api/vehicles/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"][0]["images"]), 1)
+
+        self.brand.name = "Lexus"
+        self.brand.save()
+        self.assertEqual(self.client.get("/api/vehicles/").data["results"][0]["brand_name"], "Lexus")
+
+    def test_mark_sold_is_never_served_stale(self):
+        self.assertEqual(self.client.get("/api/vehicles/").data["count"], 1)
+        owner = APIClient()
+        owner.force_authenticate(self.seller)
+        owner.post(f"/api/vehicles/{self.vehicle.pk}/mark_sold/")
+        self.assertEqual(self.client.get("/api/vehicles/").data["count"], 0)
+
+    def test_authenticated_vehicle_list_bypasses_cache(self):
+        authenticated = APIClient()
+        authenticated.force_authenticate(self.seller)
+        self.assertNotIn("ETag", authenticated.get("/api/vehicles/"))
+
+
+class SparseFieldsetTests(TestCase):
+    """  List actions emit summaries unless expanded; ?fields= trims the payload"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.buyer = CustomUser.objects.create(username="buyer", email="buyer@example.com")
+        seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.vehicle = make_vehicle(seller, model)
+        VehicleImage.objects.create(vehicle=self.vehicle, image="vehicle_images/a.jpg")
+        self.favorite = Favorite.objects.create(user=self.buyer, vehicle=self.vehicle)
+        self.client.force_authenticate(self.buyer)
+
+    def test_list_uses_summaries(self):
+        row = self.client.get("/api/favorites/").data["results"][0]
+        self.assertEqual(row["user"], {"id": self.buyer.pk, "username": "buyer"})
+        self.assertEqual(
+            set(row["vehicle"]), {"id", "brand_name", "model_name", "year", "price", "thumbnail"}
+        )
+        self.assertEqual(row["vehicle"]["thumbnail"], "/vehicle_images/a.jpg")
+
+    def test_expand_restores_full_nested_objects(self):
+        row = self.client.get("/api/favorites/", {"expand": "vehicle"}).data["results"][0]
+        self.assertEqual(row["vehicle"]["seller"]["username"], "seller")
+        self.assertNotIn("email", row["user"])
+        self.assertNotIn("srcsets", row["vehicle"])  # Detail-only, nested or not
+
+    def test_fields_limits_top_level_fields(self):
+        row = self.client.get("/api/favorites/", {"fields": "id,vehicle"}).data["results"][0]
+        self.assertEqual(set(row), {"id", "vehicle"})
+        vehicle = self.client.get("/api/vehicles/", {"fields": "id,price"}).data["results"][0]
+        self.assertEqual(set(vehicle), {"id", "price"})
+
+    def test_detail_keeps_full_representation(self):
+        row = self.client.get(f"/api/favorites/{self.favorite.pk}/").data
+        self.assertEqual(row["user"]["email"], "buyer@example.com")
+        self.assertIn("images", row["vehicle"])
+
+    def test_favorites_list_query_count_is_fixed(self):
+        for index in range(5):
+            Favorite.objects.create(
+                user=self.buyer, vehicle=make_vehicle(self.vehicle.seller, self.vehicle.model)
+            )
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/favorites/", {"expand": "user,vehicle"})
+        self.assertLessEqual(len(ctx.captured_queries), 3)
+
+
+@override_settings(LAST_SEEN_FLUSH_INTERVAL=0)
+class ChatWebSocketTests(TransactionTestCase):
+    """  Chat WebSocket: fan-out to both participants, acks and resume"""
+
+    def setUp(self):
+        self.buyer = CustomUser.objects.create(username="buyer")
+        self.seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.chat = Chat.objects.create(
+            buyer=self.buyer, seller=self.seller, vehicle=make_vehicle(self.seller, model)
+        )
+
+    async def connect(self, user, **params):
+        params["token"] = str(AccessToken.for_user(user))
+        communicator = WebsocketCommunicator(
+            application, f"/ws/chats/{self.chat.pk}/?{urlencode(params)}"
+        )
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    async def test_message_is_acked_and_pushed_to_both_participants(self):
+        buyer, _ = await self.connect(self.buyer)
+        seller, _ = await self.connect(self.seller)
+
+        await buyer.send_json_to({"type": "message", "content": "Still available?", "client_id": "c1"})
+        ack = await buyer.receive_json_from()
+        self.assertEqual(ack["type"], "ack")
+        self.assertEqual(ack["client_id"], "c1")
+        pushed = await seller.receive_json_from()
+        self.assertEqual((pushed["id"], pushed["content"]), (ack["id"], "Still available?"))
+        self.assertEqual((await buyer.receive_json_from())["id"], ack["id"])
+
+        await seller.send_json_to({"type": "delivered", "id": ack["id"]})
+        receipt = await buyer.receive_json_from()
+        self.assertEqual(receipt, {"type": "delivered", "id": ack["id"], "user": self.seller.pk})
+        await buyer.disconnect()
+        await seller.disconnect()
+
+    async def test_reconnect_replays_messages_after_last_id(self):
+        first = await database_sync_to_async(Message.objects.create)(
+            chat=self.chat, sender=self.seller, content="one"
+        )
+        await database_sync_to_async(Message.objects.create)(
+            chat=self.chat, sender=self.seller, content="two"
+        )
+        buyer, _ = await self.connect(self.buyer, last_id=first.pk)
+        replayed = await buyer.receive_json_from()
+        self.assertEqual(replayed["content"], "two")
+        self.assertEqual(await buyer.receive_json_from(), {"type": "resumed", "more": False})
+        await buyer.disconnect()
+
+    async def test_rejects_users_outside_the_chat(self):
+        outsider = await database_sync_to_async(CustomUser.objects.create)(username="outsider")
+        _, connected = await self.connect(outsider)
+        self.assertFalse(connected)
+
+
+class MessageSyncTests(TransactionTestCase):
+    """  Per-chat sync returns only the delta after a cursor, for both participants"""
+
+    def setUp(self):
+        self.buyer = CustomUser.objects.create(username="buyer")
+        self.seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.chat = Chat.objects.create(
+            buyer=self.buyer, seller=self.seller, vehicle=make_vehicle(self.seller, model)
+        )
+        self.url = f"/api/chats/{self.chat.pk}/messages/"
+        self.client = APIClient()
+
+    def test_returns_messages_after_cursor_for_both_participants(self):
+        first = Message.objects.create(chat=self.chat, sender=self.buyer, content="Hi")
+        second = Message.objects.create(chat=self.chat, sender=self.seller, content="Hello")
+        for user in (self.buyer, self.seller):
+            self.client.force_authenticate(user)
+            data = self.client.get(self.url, {"after": first.pk}).data
+            self.assertEqual([m["id"] for m in data["messages"]], [second.pk])
+            self.assertEqual(data["messages"][0]["sender"], self.seller.pk)
+            self.assertEqual(data["cursor"], second.pk)
+            self.assertFalse(data["more"])
+
+    def test_limit_reports_more(self):
+        for text in ("a", "b", "c"):
+            Message.objects.create(chat=self.chat, sender=self.buyer, content=text)
+        self.client.force_authenticate(self.buyer)
+        data = self.client.get(self.url, {"limit": 2}).data
+        self.assertEqual([m["content"] for m in data["messages"]], ["a", "b"])
+        self.assertTrue(data["more"])
+
+    def test_long_poll_wakes_on_new_message(self):
+        self.client.force_authenticate(self.buyer)
+        timer = threading.Timer(
+            0.2, lambda: Message.objects.create(chat=self.chat, sender=self.seller, content="Yes")
+        )
+        timer.start()
+        started = time.monotonic()
+        data = self.client.get(self.url, {"after": 0, "timeout": 10}).data
+        timer.join()
+        self.assertEqual([m["content"] for m in data["messages"]], ["Yes"])
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual((waiters.latest, waiters.waiting), ({}, {}))
+
+    def test_messages_without_waiters_are_not_tracked(self):
+        Message.objects.create(chat=self.chat, sender=self.buyer, content="Hi")
+        self.assertNotIn(self.chat.pk, waiters.latest)
+        self.assertFalse(waiters.wait(self.chat.pk, 0, 0.05))
+        self.assertEqual((waiters.latest, waiters.waiting), ({}, {}))
+
+    def test_outsiders_cannot_sync(self):
+        self.client.force_authenticate(CustomUser.objects.create(username="outsider"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class ChatInboxTests(TestCase):
+    """  The materialized inbox tracks last message and unread counts per participant"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.buyer = CustomUser.objects.create(username="buyer")
+        self.seller = CustomUser.objects.create(username="seller")
+        self.model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.chat = self.start_chat()
+
+    def start_chat(self):
+        return Chat.objects.create(
+            buyer=self.buyer, seller=self.seller, vehicle=make_vehicle(self.seller, self.model)
+        )
+
+    def inbox(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get("/api/chats/inbox/").data["results"]
+
+    def test_messages_update_both_inboxes(self):
+        Message.objects.create(chat=self.chat, sender=self.buyer, content="Is it available?")
+        Message.objects.create(chat=self.chat, sender=self.buyer, content="Can I see it today?")
+
+        seller_row = self.inbox(self.seller)[0]
+        self.assertEqual(seller_row["unread_count"], 2)
+        self.assertEqual(seller_row["last_message_snippet"], "Can I see it today?")
+        self.assertEqual(seller_row["counterpart"], {"id": self.buyer.pk, "username": "buyer"})
+        self.assertEqual(self.inbox(self.buyer)[0]["unread_count"], 0)
+
+    def test_inbox_is_ordered_by_activity_in_one_query(self):
+        newer = self.start_chat()
+        Message.objects.create(chat=self.chat, sender=self.seller, content="Bump")
+        self.client.force_authenticate(self.buyer)
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self.client.get("/api/chats/inbox/").data["results"]
+        self.assertEqual([row["chat"] for row in rows], [self.chat.pk, newer.pk])
+        self.assertEqual(len([q for q in ctx.captured_queries if "marketplace_chatinbox" in q["sql"]]), 2)
+        self.assertLessEqual(len(ctx.captured_queries), 2)  # COUNT + page
+
+    def test_read_resets_unread_count(self):
+        Message.objects.create(chat=self.chat, sender=self.buyer, content="Hello")
+        self.client.force_authenticate(self.seller)
+        self.client.post(f"/api/chats/{self.chat.pk}/read/")
+        self.assertEqual(self.inbox(self.seller)[0]["unread_count"], 0)
+
+
+@override_settings(TASK_QUEUE_EAGER=True)
+class NotificationFanOutTests(TestCase):
+    """  Price drops and sales notify favoriting users in batched inserts"""
+
+    def setUp(self):
+        self.seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.vehicle = make_vehicle(self.seller, model, price=20000)
+        self.fans = [CustomUser.objects.create(username=f"fan{i}") for i in range(5)]
+        for fan in self.fans:
+            Favorite.objects.create(user=fan, vehicle=self.vehicle)
+
+    def notifications(self, notification_type):
+        return Notification.objects.filter(notification_type=notification_type)
+
+    def test_price_drop_notifies_every_fan_once(self):
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.price = 18000
+            vehicle.save()
+        drops = self.notifications(Notification.NotificationType.PRICE_DROP)
+        self.assertEqual(sorted(drops.values_list("user_id", flat=True)), [f.pk for f in self.fans])
+        self.assertIn("18000", drops.first().message)
+
+    def test_price_increase_and_unchanged_saves_are_silent(self):
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.price = 25000
+            vehicle.save()
+            vehicle.save()
+        self.assertFalse(Notification.objects.exists())
+
+    def test_mark_sold_notifies_fans(self):
+        client = APIClient()
+        client.force_authenticate(self.seller)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f"/api/vehicles/{self.vehicle.pk}/mark_sold/")
+        self.assertEqual(self.notifications(Notification.NotificationType.VEHICLE_SOLD).count(), 5)
+
+    def test_fan_out_query_count_grows_with_chunks_not_fans(self):
+        with CaptureQueriesContext(connection) as ctx:
+            fan_out(self.vehicle, Notification.NotificationType.PRICE_DROP, "msg")
+        # One favorites page, one bulk insert, one empty page to stop.
+        self.assertEqual(len(ctx.captured_queries), 3)
+        chunks = list(favoriting_user_ids(self.vehicle, chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+
+class UnreadNotificationCountTests(TestCase):
+    """  The unread badge is served from a counter kept in step with writes"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username="user")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def notify(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                user=self.user, notification_type="Message", message="Hi", **fields
+            )
+
+    def unread(self):
+        return self.client.get("/api/notifications/unread_count/").data["unread_count"]
+
+    def test_counter_tracks_create_read_and_mark_all_read(self):
+        self.assertEqual(self.unread(), 0)
+        first = self.notify()
+        self.notify()
+        self.notify(is_read=True)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.unread(), 2)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/notifications/{first.pk}/", {"is_read": True}, format="json")
+        self.assertEqual(self.unread(), 1)
+
+        self.client.post("/api/notifications/mark_all_read/")
+        self.assertEqual(self.unread(), 0)
+
+    def test_bulk_fan_out_refreshes_recipient_counters(self):
+        seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        vehicle = make_vehicle(seller, model)
+        Favorite.objects.create(user=self.user, vehicle=vehicle)
+        self.assertEqual(self.unread(), 0)
+        fan_out(vehicle, Notification.NotificationType.PRICE_DROP, "Cheaper")
+        self.assertEqual(self.unread(), 1)
+
+
+class PruneNotificationsCommandTests(TestCase):
+    """  Retention removes expired read rows and collapses repeated price drops"""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create(username="user")
+        seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.vehicle = make_vehicle(seller, model)
+
+    def notify(self, age_days=0, **fields):
+        fields.setdefault("notification_type", Notification.NotificationType.MESSAGE)
+        notification = Notification.objects.create(user=self.user, message="Hi", **fields)
+        Notification.objects.filter(pk=notification.pk).update(
+            created_at=timezone.now() - timedelta(days=age_days)
+        )
+        return notification
+
+    def test_prunes_expired_read_and_superseded_price_drops(self):
+        expired = self.notify(age_days=120, is_read=True)
+        unread_old = self.notify(age_days=120)
+        recent_read = self.notify(age_days=5, is_read=True)
+        drops = [
+            self.notify(notification_type=Notification.NotificationType.PRICE_DROP, vehicle=self.vehicle)
+            for _ in range(3)
+        ]
+        out = StringIO()
+        call_command("prune_notifications", "--batch-size", "1", stdout=out)
+
+        remaining = set(Notification.objects.values_list("pk", flat=True))
+        self.assertEqual(remaining, {unread_old.pk, recent_read.pk, drops[-1].pk})
+        self.assertNotIn(expired.pk, remaining)
+        self.assertIn("Expired read notifications: removed 1 rows", out.getvalue())
+        self.assertIn("Collapsed price drops: removed 2 rows", out.getvalue())
+
+    def test_dry_run_keeps_rows(self):
+        self.notify(age_days=120, is_read=True)
+        call_command("prune_notifications", "--dry-run", stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+def make_jpeg(width=1600, height=900, color="red"):
+    buffer = BytesIO()
+    PILImage.new("RGB", (width, height), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@override_settings(TASK_QUEUE_EAGER=True, VIEW_COUNTER_FLUSH_INTERVAL=0)
+class VehicleImageVariantTests(TestCase):
+    """  Uploads get hash-addressed thumbnails and responsive variants"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings_override.enable()
+        self.client = APIClient()
+        seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.vehicle = make_vehicle(seller, model)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+
+    def upload(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = VehicleImage.objects.create(
+                vehicle=self.vehicle, image=SimpleUploadedFile("car.jpg", content)
+            )
+        image.refresh_from_db()
+        return image
+
+    def test_variants_are_generated_and_shared_by_duplicates(self):
+        first = self.upload(make_jpeg())
+        second = self.upload(make_jpeg())
+        self.assertEqual(len(first.content_hash), 64)
+        self.assertEqual(first.variants, second.variants)
+        self.assertEqual(sorted(first.variants, key=int), ["320", "640", "1280"])
+        self.assertIn("webp", first.variants["320"])
+        derived = os.path.join(self.media.name, "vehicle_images", "derived")
+        files = [name for _, _, names in os.walk(derived) for name in names]
+        self.assertEqual(len(files), sum(len(f) for f in first.variants.values()))
+
+    def test_small_images_are_not_upscaled(self):
+        image = self.upload(make_jpeg(width=500, height=300))
+        self.assertEqual(sorted(image.variants, key=int), ["320"])
+
+    def test_command_backfills_images_without_variants(self):
+        built = self.upload(make_jpeg())
+        lost = self.upload(make_jpeg(width=500, height=300))
+        # An attached upload whose variant task never ran: hashed, but no variants
+        VehicleImage.objects.filter(pk=lost.pk).update(variants={})
+        out = StringIO()
+        call_command("build_image_variants", stdout=out)
+        self.assertIn("Processed 1 images", out.getvalue())
+        lost.refresh_from_db()
+        self.assertEqual(sorted(lost.variants, key=int), ["320"])
+        self.assertTrue(VehicleImage.objects.filter(pk=built.pk).exclude(variants={}).exists())
+
+    def test_list_emits_thumbnails_and_detail_emits_srcsets(self):
+        image = self.upload(make_jpeg())
+        listed = self.client.get("/api/vehicles/").data["results"][0]
+        self.assertTrue(listed["images"][0].endswith("/320.webp"))
+        self.assertNotIn("srcsets", listed)
+
+        detail = self.client.get(f"/api/vehicles/{self.vehicle.pk}/").data
+        self.assertEqual(detail["images"], [image.image.url])
+        self.assertIn("640w", detail["srcsets"][0]["image/webp"])
+
+
+@override_settings(TASK_QUEUE_EAGER=True, VIEW_COUNTER_FLUSH_INTERVAL=0)
+class ChunkedImageUploadTests(TestCase):
+    """  Resumable uploads are streamed in chunks, deduplicated and attached in batches"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media.name, FILE_UPLOAD_TEMP_DIR=self.media.name
+        )
+        self.settings_override.enable()
+        self.seller = CustomUser.objects.create(username="seller")
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.vehicle = make_vehicle(self.seller, model)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+
+    def send_chunk(self, upload_id, data, offset):
+        return self.client.patch(
+            f"/api/uploads/{upload_id}/chunk/", data,
+            content_type="application/octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self, content, chunk_size=4096):
+        upload_id = self.client.post(
+            "/api/uploads/", {"filename": "car.jpg", "size": len(content)}, format="json"
+        ).data["id"]
+        for offset in range(0, len(content), chunk_size):
+            response = self.send_chunk(upload_id, content[offset : offset + chunk_size], offset)
+            self.assertEqual(response.status_code, 200)
+        return self.client.post(f"/api/uploads/{upload_id}/complete/")
+
+    def test_resume_from_server_offset(self):
+        content = make_jpeg()
+        upload_id = self.client.post(
+            "/api/uploads/", {"filename": "car.jpg", "size": len(content)}, format="json"
+        ).data["id"]
+        self.send_chunk(upload_id, content[:1000], 0)
+        conflict = self.send_chunk(upload_id, content[2000:], 2000)
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.data["received"], 1000)
+        self.assertEqual(self.client.get(f"/api/uploads/{upload_id}/").data["received"], 1000)
+        self.assertEqual(self.client.post(f"/api/uploads/{upload_id}/complete/").status_code, 400)
+
+        self.send_chunk(upload_id, content[1000:], 1000)
+        response = self.client.post(f"/api/uploads/{upload_id}/complete/")
+        self.assertEqual(response.data["status"], ImageUpload.Status.COMPLETE)
+        self.assertEqual(response.data["content_hash"], hashlib.sha256(content).hexdigest())
+
+    def test_identical_content_is_stored_once(self):
+        content = make_jpeg()
+        first = self.upload(content)
+        second = self.upload(content, chunk_size=1000)
+        self.assertFalse(first.data["deduplicated"])
+        self.assertTrue(second.data["deduplicated"])
+        blobs = os.path.join(self.media.name, "vehicle_images", "blobs")
+        self.assertEqual(sum(len(names) for _, _, names in os.walk(blobs)), 1)
+
+    def test_rejects_non_images(self):
+        response = self.upload(b"not an image" * 100)
+        self.assertEqual(response.status_code, 400)
+
+    def test_chunk_body_is_received_outside_a_transaction(self):
+        content = make_jpeg()
+        upload = ImageUpload.objects.create(user=self.seller, filename="car.jpg", size=len(content))
+        depths = []
+
+        class RecordingStream(BytesIO):
+            def read(self, size=-1):
+                depths.append(len(connection.atomic_blocks))
+                return super().read(size)
+
+        # TestCase already runs inside atomic blocks; reading must not open another.
+        outer = len(connection.atomic_blocks)
+        uploads.append_chunk(upload.pk, self.seller, 0, RecordingStream(content), len(content))
+        self.assertEqual(set(depths), {outer})
+        self.assertEqual(ImageUpload.objects.get(pk=upload.pk).received, len(content))
+        self.assertEqual(
+            [name for name in os.listdir(uploads.temp_dir()) if name.endswith(".chunk")], []
+        )
+
+    def test_prune_discards_abandoned_uploads_and_hashers(self):
+        content = make_jpeg()
+        upload_id = self.client.post(
+            "/api/uploads/", {"filename": "car.jpg", "size": len(content)}, format="json"
+        ).data["id"]
+        self.send_chunk(upload_id, content[:1000], 0)
+        part = os.path.join(uploads.temp_dir(), f"{upload_id}.part")
+        self.assertTrue(os.path.exists(part))
+        stray = os.path.join(uploads.temp_dir(), "gone.chunk")
+        open(stray, "wb").close()
+        os.utime(stray, (0, 0))
+
+        out = StringIO()
+        call_command("prune_uploads", "--max-age-hours", "1", stdout=out)
+        self.assertTrue(ImageUpload.objects.filter(pk=upload_id).exists())
+        self.assertFalse(os.path.exists(stray))
+
+        ImageUpload.objects.filter(pk=upload_id).update(created_at=timezone.now() - timedelta(hours=2))
+        call_command("prune_uploads", "--max-age-hours", "1", stdout=out)
+        self.assertFalse(ImageUpload.objects.filter(pk=upload_id).exists())
+        self.assertFalse(os.path.exists(part))
+        self.assertNotIn(uuid.UUID(upload_id), uploads._hashers)
+
+    def test_idle_hashers_expire(self):
+        with mock.patch("marketplace.uploads.time.monotonic", return_value=0):
+            uploads._advance_hash("abandoned", 0, b"data")
+        with mock.patch("marketplace.uploads.time.monotonic", return_value=uploads.HASHER_TTL + 1):
+            uploads._advance_hash("active", 0, b"data")
+        self.assertNotIn("abandoned", uploads._hashers)
+        self.assertIn("active", uploads._hashers)
+        uploads._hashers.pop("active")
+
+    def test_attach_batch_reuses_variants(self):
+        ids = [self.upload(make_jpeg(color=color)).data["id"] for color in ("red", "blue", "red")]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/vehicles/{self.vehicle.pk}/images/", {"uploads": ids[:2]}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse(ImageUpload.objects.filter(pk__in=ids[:2]).exists())
+
+        with mock.patch("marketplace.images.generate_variants") as generate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    f"/api/vehicles/{self.vehicle.pk}/images/", {"uploads": ids[2:]}, format="json"
+                )
+        generate.assert_not_called()
+        images = list(self.vehicle.images.order_by("id"))
+        self.assertEqual(images[2].image.name, images[0].image.name)
+        self.assertEqual(images[2].variants, images[0].variants)
+
+    def test_only_seller_can_attach(self):
+        upload_id = self.upload(make_jpeg()).data["id"]
+        self.client.force_authenticate(CustomUser.objects.create(username="other"))
+        response = self.client.post(
+            f"/api/vehicles/{self.vehicle.pk}/images/", {"uploads": [upload_id]}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(TASK_QUEUE_EAGER=True)
+class VehicleImportTests(TestCase):
+    """  Dealer feeds upsert listings by VIN in bulk and report row errors"""
+
+    HEADER = "brand,model,vin,body_type,transmission,fuel_type,condition,mileage,price,year,cylinders,engine_size,doors,color,location,features\n"
+
+    def setUp(self):
+        self.seller = CustomUser.objects.create(username="dealer")
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def csv_row(self, vin, price=20000, brand="Toyota", model="Corolla", fuel="Petrol"):
+        return f"{brand},{model},{vin},SEDAN,Automatic,{fuel},USED,1000,{price},2020,4,2000,4,White,Riyadh,Sunroof|Bluetooth\n"
+
+    def post_csv(self, body):
+        return self.client.generic("POST", "/api/vehicles/import/", body.encode(), content_type="text/csv")
+
+    def test_csv_import_creates_catalog_and_listings(self):
+        body = self.HEADER + "".join(self.csv_row(f"VIN{index:04d}") for index in range(120))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_csv(body)
+        self.assertEqual(response.data["created"], 120)
+        self.assertEqual(response.data["failed"], 0)
+        self.assertLess(len(queries), 40)  # Independent of the row count
+        self.assertEqual(VehicleBrand.objects.count(), 1)
+        self.assertEqual(VehicleModel.objects.count(), 1)
+        self.assertEqual(VehicleFeature.objects.count(), 2)
+        self.assertEqual(VehicleFeaturesMapping.objects.count(), 240)
+        self.assertEqual(Vehicle.objects.filter(seller=self.seller).count(), 120)
+
+    def test_reimport_updates_and_notifies_price_drops(self):
+        self.post_csv(self.HEADER + self.csv_row("VIN0001"))
+        vehicle = Vehicle.objects.get(vin="VIN0001")
+        Favorite.objects.create(user=CustomUser.objects.create(username="fan"), vehicle=vehicle)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_csv(self.HEADER + self.csv_row("VIN0001", price=18000))
+        self.assertEqual((response.data["created"], response.data["updated"]), (0, 1))
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.price, 18000)
+        self.assertEqual(
+            Notification.objects.filter(notification_type=Notification.NotificationType.PRICE_DROP).count(), 1
+        )
+        self.assertEqual(VehicleFeaturesMapping.objects.filter(vehicle=vehicle).count(), 2)
+
+    def test_row_errors_and_foreign_vins_are_reported(self):
+        other = CustomUser.objects.create(username="other")
+        make_vehicle(other, VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Honda"), name="Civic"
+        ), vin="TAKEN")
+        body = self.HEADER + self.csv_row("GOOD") + self.csv_row("BAD", fuel="Coal") + self.csv_row("TAKEN")
+        response = self.post_csv(body)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 2))
+        errors = {error["vin"]: error for error in response.data["errors"]}
+        self.assertEqual(errors["BAD"]["row"], 2)
+        self.assertIn("fuel_type", errors["BAD"]["errors"])
+        self.assertIn("vin", errors["TAKEN"]["errors"])
+        self.assertEqual(Vehicle.objects.get(vin="TAKEN").seller, other)
+
+    def test_out_of_range_integers_are_row_errors(self):
+        body = self.HEADER + self.csv_row("HUGE", price=10**30) + self.csv_row("GOOD")
+        body += self.csv_row("NEGATIVE").replace(",1000,", ",-5,")
+        response = self.post_csv(body)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 2))
+        errors = {error["vin"]: error["errors"] for error in response.data["errors"]}
+        self.assertEqual(set(errors["HUGE"]), {"price"})
+        self.assertEqual(set(errors["NEGATIVE"]), {"mileage"})
+        self.assertFalse(Vehicle.objects.filter(vin__in=["HUGE", "NEGATIVE"]).exists())
+
+    def test_rows_before_an_unreadable_byte_are_still_imported(self):
+        body = self.HEADER + "".join(self.csv_row(f"VIN{index:04d}") for index in range(7))
+        with mock.patch("marketplace.importer.facets.invalidate") as invalidate:
+            result = importer.import_vehicles(self.seller, BytesIO(body.encode() + b"\xff\n"), "csv", chunk_size=5)
+        self.assertEqual((result["rows"], result["created"], result["failed"]), (7, 7, 1))
+        self.assertEqual(result["errors"][0]["row"], 8)
+        self.assertIn("feed", result["errors"][0]["errors"])
+        self.assertEqual(Vehicle.objects.filter(seller=self.seller).count(), 7)
+        invalidate.assert_called_once()
+
+    def test_command_imports_ndjson(self):
+        row = {
+            "brand": "BMW", "model": "X5", "vin": "NDJSON1", "body_type": "SUV", "transmission": "AUTOMATIC",
+            "fuel_type": "DIESEL", "condition": "NEW", "mileage": 0, "price": 90000, "year": 2024,
+            "cylinders": 6, "engine_size": 3000, "doors": 5, "color": "Black", "location": "Jeddah",
+            "features": ["Sunroof"],
+        }
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as feed:
+            feed.write(json.dumps(row) + "\n" + json.dumps({**row, "vin": "NDJSON2"}) + "\n")
+        self.addCleanup(os.remove, feed.name)
+        out = StringIO()
+        call_command("import_vehicles", feed.name, seller="dealer", stdout=out)
+        self.assertIn("2 created", out.getvalue())
+        self.assertEqual(Vehicle.objects.filter(model__brand__name="BMW").count(), 2)
+
+
+class VehicleExportTests(TestCase):
+    """  Exports stream every listing with brand, model, seller and feature columns"""
+
+    def setUp(self):
+        seller = CustomUser.objects.create(username="seller")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        sunroof = VehicleFeature.objects.create(name="Sunroof")
+        self.vehicles = [make_vehicle(seller, model, vin=f"EXPORT{index}") for index in range(5)]
+        VehicleFeaturesMapping.objects.create(vehicle=self.vehicles[0], feature=sunroof)
+        self.vehicles[4].is_active = False
+        self.vehicles[4].save()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create(username="admin", is_staff=True))
+
+    def export(self, **params):
+        response = self.client.get("/api/vehicles/export/", params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_export_streams_active_listings(self):
+        response, content = self.export()
+        rows = list(csv.DictReader(content.decode().splitlines()))
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual([row["vin"] for row in rows], [f"EXPORT{index}" for index in range(4)])
+        self.assertEqual(rows[0]["brand"], "Toyota")
+        self.assertEqual(rows[0]["seller"], "seller")
+        self.assertEqual(rows[0]["features"], "Sunroof")
+
+    def test_ndjson_export_can_include_sold_listings(self):
+        _, content = self.export(export_format="ndjson", include_inactive="true")
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(rows[-1]["is_active"])
+
+    def test_export_is_admin_only(self):
+        self.client.force_authenticate(CustomUser.objects.create(username="partner"))
+        self.assertEqual(self.client.get("/api/vehicles/export/").status_code, 403)
+
+    def test_command_writes_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "vehicles.parquet")
+            call_command("export_vehicles", format="parquet", output=path, chunk_size=2, stdout=StringIO())
+            table = pq.read_table(path)
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(table.column("brand").to_pylist()[0], "Toyota")
+
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+class SellerReputationTests(TestCase):
+    """  Reputation aggregates follow review writes and ride along on listings"""
+
+    def setUp(self):
+        self.seller = CustomUser.objects.create(username="seller")
+        self.buyer = CustomUser.objects.create(username="buyer")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.vehicle = make_vehicle(self.seller, model)
+
+    def review(self, rating, **kwargs):
+        return Review.objects.create(
+            reviewer=self.buyer, reviewed_user=self.seller, vehicle=self.vehicle,
+            rating=rating, review_text="Review", **kwargs
+        )
+
+    def reputation(self):
+        return SellerReputation.objects.get(user=self.seller)
+
+    def test_create_edit_and_delete_update_aggregates(self):
+        first = self.review(5)
+        second = self.review(3)
+        self.review(1, parent_review=first)  # Replies do not count
+        reputation = self.reputation()
+        self.assertEqual((reputation.rating_count, reputation.rating_sum), (2, 8))
+        self.assertEqual(reputation.histogram, {"1": 0, "2": 0, "3": 1, "4": 0, "5": 1})
+
+        second = Review.objects.get(pk=second.pk)
+        second.rating = 4
+        second.save()
+        first.delete()
+        reputation = self.reputation()
+        self.assertEqual((reputation.rating_count, reputation.average_rating), (1, 4.0))
+        self.assertEqual(reputation.histogram["4"], 1)
+        self.assertAlmostEqual(reputation.score, 4.0)
+
+    def test_recent_reviews_weigh_more(self):
+        old = self.review(1)
+        Review.objects.filter(pk=old.pk).update(review_date=timezone.now() - timedelta(days=720))
+        self.review(5)
+        call_command("rebuild_reputation", stdout=StringIO())
+        reputation = self.reputation()
+        self.assertEqual(reputation.average_rating, 3.0)
+        self.assertGreater(reputation.score, 4.5)
+
+    def test_listing_embeds_reputation_without_extra_queries(self):
+        self.review(4)
+        client = APIClient()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/vehicles/")
+        seller = response.data["results"][0]["seller"]
+        self.assertEqual(seller["reputation"]["rating_count"], 1)
+        self.assertEqual(seller["reputation"]["average_rating"], 4.0)
+        # Joined onto the listing query, never fetched on its own
+        self.assertFalse(any('FROM "marketplace_sellerreputation"' in query["sql"] for query in queries))
+        self.assertEqual(client.get(f"/api/vehicles/{self.vehicle.pk}/").data["seller"]["reputation"]["score"], 4.0)
+
+
+class ReviewThreadTests(TestCase):
+    """  Whole review threads load in a fixed number of queries"""
+
+    def setUp(self):
+        self.seller = CustomUser.objects.create(username="seller")
+        self.buyer = CustomUser.objects.create(username="buyer")
+        model = VehicleModel.objects.create(
+            brand=VehicleBrand.objects.create(name="Toyota"), name="Corolla"
+        )
+        self.vehicle = make_vehicle(self.seller, model)
+        self.client = APIClient()
+
+    def review(self, rating, parent=None, reviewer=None):
+        return Review.objects.create(
+            reviewer=reviewer or self.buyer, reviewed_user=self.seller, vehicle=self.vehicle,
+            rating=rating, review_text=f"Rated {rating}", parent_review=parent,
+        )
+
+    def test_nested_replies_load_in_one_tree_query(self):
+        root = self.review(4)
+        reply = self.review(4, parent=root, reviewer=self.seller)
+        self.review(4, parent=reply)
+        self.review(2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/reviews/threads/", {"vehicle": self.vehicle.pk, "ordering": "-rating"})
+        self.assertEqual(len(queries), 3)  # Count, root page, recursive tree
+        first = response.data["results"][0]
+        self.assertEqual(first["id"], root.pk)
+        self.assertEqual(first["replies"][0]["reviewer"]["username"], "seller")
+        self.assertEqual(len(first["replies"][0]["replies"]), 1)
+        self.assertEqual(response.data["results"][1]["replies"], [])
+
+    def test_roots_are_paginated_and_root_selects_a_subtree(self):
+        roots = [self.review(rating) for rating in (1, 2, 3)]
+        reply = self.review(5, parent=roots[0])
+        response = self.client.get(
+            "/api/reviews/threads/", {"seller": self.seller.pk, "ordering": "rating", "page": 2, "page_size": 2}
+        )
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual([row["id"] for row in response.data["results"]], [roots[2].pk])
+        subtree = self.client.get("/api/reviews/threads/", {"root": reply.pk}).data["results"]
+        self.assertEqual([row["id"] for row in subtree], [reply.pk])
+
+
+@override_settings(LAST_SEEN_FLUSH_INTERVAL=60)
+class CachedAuthenticationTests(TestCase):
+    """  Token auth resolves users from the cache and revokes on password change"""
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear_local()
+        self.user = CustomUser.objects.create_user(username="driver", password="secret-pass")
+        self.client = APIClient()
+        self.tracker = LastSeenTracker(flush_interval=60)
+        patcher = mock.patch("marketplace.authentication.last_seen", self.tracker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tracker.stop)  # Flush while the test database still exists
+
+    def login(self):
+        response = self.client.post(
+            "/api/auth/login/", {"username": "driver", "password": "secret-pass"}, format="json"
+        )
+        return response.data["access"]
+
+    def me(self, token):
+        return self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_cached_user_skips_the_user_query(self):
+        token = self.login()
+        self.assertEqual(self.me(token).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.me(token).data["username"], "driver")
+        self.assertFalse(any("marketplace_customuser" in query["sql"] for query in queries))
+
+    def test_password_change_and_deactivation_revoke_tokens(self):
+        token = self.login()
+        self.me(token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password("new-secret")
+            self.user.save()
+        user_cache.clear_local()  # Other workers: the local TTL has passed
+        self.assertEqual(self.me(token).status_code, 401)
+
+        self.client.credentials()
+        token = self.client.post(
+            "/api/auth/login/", {"username": "driver", "password": "new-secret"}, format="json"
+        ).data["access"]
+        self.assertEqual(self.me(token).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.refresh_from_db()
+            self.user.is_active = False
+            self.user.save()
+        user_cache.clear_local()
+        self.assertEqual(self.me(token).status_code, 401)
+
+    def test_password_hash_upgrade_keeps_tokens(self):
+        token = self.login()
+        self.me(token)
+        #   A hash from a non-default hasher is rewritten on the next successful login
+        CustomUser.objects.filter(pk=self.user.pk).update(password=make_password("secret-pass", hasher="pbkdf2_sha1"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.login()
+        user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(user.token_version, self.user.token_version)
+        user_cache.clear_local()
+        self.assertEqual(self.me(token).status_code, 200)
+
+    def test_last_seen_is_written_in_batches(self):
+        token = self.login()
+        before = CustomUser.objects.get(pk=self.user.pk).last_seen
+        for _ in range(3):
+            self.me(token)
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).last_seen, before)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(len([q for q in queries if q["sql"].startswith("UPDATE")]), 1)
+        self.assertGreater(CustomUser.objects.get(pk=self.user.pk).last_seen, before)
+
+
+@override_settings(REVOCATION_SYNC_INTERVAL=0)
+class RefreshTokenRevocationTests(TestCase):
+    """  Rotated refresh tokens are revoked once and rejected from memory afterwards"""
+
+    def setUp(self):
+        revocation_store.reset()
+        self.addCleanup(revocation_store.reset)
+        CustomUser.objects.create_user(username="driver", password="secret-pass")
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post("/api/auth/refresh/", {"refresh": token}, format="json")
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        token = self.client.post(
+            "/api/auth/login/", {"username": "driver", "password": "secret-pass"}, format="json"
+        ).data["refresh"]
+        first = self.refresh(token)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(first.data["refresh"]).status_code, 200)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+    def test_unrevoked_tokens_are_checked_without_a_lookup(self):
+        revocation_store.sync(force=True)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(revocation_store.is_revoked("unknown-jti", time.time() + 3600))
+        self.assertEqual(len(queries), 1)  # Incremental sync only; no per-token query
+
+    def test_expired_entries_are_dropped_and_purged(self):
+        now = time.time()
+        revocation_store.revoke("old", now - 10)
+        revocation_store.revoke("current", now + 3600)
+        revocation_store.sync(force=True)
+        self.assertTrue(revocation_store.is_revoked("current", now + 3600))
+        self.assertTrue(all(bucket >= revocation_store.bucket(now) for bucket in revocation_store.buckets))
+        self.assertEqual(RevokedToken.objects.count(), 2)  # Rows are left to the periodic command
+
+        out = StringIO()
+        call_command("prune_revoked_tokens", stdout=out)
+        self.assertIn("Deleted 1 expired", out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["current"])
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        values = [f"jti-{index}" for index in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(REPLICA_DATABASES=["replica_0"])
+class ReplicaRoutingTests(TestCase):
+    """  Catalog reads go to replicas, except right after the user's own writes"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create(username="seller")
+
+    def test_router_uses_replicas_only_inside_replica_reads(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Vehicle))
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Vehicle), "replica_0")
+        self.assertEqual(router.db_for_write(Vehicle), "default")
+        self.assertFalse(router.allow_migrate("replica_0", "marketplace"))
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.client.force_authenticate(self.user)
+        # The test database has no replica alias, so "choose" the primary and count the calls.
+        with mock.patch("marketplace.replicas.choose_replica", return_value="default") as choose:
+            self.client.get("/api/vehicles/")
+            self.assertTrue(choose.called)
+            choose.reset_mock()
+            response = self.client.post("/api/brands/", {"name": "Toyota"}, format="json")
+            self.assertEqual(response.status_code, 201)
+            self.client.get("/api/vehicles/")
+            self.assertFalse(choose.called)
+            cache.clear()  # The pin expired
+            self.client.get("/api/vehicles/")
+            self.assertTrue(choose.called)
+        self.assertIsNone(ReplicaRouter().db_for_read(Vehicle))
+
+    def test_cached_responses_are_filled_from_the_primary(self):
+        with mock.patch("marketplace.replicas.choose_replica", return_value="default") as choose:
+            self.client.get("/api/brands/")
+            self.client.get("/api/vehicles/")  # Anonymous vehicle lists are cached too
+            self.assertFalse(choose.called)
+
+
+class BenchmarkApiCommandTests(TestCase):
+    """  The API benchmark drives every endpoint successfully and leaves no rows behind"""
+
+    def test_benchmark_writes_comparable_results(self):
+        output = os.path.join(tempfile.mkdtemp(), "results.json")
+        scale = [
+            "--users", "6", "--vehicles", "5", "--reviews", "5", "--favorites", "5",
+            "--notifications", "5", "--chats", "2", "--messages-per-chat", "2",
+        ]
+        call_command("benchmark_api", *scale, "--requests", "1", "--warmup", "0", "--output", output, stdout=StringIO())
+        with open(output) as file:
+            results = json.load(file)
+        endpoints = results["endpoints"]
+        self.assertIn("auth.login", endpoints)
+        self.assertIn("auth.refresh", endpoints)
+        for prefix in ("vehicles", "brands", "models", "favorites", "reviews", "chats", "messages", "notifications", "users", "uploads"):
+            self.assertTrue(any(name.startswith(prefix + ".") for name in endpoints), prefix)
+        self.assertEqual([name for name, row in endpoints.items() if row["errors"]], [])
+        self.assertEqual(endpoints["brands.list"]["requests"], 1)
+        self.assertFalse(Vehicle.objects.exists())
+        self.assertFalse(CustomUser.objects.exists())
+
+        out = StringIO()
+        call_command(
+            "benchmark_api", *scale, "--requests", "1", "--warmup", "0",
+            "--endpoint", "brands.list", "--compare", output, stdout=out,
+        )
+        self.assertIn("Compared with", out.getvalue())
+
+
+class MetricsTests(TestCase):
+    """  Per-view request metrics, the /metrics endpoint and the slow-query log"""
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.client = APIClient()
+        brand = VehicleBrand.objects.create(name="Toyota")
+        VehicleModel.objects.create(brand=brand, name="Camry")
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("view",), (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(("home",), value)
+        lines = list(histogram.samples())
+        self.assertEqual(
+            lines,
+            [
+                'latency_seconds_bucket{view="home",le="0.1"} 2',
+                'latency_seconds_bucket{view="home",le="1"} 3',
+                'latency_seconds_bucket{view="home",le="+Inf"} 4',
+                'latency_seconds_sum{view="home"} 5.65',
+                'latency_seconds_count{view="home"} 4',
+            ],
+        )
+
+    def test_requests_are_recorded_per_view_and_action(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get("/api/models/").status_code, 200)
+        labels = ("VehicleModelViewSet", "list")
+        self.assertEqual(registry.duration.count(labels), 2)
+        self.assertEqual(registry.requests.value((*labels, "GET", "200")), 2)
+        self.assertGreater(registry.db_queries.total(labels), 0)
+        self.assertGreater(registry.db_time.total(labels), 0)
+        self.assertGreater(registry.serialization.total(labels), 0)
+        self.assertGreater(registry.response_size.total(labels), 0)
+
+        with self.settings(METRICS_TOKEN="scrape-secret"):
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_requests_total{view="VehicleModelViewSet",action="list",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_db_queries_count{view="VehicleModelViewSet",action="list"} 2', body)
+
+    def test_unmatched_paths_share_one_label(self):
+        self.client.get("/api/no-such-endpoint/")
+        self.assertEqual(registry.duration.count(("unmatched", "")), 1)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_metrics_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_endpoint_is_hidden_without_a_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+        with self.settings(DEBUG=True, METRICS_ENABLED=False):
+            self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(SLOW_QUERY_LOG=True, SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_logged_with_sql_and_stack(self):
+        with self.assertLogs("marketplace.slow_queries", level="WARNING") as logs:
+            self.client.get("/api/models/")
+        self.assertIn("VehicleModelViewSet.list", logs.output[0])
+        self.assertIn("marketplace_vehiclemodel", logs.output[0])
+        self.assertIn("Stack (most recent call last)", logs.output[0])
+        self.assertGreater(registry.slow_queries.value(("VehicleModelViewSet", "list")), 0)
@@ -0,0 +1,251 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, UnidentifiedImageError
+
+from marketplace.models import ImageUpload
+from marketplace.models.vehicle import VehicleImage
+
+
+BLOB_ROOT = "vehicle_images/blobs"
+READ_SIZE = 64 * 1024  #   Bytes held in memory while streaming a chunk to disk
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "AVIF": "avif"}
+
+
+class UploadError(Exception):
+    """  Rejected chunk or completion; `offset` is the server-side resume point"""
+
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.offset = offset
+
+
+def max_upload_size():
+    return getattr(settings, "IMAGE_UPLOAD_MAX_SIZE", 25 * 1024 * 1024)
+
+
+def temp_dir():
+    root = settings.FILE_UPLOAD_TEMP_DIR or tempfile.gettempdir()
+    path = os.path.join(root, "vehicle_uploads")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def temp_path(upload):
+    return os.path.join(temp_dir(), f"{upload.pk}.part")
+
+
+def blob_path(content_hash, extension):
+    """  Content-addressed: the same bytes are stored once however often they are uploaded"""
+    return f"{BLOB_ROOT}/{content_hash[:2]}/{content_hash}.{extension}"
+
+
+#   Running SHA-256 per upload, kept while chunks arrive in order on this process.
+#   A resume on another worker simply rehashes the part file on completion.
+#   Entries idle for HASHER_TTL seconds (abandoned uploads) are dropped.
+HASHER_TTL = 60 * 60
+_hashers = {}  # upload id -> (offset, hasher, last used)
+_hashers_lock = threading.Lock()
+
+
+def _expire_hashers(now):
+    for upload_id in [key for key, state in _hashers.items() if now - state[2] > HASHER_TTL]:
+        del _hashers[upload_id]
+
+
+def _advance_hash(upload_id, offset, data):
+    now = time.monotonic()
+    with _hashers_lock:
+        _expire_hashers(now)
+        state = _hashers.get(upload_id)
+        if offset == 0:
+            state = (0, hashlib.sha256(), now)
+        if state is None or state[0] != offset:
+            _hashers.pop(upload_id, None)
+            return
+        state[1].update(data)
+        _hashers[upload_id] = (offset + len(data), state[1], now)
+
+
+def _final_hash(upload, path):
+    with _hashers_lock:
+        state = _hashers.pop(upload.pk, None)
+    if state is not None and state[0] == upload.received:
+        return state[1].hexdigest()
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def check_chunk(upload, offset, length):
+    if upload.status != ImageUpload.Status.PENDING:
+        raise UploadError("Upload is already complete.", upload.received)
+    if offset != upload.received:
+        raise UploadError("Offset does not match the bytes received so far.", upload.received)
+    if length is None or length <= 0 or upload.received + length > upload.size:
+        raise UploadError("Chunk length exceeds the declared upload size.", upload.received)
+
+
+def append_chunk(upload_id, user, offset, stream, length):
+    """
+    Stream `length` bytes from `stream` onto the upload's part file at `offset`.
+    - The request body is received into a private staging file outside any
+      transaction, so a slow client never holds a database lock.
+    - Only then is the row locked, briefly, to re-check the offset and append
+      the staged bytes; concurrent retries of the same chunk cannot interleave.
+    A mismatched offset raises `UploadError` carrying the offset to resume from.
+    """
+    check_chunk(ImageUpload.objects.get(pk=upload_id, user=user), offset, length)
+
+    staging = tempfile.NamedTemporaryFile(dir=temp_dir(), prefix=f"{upload_id}.", suffix=".chunk", delete=False)
+    try:
+        written = 0
+        with staging:
+            while written < length:
+                block = stream.read(min(READ_SIZE, length - written))
+                if not block:
+                    break
+                staging.write(block)
+                written += len(block)
+
+        with transaction.atomic():
+            upload = ImageUpload.objects.select_for_update().get(pk=upload_id, user=user)
+            check_chunk(upload, offset, length)
+            with open(staging.name, "rb") as chunk, open(temp_path(upload), "r+b" if offset else "wb") as part:
+                part.seek(offset)
+                part.truncate()  # Drop the tail of an earlier, interrupted chunk
+                position = offset
+                for block in iter(lambda: chunk.read(READ_SIZE), b""):
+                    part.write(block)
+                    _advance_hash(upload.pk, position, block)
+                    position += len(block)
+            upload.received = offset + written
+            upload.save(update_fields=["received"])
+    finally:
+        os.remove(staging.name)
+    return upload
+
+
+def prune_abandoned(older_than):
+    """
+    Discard pending uploads created before `older_than` (a datetime) and remove
+    part/staging files left in the temp directory for longer than that.
+    Returns `(uploads, files)` removed.
+    """
+    uploads = 0
+    for upload in ImageUpload.objects.filter(status=ImageUpload.Status.PENDING, created_at__lt=older_than):
+        discard(upload)
+        uploads += 1
+    files = 0
+    cutoff = older_than.timestamp()
+    with os.scandir(temp_dir()) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith((".part", ".chunk")) and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                files += 1
+    with _hashers_lock:
+        _expire_hashers(time.monotonic())
+    return uploads, files
+
+
+def image_extension(path):
+    try:
+        with Image.open(path) as image:
+            image.verify()
+            image_format = image.format
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise UploadError("Uploaded file is not a valid image.")
+    if image_format not in EXTENSIONS:
+        raise UploadError(f"Unsupported image format: {image_format}.")
+    return EXTENSIONS[image_format]
+
+
+def complete(upload_id, user):
+    """
+    Finish an upload: hash the bytes, then either point at an existing blob with
+    the same content (the part file is discarded) or move the part file into
+    content-addressed storage. Returns `(upload, deduplicated)`.
+    """
+    with transaction.atomic():
+        upload = ImageUpload.objects.select_for_update().get(pk=upload_id, user=user)
+        if upload.status == ImageUpload.Status.COMPLETE:
+            return upload, False
+        if upload.received != upload.size:
+            raise UploadError("Upload is incomplete.", upload.received)
+
+        path = temp_path(upload)
+        content_hash = _final_hash(upload, path)
+        existing = (
+            VehicleImage.objects.filter(content_hash=content_hash).values_list("image", flat=True).first()
+            or ImageUpload.objects.filter(content_hash=content_hash, status=ImageUpload.Status.COMPLETE)
+            .exclude(blob="")
+            .values_list("blob", flat=True)
+            .first()
+        )
+        deduplicated = bool(existing)
+        if deduplicated:
+            blob = existing
+        else:
+            blob = blob_path(content_hash, image_extension(path))
+            if default_storage.exists(blob):
+                deduplicated = True
+            else:
+                with open(path, "rb") as part:
+                    blob = default_storage.save(blob, File(part))  # Copied in chunks
+        os.remove(path)
+
+        upload.content_hash = content_hash
+        upload.blob = blob
+        upload.status = ImageUpload.Status.COMPLETE
+        upload.save(update_fields=["content_hash", "blob", "status"])
+    return upload, deduplicated
+
+
+def attach(vehicle, uploads):
+    """
+    Create one `VehicleImage` per completed upload in a single transaction.
+    Images whose content already has variants reuse them, so only genuinely
+    new pictures are queued for processing. The upload sessions are consumed.
+    """
+    hashes = [upload.content_hash for upload in uploads]
+    known_variants = dict(
+        VehicleImage.objects.filter(content_hash__in=hashes)
+        .exclude(variants={})
+        .values_list("content_hash", "variants")
+    )
+    with transaction.atomic():
+        images = [
+            VehicleImage.objects.create(
+                vehicle=vehicle,
+                image=upload.blob,
+                content_hash=upload.content_hash,
+                variants=known_variants.get(upload.content_hash, {}),
+            )
+            for upload in uploads
+        ]
+        ImageUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    return images
+
+
+def discard(upload):
+    """  Cancel a pending upload and remove its part file"""
+    if upload.status == ImageUpload.Status.PENDING:
+        try:
+            os.remove(temp_path(upload))
+        except FileNotFoundError:
+            pass
+    with _hashers_lock:
+        _hashers.pop(upload.pk, None)
+    upload.delete()
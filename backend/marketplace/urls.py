@@ -8,6 +8,7 @@ from marketplace.views.message_views import MessageViewSet
 from marketplace.views.model_views import VehicleModelViewSet
 from marketplace.views.notification_views import NotificationViewSet
 from marketplace.views.review_views import ReviewViewSet
+from marketplace.views.upload_views import ImageUploadViewSet
 from marketplace.views.user_views import UserViewSet
 from marketplace.views.vehicle_views import VehicleViewSet
 
@@ -22,6 +23,7 @@ router.register(r'chats', ChatViewSet)
 router.register(r'messages', MessageViewSet)
 router.register(r'notifications', NotificationViewSet)
 router.register(r'users', UserViewSet)
+router.register(r'uploads', ImageUploadViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
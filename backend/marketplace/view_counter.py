@@ -0,0 +1,88 @@
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, When
+
+from marketplace.models import Vehicle
+from marketplace.write_behind import WriteBehindBuffer
+
+
+FLUSH_BATCH_SIZE = 500
+
+
+class ViewCounter(WriteBehindBuffer):
+    """
+    Write-behind counter for `Vehicle.views`.
+    - `record` only touches an in-process buffer, so a detail hit costs no write.
+    - `flush` merges buffered hits into one `UPDATE ... CASE` per batch of vehicles.
+    - A daemon thread flushes every `VIEW_COUNTER_FLUSH_INTERVAL` seconds and
+      once more at interpreter exit, so a graceful shutdown loses nothing.
+    - Recent hits are also kept in time buckets to rank trending vehicles.
+    """
+
+    flush_interval_setting = "VIEW_COUNTER_FLUSH_INTERVAL"
+    description = "vehicle view counts"
+
+    def __init__(self, flush_interval=None, trending_window=None, trending_buckets=12):
+        super().__init__(flush_interval)
+        self._trending_window = trending_window
+        self.trending_buckets = trending_buckets
+        self.pending = Counter()
+        self.recent = deque()  # (bucket_start, Counter) pairs, oldest first
+
+    @property
+    def trending_window(self):
+        if self._trending_window is not None:
+            return self._trending_window
+        return getattr(settings, "VIEW_COUNTER_TRENDING_WINDOW", 60 * 60)
+
+    def record(self, vehicle_id, count=1):
+        now = time.time()
+        bucket_size = self.trending_window / self.trending_buckets
+        bucket_start = now - now % bucket_size
+        with self.lock:
+            self.pending[vehicle_id] += count
+            if not self.recent or self.recent[-1][0] != bucket_start:
+                self.recent.append((bucket_start, Counter()))
+            self.recent[-1][1][vehicle_id] += count
+            self._expire(now)
+        self.buffered()
+
+    def flush(self):
+        """  Apply buffered increments; returns the number of vehicles updated"""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+        if not pending:
+            return 0
+        items = sorted(pending.items())  # Stable lock order across workers
+        try:
+            with transaction.atomic():
+                for offset in range(0, len(items), FLUSH_BATCH_SIZE):
+                    batch = items[offset : offset + FLUSH_BATCH_SIZE]
+                    Vehicle.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                        views=F("views") + Case(*[When(pk=pk, then=count) for pk, count in batch])
+                    )
+        except Exception:
+            # Put the increments back so the next flush retries them.
+            with self.lock:
+                self.pending.update(pending)
+            raise
+        return len(items)
+
+    def trending(self, limit=10):
+        """  `(vehicle_id, views)` pairs with the most hits in the trending window"""
+        with self.lock:
+            self._expire(time.time())
+            totals = Counter()
+            for _, bucket in self.recent:
+                totals.update(bucket)
+        return totals.most_common(limit)
+
+    def _expire(self, now):
+        while self.recent and self.recent[0][0] <= now - self.trending_window:
+            self.recent.popleft()
+
+
+view_counter = ViewCounter()
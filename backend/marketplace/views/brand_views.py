@@ -1,14 +1,17 @@
 from rest_framework import viewsets, permissions
+from marketplace.replicas import ReplicaReadMixin
+from marketplace.response_cache import CachedResponseMixin
 from marketplace.models import VehicleBrand
 from marketplace.serializers import VehicleBrandSerializer
 
 #   ViewSet for Vehicle Brands
-class VehicleBrandViewSet(viewsets.ModelViewSet):
+class VehicleBrandViewSet(ReplicaReadMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     VehicleBrandViewSet allows:
     - Public retrieval of brands.
     - Admin users can add/edit/delete brands.
     """
-    queryset = VehicleBrand.objects.all()
+    queryset = VehicleBrand.objects.order_by("name")
     serializer_class = VehicleBrandSerializer
     permission_classes = [permissions.AllowAny]  # Public access
+    cache_scope = "brands"  # Cached list/retrieve with ETag support
@@ -1,6 +1,13 @@
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from marketplace import inbox
+from marketplace.message_sync import sync_messages
 from marketplace.models import Chat
-from marketplace.serializers import ChatSerializer
+from marketplace.serializers import ChatInboxSerializer, ChatSerializer
 
 #   ViewSet for Managing Chat
 class ChatViewSet(viewsets.ModelViewSet):
@@ -14,8 +21,38 @@ class ChatViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """  Return only chats involving the authenticated user"""
-        return Chat.objects.filter(buyer=self.request.user) | Chat.objects.filter(seller=self.request.user)
+        user = self.request.user
+        return Chat.objects.filter(Q(buyer=user) | Q(seller=user)).select_related(
+            "buyer", "seller", "vehicle__seller__reputation", "vehicle__model__brand"
+        ).prefetch_related("vehicle__images").order_by("-created_at")
 
     def perform_create(self, serializer):
         """  Auto-assign buyer when a chat is created"""
-        serializer.save(buyer=self.request.user)
+        with transaction.atomic():  # Chat and its inbox rows commit together
+            serializer.save(buyer=self.request.user)
+
+    @action(detail=True, methods=["GET"])
+    def messages(self, request, pk=None):
+        """  Messages after `?after=<id>` for either participant; `?timeout=` long-polls"""
+        chat = self.get_object()
+        try:
+            after = int(request.query_params.get("after", 0))
+            limit = int(request.query_params.get("limit", 100))
+            timeout = float(request.query_params.get("timeout", 0))
+        except ValueError:
+            raise ValidationError("after, limit and timeout must be numbers.")
+        return Response(sync_messages(chat.pk, after, limit=limit, timeout=timeout))
+
+    @action(detail=False, methods=["GET"])
+    def inbox(self, request):
+        """  Inbox: chats by recent activity with last message and unread count"""
+        queryset = inbox.inbox_for(request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = ChatInboxSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["POST"])
+    def read(self, request, pk=None):
+        """  Reset the authenticated user's unread counter for this chat"""
+        inbox.mark_read(self.get_object(), request.user)
+        return Response({"message": "Chat marked as read."})
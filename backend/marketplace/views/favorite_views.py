@@ -16,7 +16,12 @@ class FavoriteViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """  Return only the authenticated user's favorite vehicles"""
-        return Favorite.objects.filter(user=self.request.user)
+        return (
+            Favorite.objects.filter(user=self.request.user)
+            .select_related("user", "vehicle__seller__reputation", "vehicle__model__brand")
+            .prefetch_related("vehicle__images")
+            .order_by("-created_at")
+        )
 
     def perform_create(self, serializer):
         """  Auto-assigns the user when adding a favorite"""
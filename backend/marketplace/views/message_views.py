@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import viewsets, permissions
 from marketplace.models import Message
 from marketplace.serializers import MessageSerializer
@@ -14,8 +15,9 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """  Return messages sent by the authenticated user"""
-        return Message.objects.filter(sender=self.request.user)
+        return Message.objects.filter(sender=self.request.user).select_related("sender").order_by("timestamp")
 
     def perform_create(self, serializer):
         """  Auto-assign sender when a message is created"""
-        serializer.save(sender=self.request.user)
+        with transaction.atomic():  # Message and inbox update commit together
+            serializer.save(sender=self.request.user)
@@ -0,0 +1,28 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from marketplace import metrics
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+#   Prometheus scrape endpoint (plain Django view: no DRF auth or content negotiation)
+@require_GET
+def metrics_view(request):
+    """
+    Request metrics of this process, behind `Authorization: Bearer <METRICS_TOKEN>`.
+    Without a token the endpoint only exists under DEBUG, so a deployment
+    never exposes per-view traffic by accident.
+    """
+    token = metrics.metrics_token()
+    if not metrics.metrics_enabled() or not (token or settings.DEBUG):
+        raise Http404
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+            return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(metrics.registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,14 +1,17 @@
 from rest_framework import viewsets, permissions
+from marketplace.replicas import ReplicaReadMixin
+from marketplace.response_cache import CachedResponseMixin
 from marketplace.models import VehicleModel
 from marketplace.serializers import VehicleModelSerializer
 
 #   ViewSet for Vehicle Models
-class VehicleModelViewSet(viewsets.ModelViewSet):
+class VehicleModelViewSet(ReplicaReadMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     VehicleModelViewSet allows:
     - Public retrieval of vehicle models.
     - Admin users can add/edit/delete models.
     """
-    queryset = VehicleModel.objects.all()
+    queryset = VehicleModel.objects.select_related("brand").order_by("brand__name", "name")
     serializer_class = VehicleModelSerializer
     permission_classes = [permissions.AllowAny]  # Public access
+    cache_scope = "models"  # Cached list/retrieve with ETag support
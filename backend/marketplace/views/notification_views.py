@@ -1,4 +1,5 @@
 from rest_framework import viewsets, permissions
+from marketplace import notifications
 from marketplace.models import Notification
 from marketplace.serializers import NotificationSerializer
 from rest_framework.response import Response
@@ -19,8 +20,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """  Retrieves only the authenticated user's notifications"""
-        return Notification.objects.filter(user=self.request.user).order_by(
-            "-created_at"
+        return (
+            Notification.objects.filter(user=self.request.user)
+            .select_related("user")
+            .order_by("-created_at")
         )
 
     @action(detail=False, methods=["POST"])
@@ -29,4 +32,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Notification.objects.filter(user=request.user, is_read=False).update(
             is_read=True
         )
+        notifications.reset_unread(request.user.pk)
         return Response({"message": "All notifications marked as read."})
+
+    @action(detail=False, methods=["GET"])
+    def unread_count(self, request):
+        """  Unread badge count, served from a cached counter"""
+        return Response({"unread_count": notifications.unread_count(request.user.pk)})
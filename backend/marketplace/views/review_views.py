@@ -1,6 +1,17 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
 from marketplace.models import Review
-from marketplace.serializers import ReviewSerializer
+from marketplace.review_threads import ORDERINGS, fetch_threads
+from marketplace.serializers import ReviewSerializer, ReviewThreadSerializer
+
+#   Pagination for top-level reviews in threads
+class ReviewThreadPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+
 
 #   ViewSet for Managing Reviews
 class ReviewViewSet(viewsets.ModelViewSet):
@@ -8,6 +19,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     ReviewViewSet allows users to:
     - Submit reviews for vehicles they have purchased.
     - View reviews submitted by other users.
+    - Read whole review threads (reviews with their nested replies).
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
@@ -15,8 +27,47 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """  Return reviews written by the authenticated user"""
-        return Review.objects.filter(reviewer=self.request.user)
+        return (
+            Review.objects.filter(reviewer=self.request.user)
+            .select_related("reviewer", "reviewed_user", "vehicle__seller__reputation", "vehicle__model__brand")
+            .prefetch_related("vehicle__images")
+            .order_by("-review_date")
+        )
 
     def perform_create(self, serializer):
         """  Auto-assign reviewer when a review is created"""
         serializer.save(reviewer=self.request.user)
+
+    @action(detail=False, methods=["GET"], permission_classes=[permissions.AllowAny])
+    def threads(self, request):
+        """  Review threads for `?vehicle=`, `?seller=` or a single `?root=` review
+
+        Top-level reviews are paginated and ordered by `?ordering=` (review_date
+        or rating, `-` for descending); each page's replies, at any depth, are
+        loaded with one recursive query and nested under their parents.
+        """
+        params = request.query_params
+        ordering = params.get("ordering", "-review_date")
+        if ordering not in ORDERINGS:
+            return Response(
+                {"detail": f"ordering must be one of {', '.join(ORDERINGS)}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            if "root" in params:
+                roots = Review.objects.filter(pk=int(params["root"]))
+            elif "vehicle" in params:
+                roots = Review.objects.filter(vehicle_id=int(params["vehicle"]), parent_review__isnull=True)
+            elif "seller" in params:
+                roots = Review.objects.filter(reviewed_user_id=int(params["seller"]), parent_review__isnull=True)
+            else:
+                return Response(
+                    {"detail": "Pass vehicle, seller or root."}, status=status.HTTP_400_BAD_REQUEST
+                )
+        except ValueError:
+            return Response({"detail": "Ids must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        root_ids = roots.order_by(ordering, "-id").values_list("id", flat=True)
+        paginator = ReviewThreadPagination()
+        page = paginator.paginate_queryset(root_ids, request, view=self)
+        serializer = ReviewThreadSerializer(fetch_threads(page), many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
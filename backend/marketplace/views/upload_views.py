@@ -0,0 +1,77 @@
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from marketplace import uploads
+from marketplace.models import ImageUpload
+from marketplace.serializers import ImageUploadSerializer
+
+
+#   ViewSet for Chunked, Resumable Image Uploads
+class ImageUploadViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    ImageUploadViewSet allows users to:
+    - Start an upload by declaring its filename and size.
+    - Send the bytes in any number of chunks (`PATCH .../chunk/` with an
+      `Upload-Offset` header); each chunk is streamed straight to disk.
+    - Resume after a failure: `GET` returns how many bytes were received.
+    - Complete the upload; identical content is stored only once.
+    Completed uploads are attached to a listing via `POST /vehicles/{id}/images/`.
+    """
+
+    queryset = ImageUpload.objects.all()
+    serializer_class = ImageUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """  Users only see their own uploads"""
+        return ImageUpload.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
+
+    def upload_error(self, error, status_code=status.HTTP_400_BAD_REQUEST):
+        data = {"detail": str(error)}
+        headers = {}
+        if error.offset is not None:
+            data["received"] = error.offset
+            headers["Upload-Offset"] = str(error.offset)
+        return Response(data, status=status_code, headers=headers)
+
+    @action(detail=True, methods=["PATCH"])
+    def chunk(self, request, pk=None):
+        """  Append the raw request body at `Upload-Offset` (defaults to 0)"""
+        upload = self.get_object()
+        try:
+            offset = int(request.headers.get("Upload-Offset", 0))
+            length = int(request.headers.get("Content-Length") or 0)
+        except ValueError:
+            return Response({"detail": "Invalid Upload-Offset header."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            upload = uploads.append_chunk(upload.pk, request.user, offset, request.stream, length)
+        except uploads.UploadError as error:
+            return self.upload_error(error, status.HTTP_409_CONFLICT)
+        return Response(
+            {"received": upload.received, "size": upload.size},
+            headers={"Upload-Offset": str(upload.received)},
+        )
+
+    @action(detail=True, methods=["POST"])
+    def complete(self, request, pk=None):
+        """  Verify and store the uploaded image, deduplicating identical content"""
+        upload = self.get_object()
+        try:
+            upload, deduplicated = uploads.complete(upload.pk, request.user)
+        except uploads.UploadError as error:
+            return self.upload_error(error)
+        data = self.get_serializer(upload).data
+        data["deduplicated"] = deduplicated
+        return Response(data)
@@ -1,10 +1,24 @@
-from rest_framework import viewsets, permissions, filters
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, permissions, filters, status
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.decorators import action
-from marketplace.models import Vehicle
-from marketplace.serializers import VehicleSerializer
+from marketplace import exporter, importer, uploads
+from marketplace.facets import get_facets
+from marketplace.models import ImageUpload, Vehicle
+from marketplace.replicas import ReplicaReadMixin
+from marketplace.response_cache import CachedResponseMixin
+from marketplace.search import search_vehicle_ids
+from marketplace.serializers import AttachImagesSerializer, VehicleImageSerializer, VehicleSerializer
+from marketplace.view_counter import view_counter
 
 
 #   Custom Pagination for Vehicles
@@ -14,8 +28,147 @@ class CustomPagination(PageNumberPagination):
     max_page_size = 50  # Maximum limit
 
 
+#   Keyset Pagination for Vehicles
+class VehicleKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over the vehicle ordering fields.
+    - Orders by the requested field plus `id` as a unique tiebreaker.
+    - Seeks past the last row seen instead of using OFFSET, so deep pages
+      cost the same as the first one.
+    - Skips the COUNT(*) query; use the page-number mode when totals are needed.
+    """
+
+    page_size = CustomPagination.page_size
+    page_size_query_param = CustomPagination.page_size_query_param
+    max_page_size = CustomPagination.max_page_size
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    keyset_fields = ["price", "year", "mileage", "created_at"]
+    default_ordering = "-created_at"
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        field = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["reverse"])
+        if cursor is not None:
+            # Walking backwards flips the comparison as well as the order.
+            after = descending != reverse
+            lookup = "lt" if after else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{lookup}": cursor["value"]})
+                | Q(**{field: cursor["value"], f"id__{lookup}": cursor["id"]})
+            )
+
+        order_descending = descending != reverse
+        prefix = "-" if order_descending else ""
+        queryset = queryset.order_by(f"{prefix}{field}", f"{prefix}id")
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.field = field
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = has_more if reverse else cursor is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        """  Use the first requested ordering term the keyset supports"""
+        params = request.query_params.get(self.ordering_query_param, "")
+        for term in (param.strip() for param in params.split(",")):
+            if term.lstrip("-") in self.keyset_fields:
+                return term
+        return self.default_ordering
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            decoded = {
+                "value": self.cursor_value(cursor["value"]),
+                "id": int(cursor["id"]),
+                "reverse": bool(cursor.get("reverse")),
+            }
+        except (KeyError, TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if cursor.get("ordering") != self.ordering:
+            # The cursor was issued for a different sort order.
+            raise NotFound(self.invalid_cursor_message)
+        return decoded
+
+    def cursor_value(self, value):
+        """  The cursor's sort value as the ordering field's Python type; the cursor is client input"""
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise TypeError("Cursor value must be a scalar.")
+        value = Vehicle._meta.get_field(self.ordering.lstrip("-")).to_python(value)
+        if value is None:
+            raise ValueError("Cursor value is missing.")
+        return value
+
+    def encode_cursor(self, row, reverse):
+        value = getattr(row, self.field)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        payload = {"ordering": self.ordering, "value": value, "id": row.pk, "reverse": reverse}
+        encoded = b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded.decode("ascii"))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
 #   Vehicle ViewSet - Handles all operations related to vehicles
-class VehicleViewSet(viewsets.ModelViewSet):
+class VehicleViewSet(ReplicaReadMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     VehicleViewSet allows users to:
     - Retrieve all public vehicle listings.
@@ -23,13 +176,15 @@ class VehicleViewSet(viewsets.ModelViewSet):
     - Update or delete a vehicle (only for the owner).
     - Filter, sort, and paginate vehicle listings.
     - Joins seller and brand in one query.
-    - Prefetch related images & features
+    - Prefetch related images
+    - Serves the anonymous listing from the response cache (ETag / 304).
+    - Uncached reads go to a replica unless the user wrote a moment ago.
     """
 
     queryset = (
         Vehicle.objects.filter(is_active=True)
-        .select_related("seller", "model__brand")
-        .prefetch_related("images", "vehicle_features")
+        .select_related("seller__reputation", "model__brand")
+        .prefetch_related("images")  # VehicleSerializer renders no features, so none are prefetched
     )
     serializer_class = VehicleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -44,15 +199,82 @@ class VehicleViewSet(viewsets.ModelViewSet):
         "price",
     ]
     ordering_fields = ["price", "year", "mileage"]
+    ordering = ["-created_at", "-id"]  # Stable default order for pagination
     pagination_class = CustomPagination
+    keyset_pagination_class = VehicleKeysetPagination
+    cache_scope = "vehicles"
+    cache_actions = ("list",)
+    cache_anonymous_only = True
+
+    @property
+    def paginator(self):
+        """  Use keyset pagination for `?pagination=cursor` or when a cursor is given"""
+        if not hasattr(self, "_paginator"):
+            request = getattr(self, "request", None)
+            params = request.query_params if request is not None else {}
+            use_keyset = (
+                params.get("pagination") == "cursor"
+                or self.keyset_pagination_class.cursor_query_param in params
+            )
+            pagination_class = (
+                self.keyset_pagination_class if use_keyset else self.pagination_class
+            )
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
 
     def perform_create(self, serializer):
         """  Assigns the authenticated user as the seller when a vehicle is created"""
         serializer.save(seller=self.request.user)
 
     def get_queryset(self):
-        """  Return all public vehicles (does not filter by authenticated user)"""
-        return Vehicle.objects.filter(is_active=True)
+        """  Return all public vehicles (does not filter by authenticated user)
+
+        Builds on the class-level queryset so seller, model, brand and images
+        are loaded with a fixed number of queries regardless of page size.
+        """
+        return super().get_queryset()
+
+    def retrieve(self, request, *args, **kwargs):
+        """  Return a vehicle and count the view (buffered, flushed in batches)"""
+        response = super().retrieve(request, *args, **kwargs)
+        # The payload may omit `id` (`?fields=`); a 404 has already been raised above.
+        view_counter.record(int(self.kwargs["pk"]))
+        return response
+
+    @action(detail=False, methods=["GET"])
+    def trending(self, request):
+        """  Most viewed vehicles over the recent trending window"""
+        ranked = view_counter.trending(limit=CustomPagination.max_page_size)
+        vehicles = self.get_queryset().in_bulk([pk for pk, _ in ranked])
+        ranked = [(pk, hits) for pk, hits in ranked if pk in vehicles]
+        ranked = ranked[: self.paginator.get_page_size(request)]
+        data = self.get_serializer([vehicles[pk] for pk, _ in ranked], many=True).data
+        for row, (_, hits) in zip(data, ranked):
+            row["recent_views"] = hits
+        return Response(data)
+
+    @action(detail=False, methods=["GET"])
+    def search(self, request):
+        """  Full-text search over listings (`?q=`), most relevant first"""
+        ranked_ids = search_vehicle_ids(request.query_params.get("q", ""))
+        paginator = self.pagination_class()
+        page_ids = paginator.paginate_queryset(ranked_ids, request, view=self)
+        vehicles = self.get_queryset().in_bulk(page_ids)
+        serializer = self.get_serializer(
+            [vehicles[pk] for pk in page_ids if pk in vehicles], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["GET"])
+    def facets(self, request):
+        """  Counts per brand, fuel type, transmission, body type, condition and price/year bucket"""
+        queryset = self.filter_queryset(Vehicle.objects.filter(is_active=True))
+        params = {
+            key: value
+            for key, value in request.query_params.items()
+            if key in self.filterset_fields
+        }
+        return Response(get_facets(queryset, params))
 
     @action(detail=True, methods=["POST"])
     def mark_sold(self, request, pk=None):
@@ -61,3 +283,73 @@ class VehicleViewSet(viewsets.ModelViewSet):
         vehicle.is_active = False
         vehicle.save()
         return Response({"message": "Vehicle marked as sold."})
+
+    @action(detail=True, methods=["POST"])
+    def images(self, request, pk=None):
+        """  Attach a batch of completed uploads to the listing (seller only)"""
+        vehicle = self.get_object()
+        if vehicle.seller_id != request.user.pk:
+            raise PermissionDenied("Only the seller can add images to this vehicle.")
+        serializer = AttachImagesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload_ids = list(dict.fromkeys(serializer.validated_data["uploads"]))
+        completed = ImageUpload.objects.filter(
+            pk__in=upload_ids, user=request.user, status=ImageUpload.Status.COMPLETE
+        ).in_bulk()
+        missing = [str(pk) for pk in upload_ids if pk not in completed]
+        if missing:
+            return Response(
+                {"uploads": missing, "detail": "Unknown or incomplete uploads."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        images = uploads.attach(vehicle, [completed[pk] for pk in upload_ids])
+        data = VehicleImageSerializer(images, many=True, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["POST"], url_path="import")
+    def import_feed(self, request):
+        """  Upsert the seller's listings by VIN from a CSV, JSON or NDJSON feed
+
+        Send the feed as the request body (Content-Type text/csv,
+        application/json or application/x-ndjson) or as a multipart `file`.
+        """
+        if request.content_type.startswith("multipart/form-data"):
+            feed = request.FILES.get("file")
+            if feed is None:
+                return Response({"detail": "No feed file was uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+            feed_format = importer.detect_format(feed.name, feed.content_type or "")
+        else:
+            feed = request.stream
+            feed_format = importer.detect_format(content_type=request.content_type)
+        if feed_format is None or feed is None:
+            return Response(
+                {"detail": f"Send a {', '.join(importer.FORMATS)} feed."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        result = importer.import_vehicles(request.user, feed, feed_format)
+        return Response(result, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["GET"], permission_classes=[permissions.IsAdminUser])
+    def export(self, request):
+        """  Stream the (filtered) catalog as CSV, NDJSON or Parquet (`?export_format=`)
+
+        Rows are read through a server-side cursor and written as they are
+        produced, so memory stays flat however many listings are exported.
+        Sold listings are included with `?include_inactive=true`.
+        """
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in exporter.FORMATS:
+            return Response(
+                {"detail": f"Use one of {', '.join(exporter.FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = Vehicle.objects.all()
+        if request.query_params.get("include_inactive") not in ("1", "true"):
+            queryset = queryset.filter(is_active=True)
+        try:
+            chunks = exporter.export_vehicles(self.filter_queryset(queryset), export_format)
+        except exporter.ExportError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        content_type, extension = exporter.FORMATS[export_format]
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="vehicles.{extension}"'
+        return response
@@ -0,0 +1,74 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Base for in-process buffers that a daemon thread writes to the database.
+    - Subclasses buffer under `self.lock`, implement `flush()`, and call
+      `buffered()` after each write to the buffer.
+    - Flushes run every `flush_interval` seconds (the `flush_interval_setting`
+      setting) and once more at interpreter exit; an interval of 0 writes through.
+    """
+
+    flush_interval_setting = None
+    default_flush_interval = 10
+    description = "buffered writes"
+
+    def __init__(self, flush_interval=None):
+        self._flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, self.flush_interval_setting, self.default_flush_interval)
+
+    def flush(self):
+        raise NotImplementedError
+
+    def buffered(self):
+        if self.flush_interval <= 0:
+            self.flush()  # Write-through when buffering is disabled
+        else:
+            self.start()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-flush", daemon=True)
+            self.thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """  Stop the flush thread and write out whatever is still buffered"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_interval + 5)
+            self.thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush %s on shutdown", self.description)
+
+    def _run(self):
+        while not self.stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush %s", self.description)
+            finally:
+                close_old_connections()